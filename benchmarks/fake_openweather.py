@@ -0,0 +1,198 @@
+"""Local stand-in for the OpenWeather endpoints used by the bot.
+
+Serves ``/geo/1.0/direct``, ``/data/2.5/weather`` and ``/data/2.5/group`` with deterministic
+payloads derived from the city name or coordinates, and can inject latency,
+server errors and a per-minute rate limit (answered with HTTP 429) so the
+weather code can be exercised over real HTTP.  Cities starting with
+``unknown`` geocode to an empty result.
+
+Point the bot at it with ``OPENWEATHER_BASE_URL=http://127.0.0.1:8081``.
+
+Usage::
+
+    python -m benchmarks.fake_openweather --port 8081 --latency-ms 80 --jitter-ms 40 \\
+        --error-rate 0.01 --rate-limit 600
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+_CONDITIONS = ("clear sky", "few clouds", "scattered clouds", "light rain", "snow", "mist")
+
+
+@dataclass(slots=True)
+class FakeServerOptions:
+    """Fault-injection knobs of the fake server."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: int | None = None
+    seed: int | None = None
+
+
+@dataclass(slots=True)
+class FakeServerStats:
+    """Request counters, per endpoint and per outcome."""
+
+    requests: dict[str, int] = field(default_factory=dict)
+    rate_limited: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, object]:
+        return {"requests": dict(self.requests), "rate_limited": self.rate_limited, "errors": self.errors}
+
+
+STATS_KEY = web.AppKey("stats", FakeServerStats)
+
+
+def _city_seed(text: str) -> int:
+    return zlib.crc32(text.strip().lower().encode("utf-8"))
+
+
+def _geocode_payload(query: str) -> list[dict]:
+    city = query.split(",")[0].strip()
+    if not city or city.lower().startswith("unknown"):
+        return []
+    seed = _city_seed(city)
+    return [
+        {
+            "name": city.title(),
+            "lat": round((seed % 18000) / 100 - 90, 4),
+            "lon": round((seed // 18000 % 36000) / 100 - 180, 4),
+            "country": "ZZ",
+        }
+    ]
+
+
+def _weather_payload(lat: float, lon: float) -> dict:
+    seed = _city_seed(f"{lat:.2f},{lon:.2f}")
+    temp = round((seed % 500) / 10 - 15, 1)
+    return {
+        "id": seed % 10_000_000 + 1,
+        "name": f"City {lat:.2f},{lon:.2f}",
+        "coord": {"lat": lat, "lon": lon},
+        "sys": {"country": "ZZ"},
+        "weather": [{"description": _CONDITIONS[seed % len(_CONDITIONS)]}],
+        "main": {"temp": temp, "feels_like": round(temp - 1.5, 1), "humidity": seed % 100},
+        "wind": {"speed": round((seed % 150) / 10, 1)},
+    }
+
+
+def create_app(options: FakeServerOptions | None = None) -> web.Application:
+    """Build the fake OpenWeather application; counters live in ``app[STATS_KEY]``."""
+
+    options = options or FakeServerOptions()
+    rng = random.Random(options.seed)
+    stats = FakeServerStats()
+    calls: deque[float] = deque()
+    known_cities: dict[int, tuple[float, float]] = {}
+
+    async def gate(request: web.Request) -> web.Response | None:
+        stats.requests[request.path] = stats.requests.get(request.path, 0) + 1
+        if options.latency or options.jitter:
+            await asyncio.sleep(max(0.0, options.latency + rng.uniform(-options.jitter, options.jitter)))
+
+        if options.rate_limit is not None:
+            now = time.monotonic()
+            while calls and calls[0] <= now - 60:
+                calls.popleft()
+            if len(calls) >= options.rate_limit:
+                stats.rate_limited += 1
+                return web.json_response({"cod": 429, "message": "rate limit exceeded"}, status=429)
+            calls.append(now)
+
+        if options.error_rate and rng.random() < options.error_rate:
+            stats.errors += 1
+            return web.json_response({"cod": 500, "message": "internal error"}, status=500)
+        return None
+
+    async def geocode(request: web.Request) -> web.Response:
+        return await gate(request) or web.json_response(_geocode_payload(request.query.get("q", "")))
+
+    async def current(request: web.Request) -> web.Response:
+        rejected = await gate(request)
+        if rejected is not None:
+            return rejected
+        try:
+            lat, lon = float(request.query["lat"]), float(request.query["lon"])
+        except (KeyError, ValueError):
+            return web.json_response({"cod": 400, "message": "wrong latitude"}, status=400)
+        payload = _weather_payload(lat, lon)
+        known_cities[payload["id"]] = (lat, lon)
+        return web.json_response(payload)
+
+    async def group(request: web.Request) -> web.Response:
+        rejected = await gate(request)
+        if rejected is not None:
+            return rejected
+        try:
+            city_ids = [int(part) for part in request.query["id"].split(",") if part]
+        except (KeyError, ValueError):
+            return web.json_response({"cod": 400, "message": "invalid id list"}, status=400)
+        if len(city_ids) > 20:
+            return web.json_response({"cod": 400, "message": "too many ids"}, status=400)
+        items = [_weather_payload(*known_cities[city_id]) for city_id in city_ids if city_id in known_cities]
+        return web.json_response({"cnt": len(items), "list": items})
+
+    app = web.Application()
+    app[STATS_KEY] = stats
+    app.router.add_get("/geo/1.0/direct", geocode)
+    app.router.add_get("/data/2.5/weather", current)
+    app.router.add_get("/data/2.5/group", group)
+    return app
+
+
+async def start_server(
+    options: FakeServerOptions | None = None,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> tuple[web.AppRunner, str]:
+    """Start the fake server and return its runner and base URL."""
+
+    runner = web.AppRunner(create_app(options))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per minute before 429s")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def options_from_args(args: argparse.Namespace) -> FakeServerOptions:
+    return FakeServerOptions(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(options_from_args(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
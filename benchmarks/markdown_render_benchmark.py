@@ -0,0 +1,142 @@
+"""Micro-benchmark of the AI reply renderer against the old regex chain.
+
+Builds a large synthetic Gemini-style reply (headings, lists, emphasis,
+inline code, links and fenced code blocks) and times
+:func:`utils.markdown_html.markdown_to_html` against the previous
+``format_ai_response`` implementation, which ran eight ``re.sub`` passes
+with uncompiled patterns.  The report shows mean/p50/p95 per render, MB/s
+and whether Telegram's HTML parser would accept the output (balanced tags,
+no unescaped ``<``/``&``).
+
+Usage::
+
+    python -m benchmarks.markdown_render_benchmark --sections 200 --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import random
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from utils.markdown_html import markdown_to_html
+
+
+def legacy_format_ai_response(text: str) -> str:
+    """The regex-chain renderer ``format_ai_response`` used before the single-pass one."""
+
+    text = re.sub(
+        r'```(\w*)\n(.*?)```',
+        lambda m: f'<pre><code class="language-{m.group(1)}">{html.escape(m.group(2))}</code></pre>',
+        text,
+        flags=re.DOTALL
+    )
+
+    def replace_list(match):
+        item_text = match.group(0).lstrip('*- ').strip()
+        return f"• {item_text}"
+
+    text = re.sub(r'(?:^\s*[-*]\s+.*\n?)+', replace_list, text, flags=re.MULTILINE)
+    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'(?<!\*)\*(?!\*)(.*?)(?<!\*)\*(?!\*)', r'<i>\1</i>', text)
+    text = re.sub(r'__(.*?)__', r'<u>\1</u>', text)
+    text = re.sub(r'~(.*?)~', r'<s>\1</s>', text)
+    text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
+    text = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', text)
+    return text
+
+
+_SECTION = """## Step {n}: configure the `worker_{n}` service
+The worker reads its settings from the environment at startup and keeps them for its whole lifetime, so
+restart it after every change. Most deployments only need the defaults; the options below matter when the
+service shares a host with other bots or runs behind a proxy that rewrites requests.
+Ismat's **deployment guide** covers *every* option; see [the docs](https://example.com/docs/{n}?a=1&b=2).
+- Set `timeout < {n}` seconds & keep __retries__ low
+- Avoid ~~legacy~~ flags such as **--fast *unsafe***
+* Compare x<y and a&b before merging
+
+```python
+def handler_{n}(event):
+    if event.size < {n} and event.kind != "<none>":
+        return {{"ok": True}}
+```
+"""
+
+_TAG_RE = re.compile(r"<(/?)([a-z]+)[^>]*>")
+
+
+def build_reply(sections: int, *, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return "\n".join(_SECTION.format(n=rng.randint(1, 10_000)) for _ in range(sections))
+
+
+def html_is_valid(markup: str) -> bool:
+    """Rough stand-in for Telegram's parser: balanced tags and no raw ``<``/``&``."""
+
+    stack: list[str] = []
+    for match in _TAG_RE.finditer(markup):
+        if match.group(1):
+            if not stack or stack.pop() != match.group(2):
+                return False
+        else:
+            stack.append(match.group(2))
+    bare = _TAG_RE.sub("", markup)
+    return not stack and "<" not in bare and not re.search(r"&(?!(?:lt|gt|amp|quot|#\d+);)", bare)
+
+
+@dataclass(slots=True)
+class RenderResult:
+    name: str
+    timings: list[float]
+    size: int
+    valid: bool
+
+    def as_row(self) -> str:
+        ordered = sorted(self.timings)
+        p95 = ordered[min(len(ordered) - 1, round(0.95 * len(ordered)))]
+        mean = statistics.fmean(ordered)
+        throughput = self.size / mean / 1e6
+        return (
+            f"{self.name:<10} mean={mean * 1000:8.3f}ms p50={statistics.median(ordered) * 1000:8.3f}ms "
+            f"p95={p95 * 1000:8.3f}ms {throughput:7.1f} MB/s valid_html={'yes' if self.valid else 'no'}"
+        )
+
+
+def measure(name: str, render: Callable[[str], str], text: str, rounds: int) -> RenderResult:
+    output = render(text)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        render(text)
+        timings.append(time.perf_counter() - started)
+    return RenderResult(name, timings, len(text.encode("utf-8")), html_is_valid(output))
+
+
+def run(sections: int, rounds: int) -> list[RenderResult]:
+    text = build_reply(sections)
+    results = [
+        measure("legacy", legacy_format_ai_response, text, rounds),
+        measure("one-pass", markdown_to_html, text, rounds),
+    ]
+    print(f"== reply size={len(text) / 1024:.1f} KiB sections={sections} rounds={rounds}")
+    for result in results:
+        print(result.as_row())
+    legacy, current = results
+    print(f"speedup: {statistics.fmean(legacy.timings) / statistics.fmean(current.timings):.2f}x")
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=200, help="repeated Markdown sections in the reply")
+    parser.add_argument("--rounds", type=int, default=50, help="timed renders per implementation")
+    args = parser.parse_args(argv)
+    run(args.sections, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Throughput and latency benchmark for the task storage backends.
+
+Generates a synthetic ``user_tasks.json`` with the requested number of users,
+loads it into each backend and measures ``list_tasks``/``add_task``/
+``remove_task`` latency (p50/p99) and throughput for single-threaded,
+multi-threaded and ``asyncio.to_thread`` access.  Storage size on disk and
+peak RSS are reported as well.  Each backend runs in its own subprocess so
+the RSS numbers do not bleed into each other.
+
+Usage::
+
+    python -m benchmarks.task_storage_benchmark --backend all --users 10000
+    python -m benchmarks.task_storage_benchmark --backend sqlite --users 1000000 --ops 2000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+BACKEND_NAMES = ("json", "sqlite", "journal")
+
+
+@dataclass(slots=True)
+class Measurement:
+    """Latency samples for one access pattern."""
+
+    pattern: str
+    operation: str
+    latencies: list[float]
+    wall_time: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        return len(self.latencies) / self.wall_time if self.wall_time else float("inf")
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def as_row(self) -> str:
+        return (
+            f"{self.pattern:<10} {self.operation:<12} "
+            f"p50={self.percentile(50) * 1000:9.3f}ms "
+            f"p99={self.percentile(99) * 1000:9.3f}ms "
+            f"{self.ops_per_sec:11.1f} ops/s"
+        )
+
+
+def generate_dataset(path: Path, users: int, tasks_per_user: int, *, seed: int = 1) -> None:
+    """Write a synthetic ``user_tasks.json`` in the legacy JSON layout."""
+
+    rng = random.Random(seed)
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write("{")
+        for index in range(users):
+            user_tasks = [
+                {"id": task_id, "text": f"Task {task_id} #{rng.randrange(10**6)}"}
+                for task_id in range(1, tasks_per_user + 1)
+            ]
+            if index:
+                fh.write(",")
+            fh.write(f"{json.dumps(str(_user_id(index)))}:{json.dumps(user_tasks)}")
+        fh.write("}")
+
+
+def _user_id(index: int) -> int:
+    return 100_000_000 + index
+
+
+def _build_backend(name: str, workdir: Path):
+    from utils.task_storage import JournalTaskBackend, JsonTaskBackend, SqliteTaskBackend
+
+    snapshot = workdir / "user_tasks.json"
+    factories: dict[str, Callable[[], object]] = {
+        "json": lambda: JsonTaskBackend(snapshot),
+        "sqlite": lambda: SqliteTaskBackend(workdir / "user_tasks.sqlite3", legacy_json=snapshot),
+        "journal": lambda: JournalTaskBackend(snapshot),
+    }
+    return factories[name]()
+
+
+def _operations(
+    backend, users: int, tasks_per_user: int, removals: int, rng: random.Random
+) -> dict[str, Callable[[], object]]:
+    # Every removal targets a different existing task: first synthetic ones,
+    # then tasks created by add_op.  deque.popleft/append are thread-safe.
+    existing = rng.sample(range(users * tasks_per_user), min(removals, users * tasks_per_user))
+    removable = deque((_user_id(index // tasks_per_user), index % tasks_per_user + 1) for index in existing)
+
+    def list_op() -> object:
+        return backend.list_tasks(_user_id(rng.randrange(users)))
+
+    def add_op() -> object:
+        user_id = _user_id(rng.randrange(users))
+        task = backend.add_task(user_id, "Benchmark task")
+        removable.append((user_id, task["id"]))
+        return task
+
+    def remove_op() -> object:
+        user_id, task_id = removable.popleft()
+        return backend.remove_task(user_id, task_id)
+
+    return {"list_tasks": list_op, "add_task": add_op, "remove_task": remove_op}
+
+
+def _timed(op: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    op()
+    return time.perf_counter() - start
+
+
+def _run_single(op: Callable[[], object], count: int) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    latencies = [_timed(op) for _ in range(count)]
+    return latencies, time.perf_counter() - start
+
+
+def _run_threads(op: Callable[[], object], count: int, workers: int) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(lambda _: _timed(op), range(count)))
+    return latencies, time.perf_counter() - start
+
+
+def _run_to_thread(op: Callable[[], object], count: int, workers: int) -> tuple[list[float], float]:
+    async def runner() -> tuple[list[float], float]:
+        semaphore = asyncio.Semaphore(workers)
+
+        async def one() -> float:
+            async with semaphore:
+                started = time.perf_counter()
+                await asyncio.to_thread(op)
+                return time.perf_counter() - started
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(count)))
+        return list(latencies), time.perf_counter() - start
+
+    return asyncio.run(runner())
+
+
+def run_backend(name: str, *, users: int, tasks_per_user: int, ops: int, workers: int, workdir: Path) -> list[Measurement]:
+    """Benchmark one backend inside *workdir* and print a report."""
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    generate_dataset(workdir / "user_tasks.json", users, tasks_per_user)
+
+    load_start = time.perf_counter()
+    backend = _build_backend(name, workdir)
+    load_time = time.perf_counter() - load_start
+
+    rng = random.Random(2)
+    runners = {
+        "single": lambda op: _run_single(op, ops),
+        "threads": lambda op: _run_threads(op, ops, workers),
+        "to_thread": lambda op: _run_to_thread(op, ops, workers),
+    }
+
+    operations = _operations(backend, users, tasks_per_user, ops * len(runners), rng)
+    results: list[Measurement] = []
+    for pattern, runner in runners.items():
+        for operation, op in operations.items():
+            latencies, wall_time = runner(op)
+            results.append(Measurement(pattern, operation, latencies, wall_time))
+
+    close = getattr(backend, "close", None)
+    if close is not None:
+        close()
+
+    size = sum(path.stat().st_size for path in workdir.iterdir() if path.is_file())
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"== backend={name} users={users} tasks/user={tasks_per_user} ops={ops} workers={workers}")
+    print(f"startup/load: {load_time * 1000:.1f}ms  files on disk: {size / 1024:.1f} KiB  peak RSS: {peak_rss_mb:.1f} MiB")
+    for measurement in results:
+        print(measurement.as_row())
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=(*BACKEND_NAMES, "all"), default="all")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks-per-user", type=int, default=3)
+    parser.add_argument("--ops", type=int, default=500, help="operations per pattern and operation")
+    parser.add_argument("--workers", type=int, default=8, help="threads for concurrent patterns")
+    parser.add_argument("--workdir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if args.backend == "all":
+        for name in BACKEND_NAMES:
+            subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.task_storage_benchmark",
+                    "--backend", name,
+                    "--users", str(args.users),
+                    "--tasks-per-user", str(args.tasks_per_user),
+                    "--ops", str(args.ops),
+                    "--workers", str(args.workers),
+                    *(["--workdir", str(args.workdir)] if args.workdir is not None else []),
+                ],
+                check=True,
+            )
+        return
+
+    with tempfile.TemporaryDirectory(prefix="task-bench-") as tmp:
+        workdir = args.workdir or Path(tmp)
+        # utils.task_storage creates its default backend on import; keep it
+        # inside the scratch directory rather than the real files/ folder.
+        os.environ["USER_TASKS_FILE"] = str(workdir / "default" / "user_tasks.json")
+        os.environ["USER_TASKS_BACKEND"] = "json"
+        run_backend(
+            args.backend,
+            users=args.users,
+            tasks_per_user=args.tasks_per_user,
+            ops=args.ops,
+            workers=args.workers,
+            workdir=workdir / args.backend,
+        )
+
+
+if __name__ == "__main__":
+    main()
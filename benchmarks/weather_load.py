@@ -0,0 +1,197 @@
+"""Load driver for the weather subsystem against the local fake OpenWeather.
+
+Starts :mod:`benchmarks.fake_openweather` in-process, points
+:mod:`utils.weather` at it and pushes concurrent ``/weather`` lookups
+(``fetch_weather_by_city_async`` + ``format_weather_info``, exactly what the
+handler does) and daily digests (``build_weather_digest_async``) through the
+real HTTP code path, including the shared session, caches and quota limiter.
+Throughput, p50/p95/p99 latency, outcome counts and the fake server's
+counters are reported.
+
+Usage::
+
+    python -m benchmarks.weather_load --requests 2000 --concurrency 100 --cities 200 \\
+        --digests 5 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+    python -m benchmarks.weather_load --rate-limit 600 --quota 600 --cache-ttl 0
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from benchmarks.fake_openweather import (
+    STATS_KEY,
+    FakeServerOptions,
+    add_server_arguments,
+    options_from_args,
+    start_server,
+)
+from benchmarks.task_storage_benchmark import Measurement
+
+
+@dataclass(slots=True)
+class LoadReport:
+    """Latency measurements and outcome counters of one load run."""
+
+    measurements: list[Measurement]
+    outcomes: dict[str, Counter] = field(default_factory=dict)
+    server: dict[str, object] = field(default_factory=dict)
+    cache: dict[str, int] = field(default_factory=dict)
+    quota: dict[str, object] = field(default_factory=dict)
+
+    def render(self) -> str:
+        lines = []
+        for measurement in self.measurements:
+            lines.append(
+                f"{measurement.operation:<10} n={len(measurement.latencies):<6} "
+                f"p50={measurement.percentile(50) * 1000:8.1f}ms "
+                f"p95={measurement.percentile(95) * 1000:8.1f}ms "
+                f"p99={measurement.percentile(99) * 1000:8.1f}ms "
+                f"max={max(measurement.latencies) * 1000:8.1f}ms "
+                f"{measurement.ops_per_sec:9.1f} req/s"
+            )
+            outcome = self.outcomes.get(measurement.operation)
+            if outcome:
+                lines.append(f"{'':<10} outcomes: {dict(outcome)}")
+        lines.append(f"fake server: {self.server}")
+        lines.append(f"weather cache: {self.cache}")
+        lines.append(f"quota: {self.quota}")
+        return "\n".join(lines)
+
+
+def _point_at(weather, base_url: str) -> None:
+    weather.BASE_URL = base_url
+    weather.GEOCODING_ENDPOINT = f"{base_url}/geo/1.0/direct"
+    weather.WEATHER_ENDPOINT = f"{base_url}/data/2.5/weather"
+    weather.GROUP_ENDPOINT = f"{base_url}/data/2.5/group"
+
+
+async def _drive(count: int, concurrency: int, call) -> tuple[list[float], float, Counter]:
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes: Counter = Counter()
+
+    async def one(index: int) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(index)
+                outcomes["ok"] += 1
+            except Exception as exc:  # noqa: BLE001 - every failure is an outcome here.
+                outcomes[type(exc).__name__] += 1
+            return time.perf_counter() - started
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(index) for index in range(count)))
+    return list(latencies), time.perf_counter() - start, outcomes
+
+
+async def run_load(
+    *,
+    requests: int,
+    concurrency: int,
+    cities: int,
+    digests: int = 0,
+    digest_size: int = 10,
+    server_options: FakeServerOptions | None = None,
+    quota: int = 100_000,
+    cache_ttl: float | None = None,
+    seed: int = 1,
+) -> LoadReport:
+    """Run the load against a fresh fake server and return the report."""
+
+    from utils import weather
+    from utils.weather_broadcast import build_weather_digest_async, format_weather_info
+
+    runner, base_url = await start_server(server_options)
+    saved = {
+        name: getattr(weather, name)
+        for name in (
+            "BASE_URL", "GEOCODING_ENDPOINT", "WEATHER_ENDPOINT", "GROUP_ENDPOINT",
+            "_GEOCODE_CACHE", "_WEATHER_CACHE", "_QUOTA",
+        )
+    }
+    _point_at(weather, base_url)
+    weather._GEOCODE_CACHE = weather.GeocodeCache(None)
+    weather._WEATHER_CACHE = (
+        weather.WeatherCache() if cache_ttl is None else weather.WeatherCache(cache_ttl)
+    )
+    weather._QUOTA = weather.QuotaLimiter(quota)
+
+    rng = random.Random(seed)
+    city_names = [f"Loadcity{index}" for index in range(cities)]
+    lookups = [rng.choice(city_names) for _ in range(requests)]
+
+    async def weather_command(index: int) -> None:
+        city = lookups[index]
+        payload = await weather.fetch_weather_by_city_async(city, api_key="load-test")
+        format_weather_info(payload, requested_city=city)
+
+    async def digest(index: int) -> None:
+        await build_weather_digest_async(rng.sample(city_names, min(digest_size, cities)), api_key="load-test")
+
+    try:
+        measurements = []
+        outcomes: dict[str, Counter] = {}
+
+        async def measured(operation: str, count: int, parallel: int, call) -> None:
+            latencies, wall_time, counts = await _drive(count, parallel, call)
+            measurements.append(Measurement("load", operation, latencies, wall_time))
+            outcomes[operation] = counts
+
+        jobs = [measured("/weather", requests, concurrency, weather_command)]
+        if digests:
+            jobs.append(measured("digest", digests, digests, digest))
+        await asyncio.gather(*jobs)
+
+        return LoadReport(
+            measurements=measurements,
+            outcomes=outcomes,
+            server=runner.app[STATS_KEY].as_dict(),
+            cache=weather.weather_cache_stats(),
+            quota=weather.quota_stats(),
+        )
+    finally:
+        await weather.close_session()
+        await runner.cleanup()
+        for name, value in saved.items():
+            setattr(weather, name, value)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="number of /weather lookups")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent /weather lookups")
+    parser.add_argument("--cities", type=int, default=100, help="distinct cities to pick from")
+    parser.add_argument("--digests", type=int, default=0, help="daily digests to build alongside")
+    parser.add_argument("--digest-size", type=int, default=10, help="cities per digest")
+    parser.add_argument("--quota", type=int, default=100_000, help="OpenWeather calls per minute budget")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="weather cache TTL in seconds")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_load(
+            requests=args.requests,
+            concurrency=args.concurrency,
+            cities=args.cities,
+            digests=args.digests,
+            digest_size=args.digest_size,
+            server_options=options_from_args(args),
+            quota=args.quota,
+            cache_ttl=args.cache_ttl,
+        )
+    )
+    print(
+        f"== requests={args.requests} concurrency={args.concurrency} cities={args.cities} "
+        f"digests={args.digests} latency={args.latency_ms}ms error_rate={args.error_rate} "
+        f"rate_limit={args.rate_limit}"
+    )
+    print(report.render())
+
+
+if __name__ == "__main__":
+    main()
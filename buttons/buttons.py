@@ -100,8 +100,12 @@ async def help_command(message: types.Message):
         "/help - Show this help message\n"
         "/song <name of the song> - Search YouTube and send back audio.(e.g. /song Name of song)\n"
         "/tasks - Manage your personal to-do list\n"
+        "/addtask <text> - Add tasks, one per line\n"
+        "/done <numbers> - Complete several tasks at once (e.g. /done 1 3)\n"
         "/select_model - Select AI model\n"
         "/weather <city> - Get the current weather for any city (e.g. /weather Dushanbe)\n"
+        "/subscribe <HH:MM> <timezone> <cities> - Daily weather digest (e.g. /subscribe 07:30 Asia/Dushanbe Dushanbe, Khujand)\n"
+        "/unsubscribe - Stop your daily weather digest\n"
     )
 
     logger.info(f"User {message.from_user.id} requested help.")
@@ -115,7 +119,9 @@ async def set_default_commands(bot: Bot):
         types.BotCommand(command="/song", description="Download a song from YouTube"),
         types.BotCommand(command="/clear", description="Clear conversation history"),
         types.BotCommand(command="/select_model", description="Select AI model"),
-        types.BotCommand(command="/weather", description="Weather for city you ask")
+        types.BotCommand(command="/weather", description="Weather for city you ask"),
+        types.BotCommand(command="/subscribe", description="Daily weather digest for your cities"),
+        types.BotCommand(command="/unsubscribe", description="Stop the daily weather digest"),
     ]
     await bot.set_my_commands(commands)
     logger.info("Default commands set.")
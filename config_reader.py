@@ -58,10 +58,29 @@ class Settings(BaseSettings):
     bot_token: SecretStr
     gemini_api_key: SecretStr
     weather_api_key: SecretStr | None = None
+    openweather_base_url: str = "https://api.openweathermap.org"
+    openweather_calls_per_minute: int = 60
 
     weather_broadcast_cities: List[str] = []
     weather_broadcast_chat_ids: List[int] = []
     weather_broadcast_time: dtime | None = None
+    weather_digest_concurrency: int = 5
+    weather_digest_city_timeout: float = 15.0
+    weather_digest_warmup_lead: float = 300.0
+
+    task_page_size: int = 10
+
+    ai_streaming: bool = True
+    ai_stream_edit_interval: float = 1.0
+    ai_history_token_budget: int | None = None
+    ai_history_budgets: dict[str, int] = {}
+    ai_summary_model: str = "gemini-2.5-flash-lite"
+    ai_debounce_window: float = 0.8
+    ai_response_cache_ttl: float = 3600.0
+    ai_response_cache_size: int = 256
+    ai_hedging: bool = True
+    ai_hedge_model: str = "gemini-2.5-flash"
+    ai_latency_budgets: dict[str, float] = {}
     
     # model_config = SettingsConfigDict(env_file = ".env", env_file_encoding = "utf-8")
 
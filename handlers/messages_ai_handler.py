@@ -1,12 +1,19 @@
 import logging
-import re
-import html
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
 from aiogram import Router, F, types, Bot
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 import google.generativeai as genai
 from utils.utils import AIConversation, UserSettings
+from utils.ai_streaming import StreamingReply, answer_html
+from utils.ai_history import DEFAULT_TOKEN_BUDGET, MODEL_TOKEN_BUDGETS, HistoryWindow, summary_prompt
+from utils.ai_queue import DEBOUNCE_WINDOW, PromptQueue
+from utils.markdown_html import markdown_to_html
+from utils.ai_failover import HEDGE_MODEL, LATENCY_BUDGETS, ModelPolicy
 
 from config_reader import config, CONFIG_SYSTEM_INSTRUCTION_TEXT
 import requests
@@ -54,24 +61,141 @@ def _ensure_model(model_name: str) -> genai.GenerativeModel:
 logger = logging.getLogger(__name__)
 router = Router()
 
-async def ai_handles_chat(prompt: str, history: list = None, model_name: str = "gemini-2.5-pro"):
+
+async def summarize_history(summary: str, turns) -> str:
+    """Fold old turns into the running summary with a cheap model."""
+
+    model = genai.GenerativeModel(
+        model_name=getattr(config, "ai_summary_model", "gemini-2.5-flash-lite"),
+        generation_config=genai.types.GenerationConfig(temperature=0.2, max_output_tokens=300),
+    )
+    response = await model.generate_content_async(summary_prompt(summary, turns))
+    return response.text.strip()
+
+
+def _build_history_window() -> HistoryWindow:
+    # AI_HISTORY_TOKEN_BUDGET replaces every per-model default; AI_HISTORY_BUDGETS overrides single models.
+    budget = getattr(config, "ai_history_token_budget", None)
+    return HistoryWindow(
+        summarize_history,
+        default_budget=budget or DEFAULT_TOKEN_BUDGET,
+        budgets={**({} if budget else MODEL_TOKEN_BUDGETS), **getattr(config, "ai_history_budgets", {})},
+    )
+
+
+history_window = _build_history_window()
+
+class ResponseCache:
+    """LRU + TTL cache of replies to first-turn prompts.
+
+    Replies only depend on the model, the prompt and the model setup when
+    there is no history, so such prompts are answered from the cache.  Keys
+    carry a fingerprint of the system instruction and generation settings;
+    entries made under an older fingerprint are dropped on the next lookup.
+    """
+
+    def __init__(self, ttl: float = 3600.0, *, max_entries: int = 256) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, str]] = OrderedDict()
+        self._fingerprint = ""
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(prompt.casefold().split()).rstrip("?!. ")
+
+    @staticmethod
+    def fingerprint() -> str:
+        setup = f"{system_instruction_text}\0{my_configs!r}\0{my_safety_settings!r}"
+        return hashlib.sha256(setup.encode("utf-8")).hexdigest()
+
+    def key(self, model_name: str, prompt: str) -> tuple[str, str, str]:
+        fingerprint = self.fingerprint()
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+        return model_name, self.normalize(prompt), fingerprint
+
+    def get(self, key: tuple[str, str, str]) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple[str, str, str], text: str) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+response_cache = ResponseCache(
+    getattr(config, "ai_response_cache_ttl", 3600.0),
+    max_entries=getattr(config, "ai_response_cache_size", 256),
+)
+
+model_policy = ModelPolicy(
+    hedge_model=getattr(config, "ai_hedge_model", HEDGE_MODEL) if getattr(config, "ai_hedging", False) else None,
+    budgets={**LATENCY_BUDGETS, **getattr(config, "ai_latency_budgets", {})},
+)
+
+# Messages a user sends within the debounce window are answered as one prompt.
+prompt_queue = PromptQueue(getattr(config, "ai_debounce_window", DEBOUNCE_WINDOW))
+
+async def ai_handles_chat(
+    prompt: str,
+    history: list = None,
+    model_name: str = "gemini-2.5-pro",
+    on_chunk: Callable[[str], Awaitable[None]] | None = None,
+):
     """
     Manages a multi-turn conversation with Gemini.
+
+    When *on_chunk* is given the response is streamed and *on_chunk* is
+    awaited with the accumulated text after every chunk.
+
+    Slow requests are hedged with a faster model and retryable errors fall
+    back down the model chain (see ``utils.ai_failover``), so the reply is
+    returned together with the history and the model that produced it
+    (``None`` if every model failed).
     """
-    try:
-        model = _ensure_model(model_name)
+    async def attempt(candidate: str, claim) -> tuple[str, list, str]:
+        model = _ensure_model(candidate)
         # Start a chat session with the provided history
         chat = model.start_chat(history=history or [])
 
-        # Send the user's message and get the response
-        response = await chat.send_message_async(prompt)
-        
-        # Return the response text AND the updated history
-        return response.text, chat.history
-    
+        if on_chunk is None:
+            # Send the user's message and get the response
+            response = await chat.send_message_async(prompt)
+
+            # Return the response text AND the updated history
+            return response.text, chat.history, candidate
+
+        response = await chat.send_message_async(prompt, stream=True)
+        text = ""
+        async for chunk in response:
+            text += chunk.text
+            # The first attempt to show output wins; a slower hedge is cancelled here.
+            if claim():
+                await on_chunk(text)
+        # chat.history is only updated once the stream has been consumed.
+        await response.resolve()
+        return text, chat.history, candidate
+
+    try:
+        return await model_policy.run(model_name, attempt)
     except Exception as e:
         logger.error(f"Error in ai_handles_chat: {e}", exc_info=True)
-        return "Sorry, I couldn't process your request at the moment.", history
+        return "Sorry, I couldn't process your request at the moment.", history, None
 
 # --- 4. Modify the main handler to use FSM ---
 @router.message(F.text & ~F.text.startswith("/"))
@@ -80,42 +204,98 @@ async def ai_handler_message(message: types.Message, state: FSMContext, bot: Bot
     if message.text.startswith('/'):
         return
     
-    user_prompt = message.text
     user = message.from_user
-    logger.info(f"User {user.id} sent prompt: {user_prompt}")
-    
+    started_at = time.monotonic()
+    logger.info(f"User {user.id} sent prompt: {message.text}")
+
     await bot.send_chat_action(chat_id=user.id, action="typing")
 
+    # Wait for follow-up messages; only the first message of a burst answers it.
+    prompts = await prompt_queue.collect(user.id, message.text)
+    if prompts is None:
+        return
+    user_prompt = "\n\n".join(prompts)
+    if len(prompts) > 1:
+        logger.info(f"Merged {len(prompts)} messages from user {user.id} into one prompt")
+
+    # One request per user at a time, so each one sees the previous reply in its history.
+    async with prompt_queue.serialized(user.id):
+        await _answer_prompt(message, state, user_prompt, started_at)
+
+
+async def _answer_prompt(message: types.Message, state: FSMContext, user_prompt: str, started_at: float):
+    user = message.from_user
+
     # Get the current conversation history from the FSM state
     data = await state.get_data()
     selected_model = data.get("model", "gemini-2.5-pro")
     history = data.get('history', [])
+    summary = data.get("history_summary")
+    prefix = history_window.summary_prefix(summary)
 
-    # Get the AI's response AND the new, updated history
-    ai_response_text, new_history = await ai_handles_chat(
-        user_prompt,
-        history,
-        model_name=selected_model,
-    )
-    
+    # Without history the reply depends only on the prompt and the model setup.
+    cache_key = response_cache.key(selected_model, user_prompt) if not history and not summary else None
+    cached = response_cache.get(cache_key) if cache_key else None
+
+    reply = None
+    if cached is not None:
+        logger.info(f"Answering user {user.id} from the response cache")
+        ai_response_text = cached
+        new_history = [
+            {"role": "user", "parts": [user_prompt]},
+            {"role": "model", "parts": [cached]},
+        ]
+    else:
+        if getattr(config, "ai_streaming", False):
+            reply = StreamingReply(
+                message,
+                format_ai_response,
+                min_interval=getattr(config, "ai_stream_edit_interval", 1.0),
+                started_at=started_at,
+            )
+            await reply.start()
+
+        # Get the AI's response AND the new, updated history
+        ai_response_text, new_history, answered_by = await ai_handles_chat(
+            user_prompt,
+            prefix + history,
+            model_name=selected_model,
+            on_chunk=reply.update if reply else None,
+        )
+        # Never cache the apology, and file hedged or fallback replies under the model that wrote them.
+        if cache_key and answered_by is not None:
+            response_cache.put(response_cache.key(answered_by, user_prompt), ai_response_text)
+
+    # Keep only what fits the model's budget; older turns are summarised off the critical path.
+    recent, overflow = history_window.split(new_history[len(prefix):], selected_model, summary=summary)
+    await state.update_data(history=recent)
+    if overflow:
+        async def load_summary():
+            return (await state.get_data()).get("history_summary")
+
+        async def save_summary(updated: str):
+            async with prompt_queue.serialized(user.id):
+                await state.update_data(history_summary=updated)
 
-    await state.update_data(history=new_history)
+        history_window.schedule_summary(user.id, overflow, load_summary, save_summary)
     
     await state.set_state(AIConversation.chatting)
+
+    if reply is not None:
+        await reply.finish(ai_response_text)
+        return
     
-    # Format and send the response
-    formatted_response = format_ai_response(ai_response_text)
-    try:
-        await message.answer(formatted_response, parse_mode="HTML")
-    except Exception as e:
-        logger.error(f"Failed to send formatted message, sending raw. Error: {e}")
-        await message.answer(ai_response_text)
+    # Format and send the response, split into several messages if it is too long
+    await answer_html(message, format_ai_response(ai_response_text))
 
 # --- 5. Add a /clear command to reset the history ---
 @router.message(Command("clear"))
 async def clear_history(message: types.Message, state: FSMContext):
     """Clears the conversation history for the user."""
-    await state.clear()
+    async with prompt_queue.serialized(message.from_user.id):
+        # A summary still being written would otherwise bring the old history back.
+        history_window.cancel(message.from_user.id)
+        await state.clear()
     await message.answer("My memory of our conversation has been cleared. Let's start fresh!")
     logger.info(f"User {message.from_user.id} cleared their conversation history.")
 
@@ -123,50 +303,9 @@ async def clear_history(message: types.Message, state: FSMContext):
 
 def format_ai_response(text: str) -> str:
     """
-    Converts a wide range of Markdown from an AI response into Telegram-safe HTML.
-    This function handles bold, italic, strikethrough, underline, code blocks,
-    lists, and links, while ensuring the text is safe for HTML parsing.
+    Converts the Markdown of an AI response into Telegram-safe HTML.
+    Bold, italic, strikethrough, underline, headings, quotes, code blocks,
+    lists and links are rendered in a single pass and all other text is
+    HTML-escaped, so the reply always parses with parse_mode="HTML".
     """
-    # --- Structural Elements First ---
-
-    # 1. Code Blocks (Multi-line)
-    # This should run first to protect the code inside from further formatting.
-    text = re.sub(
-        r'```(\w*)\n(.*?)```', 
-        lambda m: f'<pre><code class="language-{m.group(1)}">{html.escape(m.group(2))}</code></pre>',
-        text, 
-        flags=re.DOTALL
-    )
-
-    # 2. Lists (Bullet Points)
-    # This finds blocks of list items and wraps them correctly.
-    
-    def replace_list(match):
-        item_text = match.group(0).lstrip('*- ').strip()
-        # Return it as a new line starting with a bullet character.
-        return f"• {item_text}"
-    
-    text = re.sub(r'(?:^\s*[-*]\s+.*\n?)+', replace_list, text, flags=re.MULTILINE)
-
-    # --- Inline Formatting (Applied after structural changes) ---
-
-    # 3. Bold (**text**)
-    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-    
-    # 4. Italic (*text*)
-    # The regex here is designed to not conflict with the bold markers.
-    text = re.sub(r'(?<!\*)\*(?!\*)(.*?)(?<!\*)\*(?!\*)', r'<i>\1</i>', text)
-    
-    # 5. Underline (__text__)
-    text = re.sub(r'__(.*?)__', r'<u>\1</u>', text)
-    
-    # 6. Strikethrough (~text~)
-    text = re.sub(r'~(.*?)~', r'<s>\1</s>', text)
-
-    # 7. Inline Code (`code`)
-    text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
-
-    # 8. Links ([text](url))
-    text = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', text)
-
-    return text
\ No newline at end of file
+    return markdown_to_html(text)
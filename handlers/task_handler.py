@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+import contextlib
 import logging
-from typing import List
+from typing import List, Tuple
 
 from aiogram import Router, F, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 import html
 
-from utils import task_storage
+from config_reader import config
+from utils import async_task_storage
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -23,6 +26,7 @@ class TaskStates(StatesGroup):
 _TASK_STATE_FLAG_KEY = "_task_state_active"
 _TASK_PREVIOUS_STATE_KEY = "_task_previous_state"
 _TASK_NONE_SENTINEL = "__task_state_none__"
+_LAST_PAGE = -1
 
 
 async def _remember_previous_state(state: FSMContext) -> None:
@@ -61,15 +65,18 @@ async def _restore_previous_state(state: FSMContext) -> None:
     else:
         await state.set_state(stored_state)
 
-def _format_tasks(tasks: List[dict]) -> str:
+def _format_tasks(tasks: List[dict], *, offset: int = 0, page: int = 0, pages: int = 1) -> str:
     if not tasks:
         return (
             "You don't have any saved tasks yet.\n"
             "Use the button below or send <code>/addtask &lt;task&gt;</code> to record one."
         )
 
-    lines = ["🗒️ <b>Your tasks:</b>"]
-    for idx, task in enumerate(tasks, start=1):
+    header = "🗒️ <b>Your tasks:</b>"
+    if pages > 1:
+        header = f"🗒️ <b>Your tasks</b> (page {page + 1}/{pages}):"
+    lines = [header]
+    for idx, task in enumerate(tasks, start=offset + 1):
         # Escape user input to avoid unsupported HTML tags
         safe_text = html.escape(task['text'])
         lines.append(f"{idx}. {safe_text}")
@@ -77,21 +84,38 @@ def _format_tasks(tasks: List[dict]) -> str:
     return "\n".join(lines)
 
 
-def _build_keyboard(tasks: List[dict]) -> InlineKeyboardMarkup:
+def _build_keyboard(
+    tasks: List[dict], *, offset: int = 0, page: int = 0, pages: int = 1
+) -> InlineKeyboardMarkup:
     buttons: List[List[InlineKeyboardButton]] = [
         [InlineKeyboardButton(text="➕ Add task", callback_data="task_add")]
     ]
 
-    for idx, task in enumerate(tasks, start=1):
+    for idx, task in enumerate(tasks, start=offset + 1):
         buttons.append(
             [
                 InlineKeyboardButton(
                     text=f"✅ Done {idx}",
-                    callback_data=f"task_done:{task['id']}",
+                    callback_data=f"task_done:{task['id']}:{page}",
                 )
             ]
         )
 
+    if pages > 1:
+        navigation: List[InlineKeyboardButton] = []
+        if page > 0:
+            navigation.append(
+                InlineKeyboardButton(text="◀️ Prev", callback_data=f"task_page:{page - 1}")
+            )
+        navigation.append(
+            InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data=f"task_page:{page}")
+        )
+        if page < pages - 1:
+            navigation.append(
+                InlineKeyboardButton(text="Next ▶️", callback_data=f"task_page:{page + 1}")
+            )
+        buttons.append(navigation)
+
     if tasks:
         buttons.append(
             [InlineKeyboardButton(text="🧹 Clear all", callback_data="task_clear")]
@@ -100,36 +124,80 @@ def _build_keyboard(tasks: List[dict]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-async def _send_task_overview(message: types.Message, tasks: List[dict]) -> None:
-    await message.answer(
-        _format_tasks(tasks),
-        reply_markup=_build_keyboard(tasks),
-        parse_mode="HTML",
+async def _render_overview(user_id: int, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+    """Load and render only the visible page; a negative *page* selects the last one."""
+
+    page_size = max(1, config.task_page_size)
+    tasks, total = await async_task_storage.list_tasks_page(
+        user_id, max(page, 0) * page_size, page_size
+    )
+    pages = max(1, -(-total // page_size))
+    if page < 0 or page >= pages:
+        page = pages - 1
+        tasks, total = await async_task_storage.list_tasks_page(user_id, page * page_size, page_size)
+
+    offset = page * page_size
+    return (
+        _format_tasks(tasks, offset=offset, page=page, pages=pages),
+        _build_keyboard(tasks, offset=offset, page=page, pages=pages),
     )
 
 
+async def _send_task_overview(message: types.Message, user_id: int, page: int = 0) -> None:
+    text, reply_markup = await _render_overview(user_id, page)
+    await message.answer(text, reply_markup=reply_markup, parse_mode="HTML")
+
+
+async def _edit_task_overview(callback_query: types.CallbackQuery, page: int) -> None:
+    text, reply_markup = await _render_overview(callback_query.from_user.id, page)
+    with contextlib.suppress(TelegramBadRequest):  # "message is not modified"
+        await callback_query.message.edit_text(text, reply_markup=reply_markup, parse_mode="HTML")
+
+
 @router.message(Command("tasks"))
 async def tasks_command(message: types.Message, state: FSMContext) -> None:
     await _restore_previous_state(state)
-    tasks = task_storage.list_tasks(message.from_user.id)
-    await _send_task_overview(message, tasks)
+    await _send_task_overview(message, message.from_user.id)
+
+
+@router.callback_query(F.data.startswith("task_page:"))
+async def task_page_callback(callback_query: types.CallbackQuery) -> None:
+    await callback_query.answer()
+    _, page_str = callback_query.data.split(":", 1)
+    try:
+        page = int(page_str)
+    except ValueError:
+        logger.warning("Received invalid task page '%s'", page_str)
+        return
+
+    await _edit_task_overview(callback_query, page)
+
+
+def _split_task_lines(text: str) -> List[str]:
+    """Return one task per non-empty line of *text*."""
+
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _saved_message(count: int) -> str:
+    return "✅ Task saved." if count == 1 else f"✅ {count} tasks saved."
 
 
 @router.message(Command("addtask"))
-async def add_task_command(message: types.Message) -> None:
-    task_text = message.get_args().strip()
-    if not task_text:
+async def add_task_command(message: types.Message, command: CommandObject) -> None:
+    task_texts = _split_task_lines(command.args or "")
+    if not task_texts:
         await message.answer(
-            "Please provide a task description.\nExample: <code>/addtask Review project proposal</code>",
+            "Please provide a task description.\nExample: <code>/addtask Review project proposal</code>\n"
+            "Send several lines to add several tasks at once.",
             parse_mode="HTML",
         )
         return
 
-    task = task_storage.add_task(message.from_user.id, task_text)
-    logger.info("Added task %s for user %s", task["id"], message.from_user.id)
-    tasks = task_storage.list_tasks(message.from_user.id)
-    await message.answer("✅ Task saved.")
-    await _send_task_overview(message, tasks)
+    await async_task_storage.add_tasks(message.from_user.id, task_texts)
+    logger.info("Added %d task(s) for user %s", len(task_texts), message.from_user.id)
+    await message.answer(_saved_message(len(task_texts)))
+    await _send_task_overview(message, message.from_user.id, page=_LAST_PAGE)
 
 
 @router.callback_query(F.data == "task_add")
@@ -138,23 +206,22 @@ async def task_add_button(callback_query: types.CallbackQuery, state: FSMContext
     await _remember_previous_state(state)
     await state.set_state(TaskStates.waiting_for_task_text)
     await callback_query.message.answer(
-        "Please send me the task description.\nSend /cancel to stop adding a task.",
+        "Please send me the task description (one task per line).\nSend /cancel to stop adding a task.",
     )
 
 
 @router.message(TaskStates.waiting_for_task_text)
 async def capture_task_text(message: types.Message, state: FSMContext) -> None:
-    task_text = message.text.strip()
-    if not task_text:
+    task_texts = _split_task_lines(message.text or "")
+    if not task_texts:
         await message.answer("Task text cannot be empty. Please try again or send /cancel.")
         return
 
-    task = task_storage.add_task(message.from_user.id, task_text)
-    logger.info("Added task %s for user %s", task["id"], message.from_user.id)
+    await async_task_storage.add_tasks(message.from_user.id, task_texts)
+    logger.info("Added %d task(s) for user %s", len(task_texts), message.from_user.id)
     await _restore_previous_state(state)
-    tasks = task_storage.list_tasks(message.from_user.id)
-    await message.answer("✅ Task saved.")
-    await _send_task_overview(message, tasks)
+    await message.answer(_saved_message(len(task_texts)))
+    await _send_task_overview(message, message.from_user.id, page=_LAST_PAGE)
 
 
 @router.message(Command("cancel"), TaskStates.waiting_for_task_text)
@@ -166,35 +233,51 @@ async def cancel_task_add(message: types.Message, state: FSMContext) -> None:
 @router.callback_query(F.data.startswith("task_done:"))
 async def task_done_callback(callback_query: types.CallbackQuery) -> None:
     await callback_query.answer()
-    _, task_id_str = callback_query.data.split(":", 1)
+    # Buttons rendered before paging was added carry no page component.
+    _, task_id_str, *page_part = callback_query.data.split(":")
     try:
         task_id = int(task_id_str)
+        page = int(page_part[0]) if page_part else 0
     except ValueError:
-        logger.warning("Received invalid task id '%s'", task_id_str)
+        logger.warning("Received invalid task callback '%s'", callback_query.data)
         return
 
-    removed = task_storage.remove_task(callback_query.from_user.id, task_id)
-    tasks = task_storage.list_tasks(callback_query.from_user.id)
-    text = _format_tasks(tasks)
-    reply_markup = _build_keyboard(tasks)
+    removed = await async_task_storage.remove_task(callback_query.from_user.id, task_id)
 
     if removed:
-        await callback_query.message.edit_text(
-            text,
-            reply_markup=reply_markup,
-            parse_mode="HTML",
-        )
+        await _edit_task_overview(callback_query, page)
     else:
         await callback_query.answer("Task not found.", show_alert=True)
 
 
+@router.message(Command("done"))
+async def done_tasks_command(message: types.Message, command: CommandObject) -> None:
+    numbers: List[int] = []
+    for part in (command.args or "").replace(",", " ").split():
+        try:
+            numbers.append(int(part))
+        except ValueError:
+            continue
+    if not numbers:
+        await message.answer(
+            "Please list the task numbers to complete.\nExample: <code>/done 1 3 4</code>",
+            parse_mode="HTML",
+        )
+        return
+
+    tasks = await async_task_storage.list_tasks(message.from_user.id)
+    task_ids = [tasks[number - 1]["id"] for number in numbers if 1 <= number <= len(tasks)]
+    if not task_ids:
+        await message.answer("No matching tasks found.")
+        return
+
+    await async_task_storage.remove_tasks(message.from_user.id, task_ids)
+    logger.info("Completed %d task(s) for user %s", len(task_ids), message.from_user.id)
+    await _send_task_overview(message, message.from_user.id)
+
+
 @router.callback_query(F.data == "task_clear")
 async def task_clear_callback(callback_query: types.CallbackQuery) -> None:
     await callback_query.answer()
-    task_storage.clear_tasks(callback_query.from_user.id)
-    tasks = task_storage.list_tasks(callback_query.from_user.id)
-    await callback_query.message.edit_text(
-        _format_tasks(tasks),
-        reply_markup=_build_keyboard(tasks),
-        parse_mode="HTML",
-    )
+    await async_task_storage.clear_tasks(callback_query.from_user.id)
+    await _edit_task_overview(callback_query, 0)
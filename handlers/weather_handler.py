@@ -1,12 +1,14 @@
 import logging
 from aiogram import Router, F, Bot
 from aiogram.types import Message
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 
 # --- Import the functions you've already written! ---
-from utils.weather import fetch_weather_by_city, LocationNotFoundError, WeatherServiceError
+from utils.weather import fetch_weather_by_city_async, LocationNotFoundError, WeatherServiceError
 from utils.weather_broadcast import format_weather_info # We can reuse the formatter!
+from utils import weather_subscriptions
+from utils.weather_subscriptions import InvalidSubscriptionError, parse_subscription
 from config_reader import config
 
 logger = logging.getLogger(__name__)
@@ -14,7 +16,7 @@ router = Router()
 
 @router.message(Command("weather"))
 async def get_weather_command(message: Message, bot: Bot, command: Command):
-    city = command.args.strip()
+    city = (command.args or "").strip()
     
     if not city:
         await message.answer("Please provide a city name after the command.\nExample: `/weather Dushanbe`", parse_mode="MarkdownV2")
@@ -25,7 +27,7 @@ async def get_weather_command(message: Message, bot: Bot, command: Command):
     await bot.send_chat_action(chat_id=message.chat.id, action="typing")
     
     try:
-        weather_data = fetch_weather_by_city(
+        weather_data = await fetch_weather_by_city_async(
             city=city,
             api_key=config.weather_api_key.get_secret_value()
         )
@@ -43,4 +45,49 @@ async def get_weather_command(message: Message, bot: Bot, command: Command):
         await message.answer("Sorry, there was an error fetching the weather data. Please try again later.")
     except Exception as e:
         logger.exception(f"An unexpected error occurred in get_weather_command for city {city}: {e}")
-        await message.answer("An unexpected error occurred. Please try again.")
\ No newline at end of file
+        await message.answer("An unexpected error occurred. Please try again.")
+
+
+SUBSCRIBE_USAGE = (
+    "Usage: /subscribe <HH:MM> <timezone> <city>[, <city>...]\n"
+    "Example: /subscribe 07:30 Asia/Dushanbe Dushanbe, Khujand"
+)
+
+
+@router.message(Command("subscribe"))
+async def subscribe_command(message: Message, command: CommandObject):
+    args = (command.args or "").strip()
+
+    if not args:
+        current = await weather_subscriptions.get_subscription(message.chat.id)
+        if current is None:
+            await message.answer(f"You have no weather subscription yet.\n{SUBSCRIBE_USAGE}")
+        else:
+            await message.answer(
+                f"Daily digest at {current.send_at.strftime('%H:%M')} ({current.timezone}) "
+                f"for: {', '.join(current.cities)}.\n{SUBSCRIBE_USAGE}"
+            )
+        return
+
+    try:
+        subscription = parse_subscription(message.chat.id, args)
+    except InvalidSubscriptionError as e:
+        await message.answer(f"{e}\n{SUBSCRIBE_USAGE}")
+        return
+
+    next_fire = await weather_subscriptions.subscribe(subscription)
+    logger.info(f"Chat {message.chat.id} subscribed to weather for {len(subscription.cities)} city(ies).")
+    await message.answer(
+        f"Subscribed! You'll get weather for {', '.join(subscription.cities)} every day at "
+        f"{subscription.send_at.strftime('%H:%M')} ({subscription.timezone}). "
+        f"Next digest: {next_fire.strftime('%Y-%m-%d %H:%M')}."
+    )
+
+
+@router.message(Command("unsubscribe"))
+async def unsubscribe_command(message: Message):
+    if await weather_subscriptions.unsubscribe(message.chat.id):
+        logger.info(f"Chat {message.chat.id} unsubscribed from weather digests.")
+        await message.answer("Your daily weather digest has been cancelled.")
+    else:
+        await message.answer("You don't have a weather subscription.")
@@ -14,11 +14,14 @@ from handlers.weather_handler import router as weather_router
 from buttons.buttons import router as buttons_router
 from buttons.buttons import set_default_commands
 
+from utils import async_task_storage, weather_subscriptions
+from utils.fsm_storage import SQLiteStorage
+from utils.weather import close_session as close_weather_session
 from utils.weather_broadcast import broadcast_daily_weather
 
 
 bot = Bot(token = config.bot_token.get_secret_value())
-dp = Dispatcher()
+dp = Dispatcher(storage=SQLiteStorage())
 
 
 def verify_external_tools() -> None:
@@ -63,6 +66,13 @@ async def main():
     dp.include_router(ai_router)
     dp.include_router(weather_router)
     await set_default_commands(bot)
+    async_task_storage.start()
+    weather_subscriptions.start(
+        bot,
+        api_key=config.weather_api_key.get_secret_value() if config.weather_api_key else None,
+        max_concurrency=config.weather_digest_concurrency,
+        city_timeout=config.weather_digest_city_timeout,
+    )
 
     broadcast_task = None
     if (
@@ -81,6 +91,9 @@ async def main():
                 config.weather_broadcast_chat_ids,
                 config.weather_broadcast_cities,
                 send_at=config.weather_broadcast_time,
+                max_concurrency=config.weather_digest_concurrency,
+                city_timeout=config.weather_digest_city_timeout,
+                warmup_lead=config.weather_digest_warmup_lead,
             )
         )
     else:
@@ -96,6 +109,10 @@ async def main():
             broadcast_task.cancel()
             with contextlib.suppress(asyncio.CancelledError):
                 await broadcast_task
+        await weather_subscriptions.shutdown()
+        await async_task_storage.shutdown()
+        await close_weather_session()
+        await dp.storage.close()
     
     
 if __name__ == "__main__":
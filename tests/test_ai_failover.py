@@ -0,0 +1,97 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_slow_model_is_hedged_and_loser_cancelled():
+    from utils.ai_failover import ModelPolicy
+
+    policy = ModelPolicy(hedge_model="fast", budgets={"slow": 0.05})
+    cancelled = []
+
+    async def attempt(model, claim):
+        try:
+            await asyncio.sleep(1.0 if model == "slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return model
+
+    assert asyncio.run(policy.run("slow", attempt)) == "fast"
+    assert cancelled == ["slow"]
+    assert policy.stats()["hedges"] == policy.stats()["hedge_wins"] == 1
+
+
+def test_fast_answer_skips_the_hedge():
+    from utils.ai_failover import ModelPolicy
+
+    policy = ModelPolicy(hedge_model="fast", budgets={"slow": 0.5})
+    calls = []
+
+    async def attempt(model, claim):
+        calls.append(model)
+        return model
+
+    assert asyncio.run(policy.run("slow", attempt)) == "slow"
+    assert calls == ["slow"]
+
+
+def test_streamed_output_claims_the_request():
+    from utils.ai_failover import ModelPolicy
+
+    policy = ModelPolicy(hedge_model="fast", budgets={"slow": 0.02})
+    shown = []
+
+    async def attempt(model, claim):
+        if model == "fast":
+            await asyncio.sleep(0.5)
+        else:
+            await asyncio.sleep(0.04)
+            assert claim()
+            shown.append(model)
+            await asyncio.sleep(0.02)
+        return model
+
+    assert asyncio.run(policy.run("slow", attempt)) == "slow"
+    assert shown == ["slow"]
+
+
+def test_retryable_errors_fall_back_down_the_chain():
+    from utils.ai_failover import ModelPolicy
+
+    policy = ModelPolicy(chain=("pro", "flash", "lite"), hedge_model=None)
+    calls = []
+
+    async def attempt(model, claim):
+        calls.append(model)
+        if model != "lite":
+            raise ApiError(429 if model == "pro" else 503)
+        return model
+
+    assert asyncio.run(policy.run("pro", attempt)) == "lite"
+    assert calls == ["pro", "flash", "lite"]
+    assert policy.stats()["fallbacks"] == 2
+
+
+def test_non_retryable_errors_are_raised():
+    from utils.ai_failover import ModelPolicy
+
+    policy = ModelPolicy(chain=("pro", "flash"), hedge_model=None)
+
+    async def attempt(model, claim):
+        raise ApiError(400)
+
+    with pytest.raises(ApiError):
+        asyncio.run(policy.run("pro", attempt))
@@ -6,6 +6,9 @@ from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
 sys.path.append(str(Path(__file__).resolve().parents[2]))
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
 
 if "google" not in sys.modules:
     google_module = pytypes.ModuleType("google")
@@ -26,15 +29,28 @@ if "google" not in sys.modules:
         def __init__(self, history=None):
             self.history = history or []
 
-        async def send_message_async(self, prompt: str):
+        async def send_message_async(self, prompt: str, stream: bool = False):
             response_text = "stub-response"
             self.history = [
                 *self.history,
                 {"role": "user", "parts": [prompt]},
                 {"role": "model", "parts": [response_text]},
             ]
+            if stream:
+                return DummyStreamedResponse(["stub-", "response"])
             return SimpleNamespace(text=response_text)
 
+    class DummyStreamedResponse:
+        def __init__(self, chunks):
+            self._chunks = chunks
+
+        async def __aiter__(self):
+            for chunk in self._chunks:
+                yield SimpleNamespace(text=chunk)
+
+        async def resolve(self):
+            return None
+
     class DummyGenerativeModel:
         def __init__(self, **kwargs):  # noqa: D401
             self.kwargs = kwargs
@@ -53,7 +69,9 @@ if "google" not in sys.modules:
     sys.modules["google.generativeai"] = generativeai_module
     sys.modules["google.generativeai.types"] = generativeai_types_module
 
-if "utils" not in sys.modules:
+try:
+    import utils.utils  # noqa: F401 - the real package only needs aiogram.
+except ImportError:
     utils_module = pytypes.ModuleType("utils")
     utils_module.__path__ = []  # Mark as namespace package
     utils_utils_module = pytypes.ModuleType("utils.utils")
@@ -134,6 +152,7 @@ if "requests" not in sys.modules:
     sys.modules["requests"] = requests_module
     sys.modules["requests.exceptions"] = exceptions_module
 
+import assistant_bot.handlers.messages_ai_handler as ai_handler
 from assistant_bot.handlers.messages_ai_handler import ai_handler_message
 
 
@@ -168,3 +187,136 @@ def test_ai_handler_ignores_commands():
 
     bot.send_chat_action.assert_not_awaited()
     message.answer.assert_not_awaited()
+
+
+def test_ai_handler_streams_into_placeholder(monkeypatch):
+    monkeypatch.setattr(
+        ai_handler,
+        "config",
+        SimpleNamespace(ai_streaming=True, ai_stream_edit_interval=0.0),
+    )
+    placeholder = SimpleNamespace(edit_text=AsyncMock())
+    message = SimpleNamespace(
+        text="hello",
+        from_user=SimpleNamespace(id=42),
+        answer=AsyncMock(return_value=placeholder),
+    )
+    state = DummyState({"history": [], "model": "gemini-2.5-flash"})
+
+    asyncio.run(ai_handler_message(message, state, AsyncMock()))
+
+    message.answer.assert_awaited_once()
+    edits = [call.args[0] for call in placeholder.edit_text.await_args_list]
+    assert edits[0] == "stub-"
+    assert edits[-1] == "stub-response"
+    assert len(state._data["history"]) == 2
+
+
+def test_ai_handler_merges_rapid_messages_into_one_request(monkeypatch):
+    from utils.ai_queue import PromptQueue
+
+    monkeypatch.setattr(ai_handler, "config", SimpleNamespace(ai_streaming=False))
+    monkeypatch.setattr(ai_handler, "prompt_queue", PromptQueue(0.05))
+    state = DummyState({"history": [], "model": "gemini-2.5-flash"})
+    messages = [
+        SimpleNamespace(text=text, from_user=SimpleNamespace(id=7), answer=AsyncMock())
+        for text in ("hi", "are you there?", "what's new")
+    ]
+
+    async def burst():
+        await asyncio.gather(*(ai_handler_message(message, state, AsyncMock()) for message in messages))
+
+    asyncio.run(burst())
+
+    assert sum(message.answer.await_count for message in messages) == 1
+    history = state._data["history"]
+    assert len(history) == 2
+    assert history[0]["parts"][0] == "hi\n\nare you there?\n\nwhat's new"
+
+
+def test_ai_handler_answers_repeated_first_turn_from_cache(monkeypatch):
+    monkeypatch.setattr(ai_handler, "config", SimpleNamespace(ai_streaming=False))
+    monkeypatch.setattr(ai_handler, "prompt_queue", ai_handler.PromptQueue(0))
+    monkeypatch.setattr(ai_handler, "response_cache", ai_handler.ResponseCache())
+    calls = []
+    real_chat = ai_handler.ai_handles_chat
+
+    async def counting_chat(*args, **kwargs):
+        calls.append(args[0])
+        return await real_chat(*args, **kwargs)
+
+    monkeypatch.setattr(ai_handler, "ai_handles_chat", counting_chat)
+
+    def ask(text, state):
+        message = SimpleNamespace(text=text, from_user=SimpleNamespace(id=9), answer=AsyncMock())
+        asyncio.run(ai_handler_message(message, state, AsyncMock()))
+        return message
+
+    ask("Who is Ismat?", DummyState({"model": "gemini-2.5-flash"}))
+    state = DummyState({"model": "gemini-2.5-flash"})
+    message = ask("  who is   ismat ", state)
+
+    assert calls == ["Who is Ismat?"]
+    message.answer.assert_awaited_once()
+    assert state._data["history"] == [
+        {"role": "user", "parts": ["  who is   ismat "]},
+        {"role": "model", "parts": ["stub-response"]},
+    ]
+
+    # Follow-up turns depend on the history and always reach the model.
+    ask("who is ismat", state)
+    assert len(calls) == 2
+
+    # Changing the system instruction invalidates cached replies.
+    monkeypatch.setattr(ai_handler, "system_instruction_text", "a new persona")
+    ask("who is ismat", DummyState({"model": "gemini-2.5-flash"}))
+    assert len(calls) == 3
+    assert ai_handler.response_cache.stats()["hits"] == 1
+
+
+def test_fallback_replies_are_cached_under_the_answering_model(monkeypatch):
+    monkeypatch.setattr(ai_handler, "config", SimpleNamespace(ai_streaming=False))
+    monkeypatch.setattr(ai_handler, "prompt_queue", ai_handler.PromptQueue(0))
+    monkeypatch.setattr(ai_handler, "response_cache", ai_handler.ResponseCache())
+    monkeypatch.setattr(ai_handler, "model_policy", ai_handler.ModelPolicy(hedge_model=None))
+    real_ensure_model = ai_handler._ensure_model
+
+    def overloaded_pro(model_name):
+        if model_name == "gemini-2.5-pro":
+            raise ConnectionError("overloaded")
+        return real_ensure_model(model_name)
+
+    monkeypatch.setattr(ai_handler, "_ensure_model", overloaded_pro)
+
+    message = SimpleNamespace(text="Who is Ismat?", from_user=SimpleNamespace(id=11), answer=AsyncMock())
+    asyncio.run(ai_handler_message(message, DummyState({"model": "gemini-2.5-pro"}), AsyncMock()))
+
+    cache = ai_handler.response_cache
+    assert cache.get(cache.key("gemini-2.5-pro", "Who is Ismat?")) is None
+    assert cache.get(cache.key("gemini-2.5-flash", "Who is Ismat?")) == "stub-response"
+
+
+def test_history_budget_setting_moves_the_cut(monkeypatch):
+    history = []
+    for index in range(6):
+        history += [
+            {"role": "user", "parts": [f"q{index} " + "x" * 400]},
+            {"role": "model", "parts": [f"a{index} " + "y" * 400]},
+        ]
+
+    monkeypatch.setattr(ai_handler, "config", SimpleNamespace())
+    default_recent, _ = ai_handler._build_history_window().split(history, "gemini-2.5-pro")
+    assert default_recent == history
+
+    monkeypatch.setattr(ai_handler, "config", SimpleNamespace(ai_history_token_budget=250))
+    recent, overflow = ai_handler._build_history_window().split(history, "gemini-2.5-pro")
+    assert [turn["parts"][0][:2] for turn in recent] == ["q5", "a5"]
+    assert overflow == history[:-2]
+
+    monkeypatch.setattr(
+        ai_handler,
+        "config",
+        SimpleNamespace(ai_history_token_budget=250, ai_history_budgets={"gemini-2.5-pro": 500}),
+    )
+    recent, _ = ai_handler._build_history_window().split(history, "gemini-2.5-pro")
+    assert len(recent) == 4
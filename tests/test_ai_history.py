@@ -0,0 +1,103 @@
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+def _turn(role, text):
+    return {"role": role, "parts": [text]}
+
+
+def _history(exchanges):
+    turns = []
+    for index in range(exchanges):
+        turns += [_turn("user", f"q{index} " + "x" * 40), _turn("model", f"a{index} " + "y" * 40)]
+    return turns
+
+
+def test_split_keeps_recent_exchanges_within_budget():
+    from utils.ai_history import HistoryWindow
+
+    window = HistoryWindow(None, budgets={"m": 60})
+    history = _history(5)
+
+    recent, overflow = window.split(history, "m")
+
+    assert overflow + recent == history
+    assert [t["parts"][0][:2] for t in recent] == ["q3", "a3", "q4", "a4"]
+    assert recent[0]["role"] == "user"
+    # The newest exchange survives even when it alone exceeds the budget.
+    assert HistoryWindow(None, default_budget=1).split(history, "other")[0] == history[-2:]
+
+
+def test_summaries_run_in_order_and_fall_back_on_errors():
+    from utils.ai_history import HistoryWindow
+
+    calls = []
+
+    async def summarizer(summary, turns):
+        calls.append((summary, [text[:2] for _, text in turns]))
+        if len(calls) == 2:
+            raise RuntimeError("quota")
+        await asyncio.sleep(0.01)
+        return f"{summary}+{turns[0][1][:2]}"
+
+    store = {"summary": None}
+
+    async def load():
+        return store["summary"]
+
+    async def save(value):
+        store["summary"] = value
+
+    async def scenario():
+        window = HistoryWindow(summarizer)
+        history = _history(3)
+        window.schedule_summary(1, history[0:2], load, save)
+        window.schedule_summary(1, history[2:4], load, save)
+        last = window.schedule_summary(1, history[4:6], load, save)
+        await last
+
+    asyncio.run(scenario())
+
+    assert calls[0] == ("", ["q0", "a0"])
+    assert calls[1] == ("+q0", ["q1", "a1"])
+    assert calls[2][0].startswith("+q0\nuser: q1")
+    assert store["summary"].endswith("+q2")
+
+
+def test_cancel_drops_pending_summaries():
+    from utils.ai_history import HistoryWindow
+
+    started = asyncio.Event()
+
+    async def summarizer(summary, turns):
+        started.set()
+        await asyncio.sleep(10)
+        return "stale"
+
+    store = {"summary": None}
+
+    async def load():
+        return store["summary"]
+
+    async def save(value):
+        store["summary"] = value
+
+    async def scenario():
+        window = HistoryWindow(summarizer)
+        history = _history(2)
+        first = window.schedule_summary(1, history[0:2], load, save)
+        second = window.schedule_summary(1, history[2:4], load, save)
+        await started.wait()
+        window.cancel(1)
+        await asyncio.gather(first, second, return_exceptions=True)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first.cancelled() and second.cancelled()
+    assert store["summary"] is None
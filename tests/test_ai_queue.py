@@ -0,0 +1,48 @@
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+def test_collect_merges_messages_within_window():
+    from utils.ai_queue import PromptQueue
+
+    queue = PromptQueue(0.05)
+
+    async def scenario():
+        first = asyncio.create_task(queue.collect(1, "a"))
+        await asyncio.sleep(0.02)
+        second = await queue.collect(1, "b")
+        other_user = await queue.collect(2, "c")
+        return await first, second, other_user
+
+    first, second, other_user = asyncio.run(scenario())
+
+    assert first == ["a", "b"]
+    assert second is None
+    assert other_user == ["c"]
+    assert queue.stats()["collecting"] == 0
+
+
+def test_serialized_runs_one_request_per_key_at_a_time():
+    from utils.ai_queue import PromptQueue
+
+    queue = PromptQueue(0)
+    events = []
+
+    async def request(key, name):
+        async with queue.serialized(key):
+            events.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}-end")
+
+    async def scenario():
+        await asyncio.gather(request(1, "a"), request(1, "b"))
+
+    asyncio.run(scenario())
+
+    assert events == ["a-start", "a-end", "b-start", "b-end"]
+    assert queue.stats()["active_users"] == 0
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+def test_close_open_tags_balances_partial_markup():
+    from utils.ai_streaming import close_open_tags
+
+    assert close_open_tags("<b>bold <i>both") == "<b>bold <i>both</i></b>"
+    assert close_open_tags("text <a href=\"https://exa") == "text "
+    assert close_open_tags("<b>x</i> y</b>") == "<b>x y</b>"
+    assert close_open_tags('<pre><code class="language-py">x = 1') == (
+        '<pre><code class="language-py">x = 1</code></pre>'
+    )
+
+
+def test_render_partial_closes_unfinished_code_fence():
+    from utils.ai_streaming import render_partial
+
+    def formatter(text):
+        return text.replace("```\n", "<pre>").replace("\n```", "</pre>")
+
+    assert render_partial("Look:\n```\nprint(1)", formatter) == "Look:\n<pre>print(1)</pre>"
+
+
+def test_streaming_reply_throttles_edits_and_records_first_token():
+    from utils import ai_streaming
+
+    placeholder = SimpleNamespace(edit_text=AsyncMock())
+    message = SimpleNamespace(answer=AsyncMock(return_value=placeholder))
+
+    async def scenario():
+        reply = ai_streaming.StreamingReply(message, lambda text: text, min_interval=0.2)
+        await reply.start()
+        for index in range(1, 11):
+            await reply.update("x" * index)
+            await asyncio.sleep(0.01)
+        await reply.finish("x" * 10 + " done")
+        return reply
+
+    reply = asyncio.run(scenario())
+
+    edits = [call.args[0] for call in placeholder.edit_text.await_args_list]
+    assert edits[0] == "x"
+    assert edits[-1] == "xxxxxxxxxx done"
+    assert len(edits) <= 3
+    assert reply.time_to_first_token is not None
+    assert ai_streaming.streaming_stats()["count"] >= 1
+
+
+def test_split_html_cuts_at_paragraphs_and_reopens_tags():
+    from utils.ai_streaming import split_html
+
+    paragraph = "<b>" + "word " * 30 + "</b>"
+    markup = "\n\n".join([paragraph] * 4)
+
+    chunks = split_html(markup, limit=400)
+
+    assert len(chunks) == 2
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert chunks[0].endswith("\n\n") and chunks[1].startswith("<b>")
+    assert "".join(chunks) == markup
+
+
+def test_split_html_keeps_entities_and_code_blocks_intact():
+    from utils.ai_streaming import close_open_tags, split_html
+
+    code = "\n".join(f"x{index} = a &lt; b &amp;&amp; c" for index in range(40))
+    markup = f'<pre><code class="language-py">{code}</code></pre>'
+
+    chunks = split_html(markup, limit=300)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 300
+        assert chunk.startswith('<pre><code class="language-py">')
+        assert chunk.endswith("</code></pre>")
+        assert close_open_tags(chunk) == chunk
+        assert "&lt;" in chunk and not chunk.replace("&lt;", "").replace("&amp;", "").count("&")
+
+
+def test_streaming_reply_continues_in_new_messages_when_too_long(monkeypatch):
+    from utils import ai_streaming
+
+    monkeypatch.setattr(ai_streaming.split_html, "__defaults__", (120,))
+    placeholder = SimpleNamespace(edit_text=AsyncMock())
+    continuation = SimpleNamespace(edit_text=AsyncMock())
+    message = SimpleNamespace(answer=AsyncMock(side_effect=[placeholder, continuation]))
+    lines = [f"line {index} " + "x" * 20 for index in range(6)]
+
+    async def scenario():
+        reply = ai_streaming.StreamingReply(message, lambda text: text, min_interval=0)
+        await reply.start()
+        await reply.update("\n".join(lines[:2]))
+        await reply.update("\n".join(lines[:5]))
+        await reply.finish("\n".join(lines))
+
+    asyncio.run(scenario())
+
+    # The second message was sent while streaming and then completed by an edit.
+    assert message.answer.await_count == 2
+    first = placeholder.edit_text.await_args_list[-1].args[0]
+    second = continuation.edit_text.await_args_list[-1].args[0]
+    assert len(first) <= 120 and len(second) <= 120
+    assert first + second == "\n".join(lines)
+
+
+def test_answer_html_sends_chunks_in_order_with_plain_fallback(monkeypatch):
+    from unittest.mock import MagicMock
+
+    from aiogram.exceptions import TelegramBadRequest
+
+    from utils import ai_streaming
+
+    monkeypatch.setattr(ai_streaming.split_html, "__defaults__", (60,))
+    sent = []
+
+    async def answer(text, parse_mode=None):
+        if parse_mode and "bad" in text:
+            raise TelegramBadRequest(MagicMock(), "can't parse entities")
+        sent.append((text, parse_mode))
+
+    markup = "<b>first paragraph is fine</b>\n\n<i>bad &amp; rejected paragraph</i>"
+    asyncio.run(ai_streaming.answer_html(SimpleNamespace(answer=answer), markup))
+
+    assert sent == [
+        ("<b>first paragraph is fine</b>\n\n", "HTML"),
+        ("bad & rejected paragraph", None),
+    ]
@@ -0,0 +1,138 @@
+import asyncio
+import importlib
+import sys
+
+
+def _load_modules(tmp_path, monkeypatch):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "tasks.json"))
+    monkeypatch.setenv("USER_TASKS_BACKEND", "json")
+    for name in ("assistant_bot.utils.task_storage", "assistant_bot.utils.async_task_storage"):
+        sys.modules.pop(name, None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+    async_storage = importlib.import_module("assistant_bot.utils.async_task_storage")
+    return storage, async_storage
+
+
+class CountingBackend:
+    def __init__(self, backend):
+        self._backend = backend
+        self.batches = []
+
+    def list_tasks(self, user_id):
+        return self._backend.list_tasks(user_id)
+
+    def list_tasks_page(self, user_id, offset, limit):
+        return self._backend.list_tasks_page(user_id, offset, limit)
+
+    def reserve_ids(self, user_id, count):
+        return self._backend.reserve_ids(user_id, count)
+
+    def write_users(self, snapshots):
+        self.batches.append(snapshots)
+        self._backend.write_users(snapshots)
+
+
+def test_write_behind_coalesces_mutations(tmp_path, monkeypatch):
+    storage, async_storage = _load_modules(tmp_path, monkeypatch)
+    backend = CountingBackend(storage.JsonTaskBackend(tmp_path / "store.json"))
+
+    async def scenario():
+        store = async_storage.WriteBehindTaskStore(backend, flush_interval=60)
+        store.start()
+        await store.add_task(1, "First")
+        second = await store.add_task(1, "Second")
+        await store.add_task(2, "Other user")
+        assert await store.remove_task(1, 1) is True
+        assert await store.remove_task(1, 42) is False
+        assert backend.batches == []
+        await store.shutdown()
+        return second
+
+    second = asyncio.run(scenario())
+
+    assert second == {"id": 2, "text": "Second"}
+    assert len(backend.batches) == 1
+    assert backend.list_tasks(1) == [{"id": 2, "text": "Second"}]
+    assert backend.list_tasks(2) == [{"id": 1, "text": "Other user"}]
+
+
+def test_clear_tasks_is_flushed(tmp_path, monkeypatch):
+    storage, async_storage = _load_modules(tmp_path, monkeypatch)
+    backend = storage.JsonTaskBackend(tmp_path / "store.json")
+    backend.add_task(9, "Existing")
+
+    async def scenario():
+        store = async_storage.WriteBehindTaskStore(backend, flush_interval=60)
+        assert await store.list_tasks(9) == [{"id": 1, "text": "Existing"}]
+        await store.clear_tasks(9)
+        await store.flush()
+
+    asyncio.run(scenario())
+
+    assert backend.list_tasks(9) == []
+
+
+def test_new_ids_come_from_the_backend_sequence(tmp_path, monkeypatch):
+    storage, async_storage = _load_modules(tmp_path, monkeypatch)
+    backend = storage.SqliteTaskBackend(tmp_path / "tasks.sqlite3")
+
+    async def scenario():
+        store = async_storage.WriteBehindTaskStore(backend, flush_interval=60)
+        await store.add_tasks(5, ["One", "Two", "Three"])
+        assert await store.remove_task(5, 3) is True
+        await store.flush()
+        return await store.add_task(5, "Four")
+
+    assert asyncio.run(scenario()) == {"id": 4, "text": "Four"}
+
+
+class FailingBackend(CountingBackend):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.fail = True
+
+    def write_users(self, snapshots):
+        if self.fail:
+            raise OSError("disk full")
+        super().write_users(snapshots)
+
+
+def test_failed_flush_keeps_users_cached(tmp_path, monkeypatch):
+    storage, async_storage = _load_modules(tmp_path, monkeypatch)
+    backend = FailingBackend(storage.JsonTaskBackend(tmp_path / "store.json"))
+    backend.add_task = backend._backend.add_task
+    for user_id in (2, 3, 4):
+        backend.add_task(user_id, "Clean")
+
+    async def scenario():
+        store = async_storage.WriteBehindTaskStore(backend, flush_interval=60, max_cached_users=1)
+        await store.add_task(1, "Unsaved")
+        await store.flush()
+        # Loading other users must not evict the user whose write failed.
+        for user_id in (2, 3, 4):
+            await store.list_tasks(user_id)
+        backend.fail = False
+        await store.flush()
+
+    asyncio.run(scenario())
+
+    assert backend.list_tasks(1) == [{"id": 1, "text": "Unsaved"}]
+
+
+def test_pages_of_uncached_users_come_from_the_backend(tmp_path, monkeypatch):
+    storage, async_storage = _load_modules(tmp_path, monkeypatch)
+    backend = storage.JsonTaskBackend(tmp_path / "store.json")
+    backend.add_tasks(7, ["One", "Two", "Three"])
+
+    async def scenario():
+        store = async_storage.WriteBehindTaskStore(backend, flush_interval=60)
+        first = await store.list_tasks_page(7, 1, 1)
+        await store.add_task(7, "Four")
+        # Once cached, pages include changes that are not flushed yet.
+        second = await store.list_tasks_page(7, 2, 5)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == ([{"id": 2, "text": "Two"}], 3)
+    assert second == ([{"id": 3, "text": "Three"}, {"id": 4, "text": "Four"}], 4)
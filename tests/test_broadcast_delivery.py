@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+
+def _retry_after(seconds: int) -> TelegramRetryAfter:
+    return TelegramRetryAfter(
+        method=SendMessage(chat_id=0, text="x"),
+        message="Too Many Requests",
+        retry_after=seconds,
+    )
+
+
+def test_deliver_broadcast_retries_flood_limited_chats(tmp_path):
+    from utils.broadcast_delivery import deliver_broadcast, load_checkpoint
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = [None, _retry_after(0), None, None]
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    report = asyncio.run(
+        deliver_broadcast(
+            bot,
+            [1, 2, 3],
+            "Morning!",
+            broadcast_id="daily-1",
+            checkpoint_path=checkpoint_path,
+            max_concurrency=1,
+            per_chat_interval=0,
+            global_rate=1000,
+        )
+    )
+
+    assert report.delivered == 3
+    assert report.failed == 0
+    assert bot.send_message.await_count == 4
+    stored = load_checkpoint(checkpoint_path)
+    assert stored.completed is True
+    assert stored.delivered == {1, 2, 3}
+
+
+def test_flood_limit_pauses_every_worker(tmp_path):
+    from utils.broadcast_delivery import deliver_broadcast
+
+    sent_at: dict[int, float] = {}
+    flooded = False
+
+    async def send_message(chat_id, text, **kwargs):
+        nonlocal flooded
+        if chat_id == 1 and not flooded:
+            flooded = True
+            await asyncio.sleep(0.05)
+            raise _retry_after(1)
+        sent_at[chat_id] = asyncio.get_running_loop().time()
+        await asyncio.sleep(0.1)
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = send_message
+
+    async def scenario():
+        started = asyncio.get_running_loop().time()
+        report = await deliver_broadcast(
+            bot,
+            [1, 2, 3, 4],
+            "Morning!",
+            broadcast_id="daily-3",
+            checkpoint_path=tmp_path / "checkpoint.json",
+            max_concurrency=2,
+            per_chat_interval=0,
+            global_rate=1000,
+        )
+        return started, report
+
+    started, report = asyncio.run(scenario())
+
+    assert report.delivered == 4
+    # Chat 2 went out with chat 1's first attempt; the rest waited out the 429.
+    assert sent_at[2] - started < 0.5
+    assert all(sent_at[chat_id] - started >= 0.9 for chat_id in (1, 3, 4))
+
+
+def test_concurrent_deliveries_share_the_global_rate(monkeypatch):
+    import utils.broadcast_delivery as delivery
+
+    monkeypatch.setattr(delivery, "GLOBAL_RATE", 20.0)
+    bot = AsyncMock()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(
+            *(
+                delivery.deliver_checkpoint(
+                    bot,
+                    delivery.DeliveryCheckpoint(broadcast_id=name, text="Hi", chat_ids=list(chat_ids)),
+                    checkpoint_path=None,
+                    per_chat_interval=0,
+                )
+                for name, chat_ids in (("daily", range(15)), ("subscription", range(100, 115)))
+            )
+        )
+        return loop.time() - started
+
+    elapsed = asyncio.run(scenario())
+
+    # A full bucket covers 20 sends; the other 10 need half a second at 20/s.
+    assert bot.send_message.await_count == 30
+    assert elapsed >= 0.45
+
+
+def test_every_delivery_is_recorded_before_the_broadcast_ends(tmp_path):
+    from utils.broadcast_delivery import deliver_broadcast, load_checkpoint
+
+    checkpoint_path = tmp_path / "checkpoint.json"
+    stuck = asyncio.Event()
+
+    async def send_message(chat_id, text, **kwargs):
+        if chat_id == 3:
+            stuck.set()
+            await asyncio.Event().wait()
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = send_message
+
+    async def scenario():
+        task = asyncio.create_task(
+            deliver_broadcast(
+                bot,
+                [1, 2, 3],
+                "Morning!",
+                broadcast_id="daily-4",
+                checkpoint_path=checkpoint_path,
+                max_concurrency=1,
+                per_chat_interval=0,
+                global_rate=1000,
+            )
+        )
+        await stuck.wait()
+        # What a restart would see if the process died right now.
+        snapshot = load_checkpoint(checkpoint_path)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return snapshot
+
+    snapshot = asyncio.run(scenario())
+
+    assert snapshot.delivered == {1, 2}
+    assert snapshot.pending == [3]
+    assert not checkpoint_path.with_suffix(".log").exists()
+
+
+def test_resume_sends_only_to_remaining_chats(tmp_path):
+    from utils.broadcast_delivery import (
+        DeliveryCheckpoint,
+        deliver_broadcast,
+        resume_pending_broadcast,
+        save_checkpoint,
+    )
+
+    checkpoint_path = tmp_path / "checkpoint.json"
+    save_checkpoint(
+        DeliveryCheckpoint(
+            broadcast_id="daily-2",
+            text="Stored report",
+            chat_ids=[10, 20, 30],
+            delivered={10},
+        ),
+        checkpoint_path,
+    )
+    bot = AsyncMock()
+
+    report = asyncio.run(
+        resume_pending_broadcast(bot, checkpoint_path=checkpoint_path, per_chat_interval=0)
+    )
+
+    assert report.delivered == 3
+    assert report.skipped == 1
+    sent_to = sorted(call.args[0] for call in bot.send_message.await_args_list)
+    assert sent_to == [20, 30]
+    assert all(call.args[1] == "Stored report" for call in bot.send_message.await_args_list)
+
+    # A completed broadcast with the same id is not sent again.
+    again = asyncio.run(
+        deliver_broadcast(bot, [10, 20, 30], "Stored report", broadcast_id="daily-2", checkpoint_path=checkpoint_path)
+    )
+    assert again.skipped == 3
+    assert bot.send_message.await_count == 2
@@ -0,0 +1,66 @@
+import asyncio
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+def _key(user_id=1):
+    from aiogram.fsm.storage.base import StorageKey
+
+    return StorageKey(bot_id=10, chat_id=user_id, user_id=user_id)
+
+
+def test_state_and_history_survive_restart(tmp_path):
+    from utils.fsm_storage import SQLiteStorage
+    from utils.utils import AIConversation
+
+    path = tmp_path / "fsm.sqlite3"
+    content = SimpleNamespace(role="model", parts=[SimpleNamespace(text="Hi "), SimpleNamespace(text="there")])
+
+    async def write():
+        storage = SQLiteStorage(path)
+        await storage.set_state(_key(), AIConversation.chatting)
+        await storage.update_data(_key(), {"model": "gemini-2.5-flash"})
+        await storage.update_data(_key(), {"history": [{"role": "user", "parts": ["Hello"]}, content]})
+        await storage.close()
+
+    async def read():
+        storage = SQLiteStorage(path)
+        result = await storage.get_state(_key()), await storage.get_data(_key()), await storage.get_data(_key(2))
+        await storage.close()
+        return result
+
+    asyncio.run(write())
+    state, data, other = asyncio.run(read())
+
+    assert state == AIConversation.chatting.state
+    assert data == {
+        "model": "gemini-2.5-flash",
+        "history": [{"role": "user", "parts": ["Hello"]}, {"role": "model", "parts": ["Hi there"]}],
+    }
+    assert other == {}
+
+
+def test_clearing_state_removes_the_row(tmp_path):
+    from utils.fsm_storage import SQLiteStorage
+
+    path = tmp_path / "fsm.sqlite3"
+
+    async def scenario():
+        storage = SQLiteStorage(path)
+        await storage.set_data(_key(), {"history": [{"role": "user", "parts": ["x" * 5000]}]})
+        size = sqlite3.connect(path).execute("SELECT length(data) FROM fsm").fetchone()[0]
+        await storage.set_state(_key(), None)
+        await storage.set_data(_key(), {})
+        await storage.close()
+        return size
+
+    compressed_size = asyncio.run(scenario())
+
+    assert compressed_size < 200
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM fsm").fetchone()[0] == 0
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from utils.markdown_html import markdown_to_html
+
+
+def test_text_outside_code_is_escaped():
+    assert markdown_to_html("if a < b && c > d") == "if a &lt; b &amp;&amp; c &gt; d"
+
+
+def test_inline_formatting_nests_validly():
+    rendered = markdown_to_html("**bold *and italic* text**, `x<y`, __under__ ~~gone~~")
+
+    assert rendered == (
+        "<b>bold <i>and italic</i> text</b>, <code>x&lt;y</code>, <u>under</u> <s>gone</s>"
+    )
+
+
+def test_unpaired_markers_stay_literal():
+    assert markdown_to_html("2 * 3 = 6, snake_case and *open") == "2 * 3 = 6, snake_case and *open"
+    assert markdown_to_html(r"\*not italic\*") == "*not italic*"
+
+
+def test_code_blocks_lists_headings_and_quotes():
+    text = "## Setup\n- install **deps**\n  * nested\n> note\n> more\n```python\nprint('<b>**x**</b>')\n```\ndone"
+
+    assert markdown_to_html(text) == (
+        "<b>Setup</b>\n• install <b>deps</b>\n  • nested\n<blockquote>note\nmore</blockquote>\n"
+        '<pre><code class="language-python">print(\'&lt;b&gt;**x**&lt;/b&gt;\')</code></pre>\ndone'
+    )
+
+
+def test_unterminated_code_block_is_closed():
+    assert markdown_to_html("```\nx = 1 < 2") == "<pre><code>x = 1 &lt; 2</code></pre>"
+
+
+def test_links_are_escaped_and_limited_to_safe_schemes():
+    rendered = markdown_to_html('[docs](https://example.com/?a=1&b="2") and [bad](javascript:alert)')
+
+    assert rendered == '<a href="https://example.com/?a=1&amp;b=&quot;2&quot;">docs</a> and bad'
+
+
+def test_benchmark_reports_both_renderers(capsys):
+    from benchmarks.markdown_render_benchmark import run
+
+    legacy, current = run(sections=3, rounds=2)
+
+    assert current.valid
+    assert len(legacy.timings) == len(current.timings) == 2
+    assert "speedup" in capsys.readouterr().out
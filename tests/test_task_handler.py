@@ -0,0 +1,60 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+
+def _load_handler(tmp_path, monkeypatch, page_size):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "tasks.json"))
+    monkeypatch.setenv("USER_TASKS_BACKEND", "json")
+    handler = importlib.import_module("assistant_bot.handlers.task_handler")
+    async_storage = handler.async_task_storage
+    fresh_store = async_storage.WriteBehindTaskStore(
+        async_storage.task_storage.JsonTaskBackend(tmp_path / "store.json")
+    )
+    monkeypatch.setattr(handler.async_task_storage, "_STORE", fresh_store)
+    monkeypatch.setattr(handler, "config", SimpleNamespace(task_page_size=page_size))
+    return handler
+
+
+def _callbacks(markup):
+    return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+
+def test_overview_renders_only_visible_page(tmp_path, monkeypatch):
+    handler = _load_handler(tmp_path, monkeypatch, page_size=2)
+
+    async def scenario():
+        await handler.async_task_storage.add_tasks(1, ["One", "Two", "Three", "Four", "Five"])
+        return await handler._render_overview(1, 1), await handler._render_overview(1, handler._LAST_PAGE)
+
+    (text, markup), (last_text, last_markup) = asyncio.run(scenario())
+
+    assert "(page 2/3)" in text
+    assert "3. Three" in text and "4. Four" in text
+    assert "One" not in text and "Five" not in text
+    assert _callbacks(markup) == [
+        "task_add",
+        "task_done:3:1",
+        "task_done:4:1",
+        "task_page:0",
+        "task_page:1",
+        "task_page:2",
+        "task_clear",
+    ]
+
+    assert "5. Five" in last_text
+    assert "task_page:2" in _callbacks(last_markup)
+    assert not any(data == "task_page:3" for data in _callbacks(last_markup))
+
+
+def test_single_page_has_no_navigation(tmp_path, monkeypatch):
+    handler = _load_handler(tmp_path, monkeypatch, page_size=10)
+
+    async def scenario():
+        await handler.async_task_storage.add_task(1, "Only")
+        return await handler._render_overview(1, 0)
+
+    text, markup = asyncio.run(scenario())
+
+    assert text.startswith("🗒️ <b>Your tasks:</b>")
+    assert _callbacks(markup) == ["task_add", "task_done:1:0", "task_clear"]
@@ -45,3 +45,138 @@ def test_remove_and_clear_tasks(task_storage_module):
 
     storage.clear_tasks(5)
     assert storage.list_tasks(5) == []
+
+
+def test_sqlite_backend_migrates_existing_json(tmp_path, monkeypatch):
+    legacy_path = tmp_path / "tasks.json"
+    legacy_path.write_text(
+        '{"7": [{"id": 1, "text": "Old task"}, {"id": 4, "text": "Another"}]}',
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("USER_TASKS_FILE", str(legacy_path))
+    monkeypatch.setenv("USER_TASKS_BACKEND", "sqlite")
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+
+    assert [t["text"] for t in storage.list_tasks(7)] == ["Old task", "Another"]
+    assert storage.add_task(7, "New task")["id"] == 5
+    assert (tmp_path / "tasks.sqlite3").exists()
+
+
+def test_json_backend_keeps_file_format(tmp_path, monkeypatch):
+    storage_path = tmp_path / "tasks.json"
+    monkeypatch.setenv("USER_TASKS_FILE", str(storage_path))
+    monkeypatch.setenv("USER_TASKS_BACKEND", "json")
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+
+    storage.add_task(3, "Persist me")
+
+    assert '"3"' in storage_path.read_text(encoding="utf-8")
+    assert storage.list_tasks(3) == [{"id": 1, "text": "Persist me"}]
+
+
+def test_journal_backend_replays_and_tolerates_torn_tail(tmp_path):
+    from assistant_bot.utils.task_storage import JournalTaskBackend
+
+    snapshot = tmp_path / "tasks.json"
+    backend = JournalTaskBackend(snapshot, compact_every=10_000)
+    backend.add_task(1, "Keep me")
+    backend.add_task(1, "Drop me")
+    backend.remove_task(1, 2)
+    backend.close()
+
+    journal = tmp_path / "tasks.journal"
+    with journal.open("a", encoding="utf-8") as fh:
+        fh.write('{"op": "add", "user": "1", "id": 3, "te')
+
+    reopened = JournalTaskBackend(snapshot, compact_every=10_000)
+    assert reopened.list_tasks(1) == [{"id": 1, "text": "Keep me"}]
+    # Id 2 was removed but stays used; the torn record never took id 3.
+    assert reopened.add_task(1, "After crash")["id"] == 3
+
+    reopened.compact()
+    reopened.close()
+
+    assert journal.read_text(encoding="utf-8") == ""
+    compacted = JournalTaskBackend(snapshot, compact_every=10_000)
+    assert [t["text"] for t in compacted.list_tasks(1)] == ["Keep me", "After crash"]
+    compacted.close()
+
+
+def test_journal_backend_terminates_unterminated_final_record(tmp_path):
+    from assistant_bot.utils.task_storage import JournalTaskBackend
+
+    snapshot = tmp_path / "tasks.json"
+    journal = tmp_path / "tasks.journal"
+    journal.write_text('{"op": "add", "user": "1", "id": 1, "text": "Complete"}', encoding="utf-8")
+
+    backend = JournalTaskBackend(snapshot, compact_every=10_000)
+    backend.add_task(1, "Next")
+    backend.close()
+
+    reopened = JournalTaskBackend(snapshot, compact_every=10_000)
+    assert [t["text"] for t in reopened.list_tasks(1)] == ["Complete", "Next"]
+    reopened.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+def test_batch_add_and_remove(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "tasks.json"))
+    monkeypatch.setenv("USER_TASKS_BACKEND", backend)
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+
+    storage.add_task(2, "Existing")
+    tasks = storage.add_tasks(2, ["  First  ", "", "Second", "Third"])
+    assert tasks == [
+        {"id": 1, "text": "Existing"},
+        {"id": 2, "text": "First"},
+        {"id": 3, "text": "Second"},
+        {"id": 4, "text": "Third"},
+    ]
+
+    remaining = storage.remove_tasks(2, [1, 3, 99])
+    assert [t["text"] for t in remaining] == ["First", "Third"]
+    assert storage.list_tasks(2) == remaining
+
+    with pytest.raises(ValueError):
+        storage.add_tasks(2, ["", "   "])
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+def test_list_tasks_page(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "tasks.json"))
+    monkeypatch.setenv("USER_TASKS_BACKEND", backend)
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+
+    storage.add_tasks(3, [f"Task {n}" for n in range(1, 8)])
+
+    page, total = storage.list_tasks_page(3, 5, 5)
+    assert total == 7
+    assert page == [{"id": 6, "text": "Task 6"}, {"id": 7, "text": "Task 7"}]
+    assert storage.list_tasks_page(3, 10, 5) == ([], 7)
+    assert storage.list_tasks_page(4, 0, 5) == ([], 0)
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "journal"])
+def test_removed_ids_are_not_reused(backend, tmp_path, monkeypatch):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "tasks.json"))
+    monkeypatch.setenv("USER_TASKS_BACKEND", backend)
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    storage = importlib.import_module("assistant_bot.utils.task_storage")
+
+    storage.add_tasks(6, ["One", "Two"])
+    assert storage.remove_task(6, 2) is True
+    assert storage.add_task(6, "Three")["id"] == 3
+    storage.remove_tasks(6, [1, 3])
+    assert storage.get_backend().reserve_ids(6, 2) == 4
+    if backend == "journal":
+        # The sequence has to survive folding the journal into the snapshot.
+        storage.get_backend().compact()
+        storage.get_backend().close()
+
+    sys.modules.pop("assistant_bot.utils.task_storage", None)
+    reopened = importlib.import_module("assistant_bot.utils.task_storage")
+    assert reopened.add_task(6, "After restart")["id"] == 6
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks import task_storage_benchmark
+from benchmarks.task_storage_benchmark import BACKEND_NAMES, run_backend
+
+
+@pytest.mark.parametrize("backend", BACKEND_NAMES)
+def test_benchmark_runs_against_every_backend(backend, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "default" / "user_tasks.json"))
+    results = run_backend(backend, users=20, tasks_per_user=2, ops=5, workers=2, workdir=tmp_path)
+
+    assert {m.pattern for m in results} == {"single", "threads", "to_thread"}
+    assert all(len(m.latencies) == 5 for m in results)
+    assert f"backend={backend}" in capsys.readouterr().out
+
+
+def test_remove_op_removes_a_different_task_each_time(tmp_path, monkeypatch):
+    import random
+
+    monkeypatch.setenv("USER_TASKS_FILE", str(tmp_path / "default" / "user_tasks.json"))
+    task_storage_benchmark.generate_dataset(tmp_path / "user_tasks.json", users=3, tasks_per_user=2)
+    backend = task_storage_benchmark._build_backend("json", tmp_path)
+    operations = task_storage_benchmark._operations(backend, 3, 2, 8, random.Random(0))
+
+    for _ in range(2):
+        operations["add_task"]()
+    assert all(operations["remove_task"]() for _ in range(8))
+
+
+def test_all_mode_forwards_workdir(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(task_storage_benchmark.subprocess, "run", lambda argv, **kwargs: calls.append(argv))
+
+    task_storage_benchmark.main(["--backend", "all", "--workdir", str(tmp_path)])
+
+    assert len(calls) == len(BACKEND_NAMES)
+    assert all(argv[-2:] == ["--workdir", str(tmp_path)] for argv in calls)
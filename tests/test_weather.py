@@ -21,6 +21,15 @@ requests_stub.get = lambda *args, **kwargs: None
 sys.modules["requests"] = requests_stub
 
 
+@pytest.fixture(autouse=True)
+def isolated_weather_caches(tmp_path, monkeypatch):
+    import utils.weather as weather
+
+    monkeypatch.setattr(weather, "_GEOCODE_CACHE", weather.GeocodeCache(tmp_path / "geocode.json"))
+    monkeypatch.setattr(weather, "_WEATHER_CACHE", weather.WeatherCache())
+    monkeypatch.setattr(weather, "_QUOTA", weather.QuotaLimiter(10_000))
+
+
 def _build_response(payload):
     response = Mock()
     response.json.return_value = payload
@@ -96,3 +105,81 @@ def test_summarise_weather_formats_text():
 
     summary = summarise_weather(payload)
     assert summary == "Current weather in Dushanbe: 17°C, Clear sky."
+
+
+@patch("utils.weather.requests.get")
+def test_geocode_city_serves_warm_lookups_from_cache(mock_get, tmp_path):
+    import utils.weather as weather
+
+    mock_get.return_value = _build_response([{"lat": 38.56, "lon": 68.78}])
+
+    first = weather.geocode_city("Dushanbe", api_key="dummy")
+    second = weather.geocode_city("  dushanbe ", api_key="dummy")
+
+    assert first == second == weather.Coordinates(lat=38.56, lon=68.78)
+    assert mock_get.call_count == 1
+
+    weather._GEOCODE_CACHE.flush()
+    reloaded = weather.GeocodeCache(tmp_path / "geocode.json")
+    assert reloaded.lookup("DUSHANBE") == first
+
+
+def test_geocode_cache_batches_saves_and_bounds_the_file(tmp_path, monkeypatch):
+    import json
+
+    import utils.weather as weather
+
+    path = tmp_path / "bounded.json"
+    cache = weather.GeocodeCache(path, max_disk_entries=2, negative_ttl=60, save_delay=3600)
+    now = 1_000_000.0
+    monkeypatch.setattr(weather.time, "time", lambda: now)
+
+    cache.store_missing("Atlantis")
+    cache.store("Dushanbe", weather.Coordinates(lat=38.56, lon=68.78))
+    assert not path.exists()
+
+    now += 120
+    cache.store("Khujand", weather.Coordinates(lat=40.28, lon=69.62))
+    cache.store("Bokhtar", weather.Coordinates(lat=37.83, lon=68.78))
+    cache.flush()
+
+    assert sorted(json.loads(path.read_text(encoding="utf-8"))) == ["bokhtar", "khujand"]
+
+
+@patch("utils.weather.requests.get")
+def test_geocode_city_caches_missing_locations_with_ttl(mock_get, monkeypatch):
+    import utils.weather as weather
+
+    mock_get.return_value = _build_response([])
+
+    with pytest.raises(weather.LocationNotFoundError):
+        weather.geocode_city("Atlantis", api_key="dummy")
+    with pytest.raises(weather.LocationNotFoundError):
+        weather.geocode_city("Atlantis", api_key="dummy")
+    assert mock_get.call_count == 1
+
+    now = weather.time.time()
+    monkeypatch.setattr(weather.time, "time", lambda: now + weather.NEGATIVE_GEOCODE_TTL + 1)
+    with pytest.raises(weather.LocationNotFoundError):
+        weather.geocode_city("Atlantis", api_key="dummy")
+    assert mock_get.call_count == 2
+
+
+@patch("utils.weather.requests.get")
+def test_fetch_weather_by_coordinates_uses_ttl_cache(mock_get, monkeypatch):
+    import utils.weather as weather
+
+    mock_get.return_value = _build_response({"name": "Dushanbe"})
+
+    first = weather.fetch_weather_by_coordinates(weather.Coordinates(38.5598, 68.787), api_key="dummy")
+    second = weather.fetch_weather_by_coordinates(weather.Coordinates(38.5601, 68.7871), api_key="dummy")
+    weather.fetch_weather_by_coordinates(weather.Coordinates(38.5598, 68.787), units="imperial", api_key="dummy")
+
+    assert first == second == {"name": "Dushanbe"}
+    assert mock_get.call_count == 2
+    assert weather.weather_cache_stats() == {"hits": 1, "misses": 2, "coalesced": 0, "entries": 2}
+
+    now = weather.time.monotonic()
+    monkeypatch.setattr(weather.time, "monotonic", lambda: now + weather.WEATHER_CACHE_TTL + 1)
+    weather.fetch_weather_by_coordinates(weather.Coordinates(38.5598, 68.787), api_key="dummy")
+    assert mock_get.call_count == 3
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+@pytest.fixture(autouse=True)
+def isolated_weather_caches(tmp_path, monkeypatch):
+    from utils import weather
+
+    monkeypatch.setattr(weather, "_GEOCODE_CACHE", weather.GeocodeCache(tmp_path / "geocode.json"))
+    monkeypatch.setattr(weather, "_WEATHER_CACHE", weather.WeatherCache())
+    monkeypatch.setattr(weather, "_QUOTA", weather.QuotaLimiter(10_000))
+
+
+def _run_with_server(monkeypatch, routes, coro_factory):
+    from utils import weather
+
+    async def scenario():
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_get(path, handler)
+        server = TestServer(app)
+        await server.start_server()
+        monkeypatch.setattr(weather, "GEOCODING_ENDPOINT", str(server.make_url("/geo/1.0/direct")))
+        monkeypatch.setattr(weather, "WEATHER_ENDPOINT", str(server.make_url("/data/2.5/weather")))
+        monkeypatch.setattr(weather, "GROUP_ENDPOINT", str(server.make_url("/data/2.5/group")))
+        try:
+            return await coro_factory(weather)
+        finally:
+            await weather.close_session()
+            await server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_fetch_weather_by_city_async_reuses_session(monkeypatch):
+    seen_queries = []
+
+    async def geocode(request):
+        seen_queries.append(dict(request.query))
+        return web.json_response([{"lat": 38.56, "lon": 68.78}])
+
+    async def current(request):
+        seen_queries.append(dict(request.query))
+        return web.json_response({"name": "Dushanbe"})
+
+    async def run(weather):
+        first = await weather.fetch_weather_by_city_async("Dushanbe", api_key="dummy")
+        session = weather._get_session()
+        await weather.fetch_weather_by_coordinates_async(weather.Coordinates(1.0, 2.0), api_key="dummy")
+        assert weather._get_session() is session
+        return first
+
+    payload = _run_with_server(
+        monkeypatch,
+        {"/geo/1.0/direct": geocode, "/data/2.5/weather": current},
+        run,
+    )
+
+    assert payload == {"name": "Dushanbe"}
+    assert seen_queries[0] == {"q": "Dushanbe", "limit": "1", "appid": "dummy"}
+    assert seen_queries[1]["lat"] == "38.56"
+
+
+def test_async_errors_map_to_weather_service_errors(monkeypatch):
+    async def geocode(request):
+        return web.json_response([])
+
+    async def current(request):
+        return web.json_response({"message": "rate limited"}, status=429)
+
+    async def run(weather):
+        with pytest.raises(weather.LocationNotFoundError):
+            await weather.geocode_city_async("Nowhere", api_key="dummy")
+        with pytest.raises(weather.WeatherServiceError):
+            await weather.fetch_weather_by_coordinates_async(weather.Coordinates(0, 0), api_key="dummy")
+
+    _run_with_server(
+        monkeypatch,
+        {"/geo/1.0/direct": geocode, "/data/2.5/weather": current},
+        run,
+    )
+
+
+def test_concurrent_misses_share_one_request(monkeypatch):
+    calls = 0
+
+    async def geocode(request):
+        return web.json_response([{"lat": 38.56, "lon": 68.78}])
+
+    async def current(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"name": "Dushanbe"})
+
+    async def run(weather):
+        coords = weather.Coordinates(38.56, 68.78)
+        results = await asyncio.gather(
+            *(weather.fetch_weather_by_coordinates_async(coords, api_key="dummy") for _ in range(5))
+        )
+        return results, weather.weather_cache_stats()
+
+    results, stats = _run_with_server(
+        monkeypatch,
+        {"/geo/1.0/direct": geocode, "/data/2.5/weather": current},
+        run,
+    )
+
+    assert calls == 1
+    assert all(result == {"name": "Dushanbe"} for result in results)
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 4
+
+
+def test_quota_limiter_serves_interactive_before_background():
+    from utils.weather import Priority, QuotaLimiter
+
+    limiter = QuotaLimiter(2, background_share=1.0, window=0.2)
+    order: list[str] = []
+
+    async def call(name, priority, delay=0.0):
+        await asyncio.sleep(delay)
+        await limiter.acquire(priority)
+        order.append(name)
+
+    async def run():
+        await asyncio.gather(
+            call("bg-1", Priority.BACKGROUND),
+            call("bg-2", Priority.BACKGROUND),
+            call("bg-3", Priority.BACKGROUND, 0.01),
+            call("user", Priority.INTERACTIVE, 0.02),
+        )
+
+    asyncio.run(run())
+
+    assert order[:2] == ["bg-1", "bg-2"]
+    assert order[2] == "user"
+    stats = limiter.stats()
+    assert stats["interactive"]["calls"] == 1
+    assert stats["background"]["max_wait"] > 0
+
+
+def test_digest_uses_group_endpoint_once_city_ids_are_known(monkeypatch):
+    calls = {"geo": 0, "weather": 0, "group": 0}
+
+    def payload(city_id):
+        return {
+            "id": city_id,
+            "name": f"City{city_id}",
+            "weather": [{"description": "clear sky"}],
+            "main": {"temp": 20, "feels_like": 19, "humidity": 40},
+            "wind": {"speed": 2},
+        }
+
+    async def geocode(request):
+        calls["geo"] += 1
+        index = int(request.query["q"].removeprefix("City"))
+        return web.json_response([{"lat": index, "lon": index}])
+
+    async def current(request):
+        calls["weather"] += 1
+        return web.json_response(payload(int(float(request.query["lat"]))))
+
+    async def group(request):
+        calls["group"] += 1
+        ids = [int(part) for part in request.query["id"].split(",")]
+        assert len(ids) <= 20
+        # City 3 is unknown to the group endpoint and must fall back.
+        return web.json_response({"list": [payload(city_id) for city_id in ids if city_id != 3]})
+
+    async def run(weather):
+        from utils.weather_broadcast import build_weather_digest_async
+
+        cities = [f"City{index}" for index in range(1, 26)]
+        await build_weather_digest_async(cities, api_key="dummy")
+        first = dict(calls)
+        weather._WEATHER_CACHE.clear()
+        report = await build_weather_digest_async(cities, api_key="dummy")
+        return first, report
+
+    first, report = _run_with_server(
+        monkeypatch,
+        {"/geo/1.0/direct": geocode, "/data/2.5/weather": current, "/data/2.5/group": group},
+        run,
+    )
+
+    assert first == {"geo": 25, "weather": 25, "group": 0}
+    assert calls["group"] == 2
+    assert calls["weather"] == 26
+    assert calls["geo"] == 25
+    assert report.index("City1</b>") < report.index("City3</b>") < report.index("City25</b>")
@@ -62,3 +62,98 @@ def test_build_weather_digest_combines_results(mock_fetch):
 )
 def test_seconds_until_handles_wraparound(current: datetime, target: time, expected: int):
     assert _seconds_until(target, now=current) == expected
+
+
+def test_build_weather_digest_async_keeps_order_under_concurrency():
+    import asyncio
+
+    from utils.weather_broadcast import build_weather_digest_async
+
+    in_flight = 0
+    peak = 0
+    delays = {"Slowtown": 0.05, "Dushanbe": 0.01, "Nowhere": 0.0, "Hangville": 1.0}
+
+    async def fake_fetch(city, **_kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(delays[city])
+            if city == "Nowhere":
+                raise LocationNotFoundError()
+            return {
+                "name": city,
+                "weather": [{"description": "few clouds"}],
+                "main": {"temp": 12, "feels_like": 10, "humidity": 50},
+                "wind": {"speed": 1.0},
+            }
+        finally:
+            in_flight -= 1
+
+    with patch("utils.weather_broadcast.fetch_weather_by_city_async", side_effect=fake_fetch):
+        digest = asyncio.run(
+            build_weather_digest_async(
+                ["Slowtown", "Dushanbe", " ", "Nowhere", "Hangville"],
+                max_concurrency=2,
+                city_timeout=0.2,
+            )
+        )
+
+    parts = digest.split("\n\n")
+    assert "<b>Slowtown</b>" in parts[0]
+    assert "<b>Dushanbe</b>" in parts[1]
+    assert "Could not find coordinates for Nowhere" in parts[2]
+    assert "Timed out loading weather for Hangville" in parts[3]
+    assert peak == 2
+
+
+def test_broadcast_prebuilds_digest_and_sends_on_time(monkeypatch):
+    import asyncio
+
+    from utils import weather_broadcast
+    from utils.broadcast_delivery import DeliveryReport
+
+    events = []
+    delays = iter([0.3, 3600.0])
+
+    async def fake_build(*_args, **_kwargs):
+        events.append(("build", loop.time()))
+        await asyncio.sleep(0.1)
+        return "digest"
+
+    async def fake_deliver(bot, chat_ids, text, *, broadcast_id):
+        events.append(("send", loop.time(), text))
+        sent.set()
+        return DeliveryReport(delivered=len(chat_ids), failed=0, skipped=0)
+
+    async def no_resume(_bot):
+        return None
+
+    monkeypatch.setattr(weather_broadcast, "_seconds_until", lambda *_args, **_kwargs: next(delays))
+    monkeypatch.setattr(weather_broadcast, "_build_report", fake_build)
+    monkeypatch.setattr(weather_broadcast, "deliver_broadcast", fake_deliver)
+    monkeypatch.setattr(weather_broadcast, "resume_pending_broadcast", no_resume)
+
+    async def scenario():
+        nonlocal loop, sent
+        loop = asyncio.get_running_loop()
+        sent = asyncio.Event()
+        started = loop.time()
+        task = asyncio.create_task(
+            weather_broadcast.broadcast_daily_weather(
+                object(), [1, 2], ["Dushanbe"], send_at=time(7, 0), warmup_lead=0.2, max_report_age=60
+            )
+        )
+        await asyncio.wait_for(sent.wait(), timeout=2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return started
+
+    loop = sent = None
+    started = asyncio.run(scenario())
+
+    (_, built_at), (_, sent_at, text) = events
+    assert text == "digest"
+    assert built_at - started == pytest.approx(0.1, abs=0.05)
+    assert sent_at - started == pytest.approx(0.3, abs=0.05)
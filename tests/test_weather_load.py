@@ -0,0 +1,38 @@
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.fake_openweather import FakeServerOptions
+from benchmarks.weather_load import run_load
+
+
+def test_load_driver_reports_every_request():
+    report = asyncio.run(
+        run_load(requests=40, concurrency=8, cities=5, digests=2, digest_size=3, server_options=FakeServerOptions(seed=1))
+    )
+
+    by_operation = {m.operation: m for m in report.measurements}
+    assert len(by_operation["/weather"].latencies) == 40
+    assert report.outcomes["/weather"] == {"ok": 40}
+    assert report.outcomes["digest"] == {"ok": 2}
+    assert report.server["requests"]["/data/2.5/weather"] >= 5
+    assert "p99=" in report.render()
+
+
+def test_fake_server_rate_limit_surfaces_as_service_errors():
+    report = asyncio.run(
+        run_load(
+            requests=10,
+            concurrency=1,
+            cities=10,
+            server_options=FakeServerOptions(rate_limit=4, seed=1),
+            cache_ttl=0,
+        )
+    )
+
+    assert report.server["rate_limited"] > 0
+    assert report.outcomes["/weather"]["WeatherServiceError"] > 0
@@ -0,0 +1,67 @@
+import asyncio
+import sys
+from datetime import datetime, time, timezone
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+
+def test_parse_subscription_and_next_fire_in_local_time():
+    from utils.weather_subscriptions import InvalidSubscriptionError, parse_subscription
+
+    subscription = parse_subscription(7, "07:30 Asia/Dushanbe Dushanbe, Khujand, dushanbe ,Dushanbe")
+
+    assert subscription.cities == ("Dushanbe", "Khujand", "dushanbe")
+    # 01:00 UTC is 06:00 in Dushanbe (UTC+5), so the digest fires the same day.
+    fire = subscription.next_fire(datetime(2024, 5, 1, 1, 0, tzinfo=timezone.utc))
+    assert fire.astimezone(timezone.utc) == datetime(2024, 5, 1, 2, 30, tzinfo=timezone.utc)
+    later = subscription.next_fire(datetime(2024, 5, 1, 3, 0, tzinfo=timezone.utc))
+    assert later.astimezone(timezone.utc) == datetime(2024, 5, 2, 2, 30, tzinfo=timezone.utc)
+
+    assert parse_subscription(7, "7:30 Asia/Dushanbe Dushanbe").send_at == time(7, 30)
+    for bad in ("07:30 Asia/Dushanbe", "7h Asia/Dushanbe Dushanbe", "07:30 Mars/Base Dushanbe"):
+        with pytest.raises(InvalidSubscriptionError):
+            parse_subscription(7, bad)
+
+
+def test_store_round_trip(tmp_path):
+    from utils.weather_subscriptions import Subscription, SubscriptionStore
+
+    store = SubscriptionStore(tmp_path / "subs.sqlite3")
+    subscription = Subscription(1, ("Dushanbe", "Москва"), time(7, 30), "Europe/Moscow")
+    store.upsert(subscription)
+
+    assert store.get(1) == subscription
+    assert store.all() == [subscription]
+    assert store.delete(1) is True
+    assert store.get(1) is None
+
+
+def test_scheduler_pops_due_batches_and_skips_stale_entries(tmp_path):
+    from utils.weather_subscriptions import Subscription, SubscriptionScheduler, SubscriptionStore
+
+    now = datetime(2024, 5, 1, 6, 59, tzinfo=timezone.utc)
+
+    async def scenario():
+        scheduler = SubscriptionScheduler(object(), SubscriptionStore(tmp_path / "subs.sqlite3"), batch_size=2)
+        for chat_id in range(1, 5):
+            scheduler.schedule(Subscription(chat_id, ("Dushanbe",), time(7, 0), "UTC"), now=now)
+        scheduler.schedule(Subscription(2, ("Dushanbe",), time(9, 0), "UTC"), now=now)
+        scheduler.cancel(3)
+
+        fire_ts = datetime(2024, 5, 1, 7, 0, tzinfo=timezone.utc).timestamp()
+        assert scheduler.next_fire_timestamp() == fire_ts
+        first = scheduler.pop_due(fire_ts)
+        second = scheduler.pop_due(fire_ts)
+        # Rescheduled entries move to the next day instead of firing again.
+        assert scheduler.next_fire_timestamp() == datetime(2024, 5, 1, 9, 0, tzinfo=timezone.utc).timestamp()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert [s.chat_id for s in first] == [1, 4]
+    assert second == []
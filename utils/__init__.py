@@ -1,3 +1,3 @@
 """Utility helpers used across the assistant bot codebase."""
 
-__all__ = ["task_storage", "utils", "weather", "weather_broadcast"]
+__all__ = ["async_task_storage", "task_storage", "utils", "weather", "weather_broadcast"]
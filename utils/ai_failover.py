@@ -0,0 +1,165 @@
+"""Latency and error policy for Gemini requests.
+
+:meth:`ModelPolicy.run` sends a request to the selected model and, when that
+model has a latency budget (its expected p95) and has not answered within
+it, fires the same request at a faster hedge model.  Whichever attempt
+answers first wins and the other one is cancelled; for streamed replies the
+first attempt to produce visible output wins.  If the model fails with a
+retryable error (429 or 5xx), the request moves down the model chain
+offered by ``/select_model``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Iterable, Mapping, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Same order as the /select_model buttons: most capable first.
+MODEL_CHAIN = (
+    "gemini-2.5-pro",
+    "gemini-2.5-flash",
+    "gemini-2.5-flash-lite",
+    "gemini-2.5-flash-preview",
+)
+HEDGE_MODEL = "gemini-2.5-flash"
+LATENCY_BUDGETS = {
+    "gemini-2.5-pro": 20.0,
+    "gemini-2.5-flash-preview": 12.0,
+}
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# An attempt calls its claim function before showing output; False means another attempt already won.
+Claim = Callable[[], bool]
+Attempt = Callable[[str, Claim], Awaitable[T]]
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for rate limits, server errors and timeouts (google.api_core errors carry ``code``)."""
+
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS_CODES
+
+
+class ModelPolicy:
+    """Hedge slow requests and fall back down the model chain on retryable errors."""
+
+    def __init__(
+        self,
+        *,
+        chain: Iterable[str] = MODEL_CHAIN,
+        hedge_model: str | None = HEDGE_MODEL,
+        budgets: Mapping[str, float] | None = None,
+    ) -> None:
+        self._chain = tuple(chain)
+        self._hedge_model = hedge_model
+        self._budgets = dict(LATENCY_BUDGETS if budgets is None else budgets)
+        self._latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=500))
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def fallback_models(self, model_name: str) -> list[str]:
+        if model_name not in self._chain:
+            return list(self._chain)
+        return list(self._chain[self._chain.index(model_name) + 1:])
+
+    def hedge_for(self, model_name: str) -> tuple[str, float] | None:
+        budget = self._budgets.get(model_name)
+        if budget is None or not self._hedge_model or self._hedge_model == model_name:
+            return None
+        return self._hedge_model, budget
+
+    async def run(self, model_name: str, attempt: Attempt[T]) -> T:
+        """Run *attempt* for *model_name*, hedging and falling back as configured."""
+
+        error: BaseException | None = None
+        for candidate in [model_name, *self.fallback_models(model_name)]:
+            if error is not None:
+                self.fallbacks += 1
+                logger.warning("Falling back to %s after a retryable error: %s", candidate, error)
+            try:
+                return await self._hedged(candidate, attempt)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                error = exc
+        assert error is not None
+        raise error
+
+    async def _timed(self, model_name: str, attempt: Attempt[T], claim: Claim) -> T:
+        started = time.monotonic()
+        result = await attempt(model_name, claim)
+        self._latencies[model_name].append(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, model_name: str, attempt: Attempt[T]) -> T:
+        tasks: dict[str, asyncio.Task] = {}
+        winner: str | None = None
+
+        def claim_for(name: str) -> Claim:
+            def claim() -> bool:
+                nonlocal winner
+                if winner is None:
+                    winner = name
+                    for other, task in tasks.items():
+                        if other != name:
+                            task.cancel()
+                return winner == name
+
+            return claim
+
+        tasks[model_name] = asyncio.create_task(self._timed(model_name, attempt, claim_for(model_name)))
+        try:
+            hedge = self.hedge_for(model_name)
+            if hedge is not None:
+                hedge_model, budget = hedge
+                done, _ = await asyncio.wait(tasks.values(), timeout=budget)
+                if not done and winner is None:
+                    self.hedges += 1
+                    logger.info("%s exceeded its %.1fs budget, hedging with %s", model_name, budget, hedge_model)
+                    tasks[hedge_model] = asyncio.create_task(
+                        self._timed(hedge_model, attempt, claim_for(hedge_model))
+                    )
+
+            pending = set(tasks.values())
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        # Report the selected model's error rather than the hedge's.
+                        if error is None or task is tasks[model_name]:
+                            error = task.exception()
+                        continue
+                    name = next(name for name, candidate in tasks.items() if candidate is task)
+                    if winner is None or winner == name:
+                        if name != model_name:
+                            self.hedge_wins += 1
+                        return task.result()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        def p95(samples: deque[float]) -> float:
+            ordered = sorted(samples)
+            return ordered[min(len(ordered) - 1, round(0.95 * len(ordered)))]
+
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "p95": {name: p95(samples) for name, samples in self._latencies.items() if samples},
+        }
@@ -0,0 +1,156 @@
+"""Token-budgeted conversation history with a running summary.
+
+Only the most recent turns that fit into a per-model token budget are sent
+back to Gemini.  Turns that fall out of the window are folded into a short
+running summary by a cheap model in a background task, so the request
+payload stays bounded no matter how long a chat lives, and the summary is
+replayed to the model as a synthetic first exchange.
+
+Turns may be Gemini ``Content`` objects or plain ``{"role", "parts"}``
+dictionaries; both are handled.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 6000
+MODEL_TOKEN_BUDGETS = {
+    "gemini-2.5-pro": 8000,
+    "gemini-2.5-flash": 6000,
+    "gemini-2.5-flash-preview": 6000,
+    "gemini-2.5-flash-lite": 4000,
+}
+MAX_SUMMARY_CHARS = 2000
+SUMMARY_PREAMBLE = "Summary of our earlier conversation:"
+SUMMARY_ACK = "Understood, I will keep that context in mind."
+
+Summarizer = Callable[[str, Sequence[tuple[str, str]]], Awaitable[str]]
+
+
+def turn_role(turn: Any) -> str:
+    return turn["role"] if isinstance(turn, dict) else turn.role
+
+
+def turn_text(turn: Any) -> str:
+    parts = turn["parts"] if isinstance(turn, dict) else turn.parts
+    return "".join(part if isinstance(part, str) else getattr(part, "text", "") for part in parts)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token), no API call."""
+
+    return len(text) // 4 + 1
+
+
+class HistoryWindow:
+    """Split histories to a token budget and maintain per-chat summaries."""
+
+    def __init__(
+        self,
+        summarizer: Summarizer,
+        *,
+        default_budget: int = DEFAULT_TOKEN_BUDGET,
+        budgets: dict[str, int] | None = None,
+    ) -> None:
+        self._summarizer = summarizer
+        self._default_budget = default_budget
+        self._budgets = MODEL_TOKEN_BUDGETS if budgets is None else budgets
+        self._pending: dict[Any, asyncio.Task] = {}
+
+    def budget(self, model_name: str) -> int:
+        return self._budgets.get(model_name, self._default_budget)
+
+    @staticmethod
+    def summary_prefix(summary: str | None) -> list[dict]:
+        """Synthetic exchange that replays *summary* ahead of the recent turns."""
+
+        if not summary:
+            return []
+        return [
+            {"role": "user", "parts": [f"{SUMMARY_PREAMBLE}\n{summary}"]},
+            {"role": "model", "parts": [SUMMARY_ACK]},
+        ]
+
+    def split(self, history: Sequence[Any], model_name: str, *, summary: str | None = None) -> tuple[list, list]:
+        """Return ``(recent, overflow)`` where *recent* fits the model's budget.
+
+        The cut is always placed at the start of a user turn so the kept
+        window begins with a complete exchange, and the newest exchange is
+        kept even if it alone exceeds the budget.
+        """
+
+        remaining = self.budget(model_name) - (estimate_tokens(summary) if summary else 0)
+        cut = len(history)
+        used = 0
+        for index in range(len(history) - 1, -1, -1):
+            used += estimate_tokens(turn_text(history[index]))
+            if turn_role(history[index]) != "user":
+                continue
+            if used > remaining and cut < len(history):
+                break
+            cut = index
+        return list(history[cut:]), list(history[:cut])
+
+    def schedule_summary(
+        self,
+        key: Any,
+        overflow: Sequence[Any],
+        load_summary: Callable[[], Awaitable[str | None]],
+        save_summary: Callable[[str], Awaitable[None]],
+    ) -> asyncio.Task | None:
+        """Fold *overflow* into the chat's summary in the background.
+
+        Updates for the same *key* run one after another, each starting from
+        the latest saved summary.
+        """
+
+        if not overflow:
+            return None
+        turns = [(turn_role(turn), turn_text(turn)) for turn in overflow]
+        previous = self._pending.get(key)
+
+        async def run() -> None:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            summary = await load_summary() or ""
+            try:
+                updated = await self._summarizer(summary, turns)
+            except Exception:
+                logger.exception("Failed to summarise conversation history; keeping a plain excerpt.")
+                excerpt = "\n".join(f"{role}: {text}" for role, text in turns)
+                updated = f"{summary}\n{excerpt}".strip()
+            await save_summary(updated[-MAX_SUMMARY_CHARS:])
+
+        task = asyncio.create_task(run())
+        self._pending[key] = task
+
+        def forget(done: asyncio.Task) -> None:
+            if self._pending.get(key) is done:
+                del self._pending[key]
+
+        task.add_done_callback(forget)
+        return task
+
+    def cancel(self, key: Any) -> None:
+        """Drop every summary update still pending for *key*, e.g. after ``/clear``."""
+
+        task = self._pending.pop(key, None)
+        if task is not None:
+            # Each update awaits the previous one, so this cancels the whole chain.
+            task.cancel()
+
+
+def summary_prompt(summary: str, turns: Sequence[tuple[str, str]]) -> str:
+    """Instruction for the summarisation model."""
+
+    transcript = "\n".join(f"{role}: {text}" for role, text in turns)
+    return (
+        "Update the running summary of a chat between a user and an assistant. "
+        "Keep names, facts, preferences and open questions; drop small talk. "
+        "Answer with the new summary only, at most 150 words.\n\n"
+        f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"
+    )
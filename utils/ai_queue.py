@@ -0,0 +1,66 @@
+"""Per-user serialisation and debouncing of AI prompts.
+
+:meth:`PromptQueue.collect` buffers messages that a user sends in quick
+succession: the first message waits until no new one has arrived for
+``window`` seconds and then receives the whole batch, while the later
+messages get ``None`` because they were merged into it.
+:meth:`PromptQueue.serialized` makes sure only one Gemini request per user
+reads and writes the conversation history at a time.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+DEBOUNCE_WINDOW = 0.8
+
+
+class PromptQueue(Generic[T]):
+    """Coalesce rapid messages per key and run their processing one at a time."""
+
+    def __init__(self, window: float = DEBOUNCE_WINDOW) -> None:
+        self._window = window
+        self._pending: dict[Hashable, list[T]] = {}
+        self._locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    async def collect(self, key: Hashable, item: T) -> list[T] | None:
+        """Add *item* to *key*'s batch; return the batch to the caller that owns it."""
+
+        batch = self._pending.get(key)
+        if batch is not None:
+            batch.append(item)
+            return None
+
+        batch = self._pending[key] = [item]
+        try:
+            while True:
+                seen = len(batch)
+                await asyncio.sleep(self._window)
+                if len(batch) == seen:
+                    return batch
+        finally:
+            del self._pending[key]
+
+    @contextlib.asynccontextmanager
+    async def serialized(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold *key*'s lock; locks are dropped once nobody uses them."""
+
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def stats(self) -> dict[str, Any]:
+        return {"collecting": len(self._pending), "active_users": len(self._locks)}
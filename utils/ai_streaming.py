@@ -0,0 +1,335 @@
+"""Progressive delivery of streamed AI replies through message edits.
+
+:class:`StreamingReply` posts a placeholder and edits it as text arrives,
+at most once per ``min_interval`` seconds so a chat stays well below
+Telegram's edit rate limits.  Partial Markdown is rendered with the handler's
+formatter after closing any unfinished code fence, and unbalanced HTML tags
+are closed (or dropped) so every intermediate edit is valid HTML.
+
+Replies longer than Telegram's 4096-character limit are cut by
+:func:`split_html` at paragraph or line boundaries, with open tags closed at
+the end of each chunk and reopened at the start of the next.  The streamed
+reply then continues in a new message as soon as a chunk is complete, and
+:func:`answer_html` sends complete replies the same way.
+
+Time to first visible token (request start to the first edit showing model
+output) is recorded and exposed through :func:`streaming_stats`.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import html
+import logging
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Sequence
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_TEXT = "…"
+EDIT_INTERVAL = 1.0
+MESSAGE_LIMIT = 4096
+
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z]+)(?:\s[^<>]*)?>")
+_VOID_TAGS = frozenset({"br"})
+# Tags, entities, line breaks, other whitespace and runs of plain text; splits
+# only ever happen between tokens, never inside a tag or an entity.
+_SPLIT_TOKEN_RE = re.compile(r"<[^<>]*>|&#?\w+;|\n{2,}|\n|[^\S\n]+|[^<&\s]+|[<&]")
+_BREAK_PRIORITY = {"\n\n": 3, "\n": 2, " ": 1}
+
+_TTFT_SAMPLES: deque[float] = deque(maxlen=1000)
+
+
+def close_open_tags(markup: str) -> str:
+    """Return *markup* with a dangling ``<...`` removed and every open tag closed.
+
+    Closing tags without a matching opener are dropped, so the result is
+    always well nested.
+    """
+
+    cut = markup.rfind("<")
+    if cut != -1 and ">" not in markup[cut:]:
+        markup = markup[:cut]
+
+    parts: list[str] = []
+    stack: list[str] = []
+    position = 0
+    for match in _TAG_RE.finditer(markup):
+        parts.append(markup[position:match.start()])
+        position = match.end()
+        closing, name = match.group(1), match.group(2).lower()
+        if name in _VOID_TAGS:
+            parts.append(match.group(0))
+        elif not closing:
+            stack.append(name)
+            parts.append(match.group(0))
+        elif name in stack:
+            while stack:
+                opened = stack.pop()
+                parts.append(f"</{opened}>")
+                if opened == name:
+                    break
+    parts.append(markup[position:])
+    parts.extend(f"</{name}>" for name in reversed(stack))
+    return "".join(parts)
+
+
+def _utf16_len(text: str) -> int:
+    # Telegram counts message length in UTF-16 code units.
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _closing(stack: Sequence[tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def _apply_tag(stack: list[tuple[str, str]], token: str) -> list[tuple[str, str]]:
+    match = _TAG_RE.fullmatch(token)
+    if match is None or match.group(2).lower() in _VOID_TAGS:
+        return stack
+    name = match.group(2).lower()
+    if not match.group(1):
+        return [*stack, (name, token)]
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index][0] == name:
+            return stack[:index]
+    return stack
+
+
+def split_html(markup: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split Telegram HTML into chunks of at most *limit* UTF-16 units.
+
+    Cuts prefer blank lines, then line breaks, then spaces, as long as the
+    chunk stays at least half full.  Tags still open at a cut are closed at
+    the end of the chunk and reopened, attributes included, at the start of
+    the next one, so every chunk is valid HTML on its own.
+    """
+
+    if _utf16_len(markup) <= limit:
+        return [markup]
+
+    tokens: list[str] = []
+    piece = max(1, limit // 4)
+    for token in _SPLIT_TOKEN_RE.findall(markup):
+        if token[0] in "<&" or len(token) <= piece:
+            tokens.append(token)
+        else:
+            # A single word or whitespace run longer than a chunk is cut hard.
+            tokens.extend(token[i:i + piece] for i in range(0, len(token), piece))
+
+    chunks: list[str] = []
+    stack: list[tuple[str, str]] = []
+    start = 0
+    while start < len(tokens):
+        prefix = "".join(tag for _, tag in stack)
+        size = _utf16_len(prefix)
+        current = stack
+        best: tuple[int, int, list[tuple[str, str]]] | None = None  # (priority, end, stack)
+        latest: tuple[int, int, list[tuple[str, str]]] | None = None
+        index = start
+        while index < len(tokens):
+            token = tokens[index]
+            following = _apply_tag(current, token) if token[0] == "<" else current
+            token_size = _utf16_len(token)
+            closing_size = sum(len(name) + 3 for name, _ in following)
+            if size + token_size + closing_size > limit and index > start:
+                break
+            size += token_size
+            current = following
+            index += 1
+            if token.isspace():
+                priority = _BREAK_PRIORITY.get(token[:2], _BREAK_PRIORITY[" "])
+                latest = (priority, index, current)
+                if size >= limit // 2 and (best is None or priority >= best[0]):
+                    best = latest
+        if index >= len(tokens):
+            chunks.append(prefix + "".join(tokens[start:]) + _closing(current))
+            break
+        _, end, stack = best or latest or (0, index, current)
+        chunks.append(prefix + "".join(tokens[start:end]) + _closing(stack))
+        start = end
+    return chunks
+
+
+def plain_text(markup: str) -> str:
+    """Strip tags and unescape entities, for when Telegram rejects the HTML."""
+
+    return html.unescape(_TAG_RE.sub("", markup))
+
+
+def render_partial(text: str, formatter: Callable[[str], str]) -> str:
+    """Render an incomplete Markdown reply into valid Telegram HTML."""
+
+    if text.count("```") % 2:
+        text += "\n```"
+    return close_open_tags(formatter(text))
+
+
+def record_time_to_first_token(seconds: float) -> None:
+    _TTFT_SAMPLES.append(seconds)
+
+
+def streaming_stats() -> dict[str, Any]:
+    """Return count, mean and p50/p95 of recent time-to-first-visible-token samples."""
+
+    samples = sorted(_TTFT_SAMPLES)
+    if not samples:
+        return {"count": 0}
+
+    def percentile(pct: float) -> float:
+        return samples[min(len(samples) - 1, max(0, round(pct / 100 * len(samples)) - 1))]
+
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(50),
+        "p95": percentile(95),
+    }
+
+
+async def _deliver(send: Callable[[str, str | None], Awaitable[Any]], markup: str) -> None:
+    """Send one HTML chunk, waiting out flood limits and falling back to plain text."""
+
+    for body, parse_mode in ((markup, "HTML"), (plain_text(markup), None)):
+        for _ in range(3):
+            try:
+                await send(body, parse_mode)
+                return
+            except TelegramRetryAfter as exc:
+                await asyncio.sleep(exc.retry_after)
+            except TelegramBadRequest as exc:
+                if "message is not modified" in str(exc):
+                    return
+                logger.error("Failed to send formatted message, sending raw. Error: %s", exc)
+                break
+
+
+async def answer_html(message: Any, markup: str) -> None:
+    """Answer *message* with *markup*, split into as many messages as needed."""
+
+    for chunk in split_html(markup):
+        await _deliver(lambda body, parse_mode: message.answer(body, parse_mode=parse_mode), chunk)
+
+
+class StreamingReply:
+    """Edit placeholder messages as a streamed reply grows.
+
+    The reply starts in one placeholder; once it outgrows a message, the
+    completed part stays there and the rest continues in a new message.
+    """
+
+    def __init__(
+        self,
+        message: Any,
+        formatter: Callable[[str], str],
+        *,
+        min_interval: float = EDIT_INTERVAL,
+        started_at: float | None = None,
+    ) -> None:
+        self._message = message
+        self._formatter = formatter
+        self._min_interval = min_interval
+        self._started_at = time.monotonic() if started_at is None else started_at
+        self._messages: list[Any] = []
+        self._chunks: list[str] = []
+        self._shown = ""
+        self._pending: str | None = None
+        self._last_edit = float("-inf")
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.time_to_first_token: float | None = None
+
+    async def start(self) -> None:
+        self._messages.append(await self._message.answer(PLACEHOLDER_TEXT))
+        self._chunks.append(PLACEHOLDER_TEXT)
+
+    async def _show(self, index: int, chunk: str, parse_mode: str | None = "HTML") -> None:
+        """Put *chunk* into the reply's *index*-th message, sending it if needed."""
+
+        if index < len(self._messages):
+            await self._messages[index].edit_text(chunk, parse_mode=parse_mode)
+            self._chunks[index] = chunk
+        else:
+            self._messages.append(await self._message.answer(chunk, parse_mode=parse_mode))
+            self._chunks.append(chunk)
+
+    async def _try_show(self, index: int, chunk: str) -> bool:
+        try:
+            await self._show(index, chunk)
+        except TelegramRetryAfter as exc:
+            # Back off; the next update or the final edit will catch up.
+            self._last_edit = time.monotonic() + exc.retry_after
+            return False
+        except TelegramBadRequest as exc:
+            if "message is not modified" in str(exc):
+                return True
+            logger.debug("Skipping streamed edit rejected by Telegram: %s", exc)
+            return False
+        return True
+
+    def _changed(self, chunks: list[str]) -> list[tuple[int, str]]:
+        return [
+            (index, chunk)
+            for index, chunk in enumerate(chunks)
+            if index >= len(self._chunks) or self._chunks[index] != chunk
+        ]
+
+    async def _flush(self) -> None:
+        async with self._lock:
+            text, self._pending = self._pending, None
+            if not text or text == self._shown:
+                return
+            changed = self._changed(split_html(render_partial(text, self._formatter)))
+            shown = 0
+            for index, chunk in changed:
+                if not await self._try_show(index, chunk):
+                    break
+                shown += 1
+            if shown == len(changed):
+                self._shown = text
+            if shown and self.time_to_first_token is None:
+                self.time_to_first_token = time.monotonic() - self._started_at
+                record_time_to_first_token(self.time_to_first_token)
+                logger.info("Time to first visible token: %.2fs", self.time_to_first_token)
+            self._last_edit = max(self._last_edit, time.monotonic())
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._flush()
+
+    async def update(self, text: str) -> None:
+        """Show *text* (the whole reply so far), throttled to ``min_interval``."""
+
+        if not self._messages or not text.strip():
+            return
+        self._pending = text
+        wait = self._last_edit + self._min_interval - time.monotonic()
+        if wait <= 0 and not self._lock.locked():
+            await self._flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later(max(0.0, wait)))
+
+    async def finish(self, text: str) -> None:
+        """Replace the placeholders with the final formatted reply.
+
+        Long replies are split across messages in order.  Each chunk falls
+        back to plain text if Telegram rejects its HTML, and flood limits are
+        waited out instead of dropping the final edits.
+        """
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+        async with self._lock:
+            chunks = split_html(self._formatter(text))
+            for index, chunk in self._changed(chunks):
+                await _deliver(lambda body, parse_mode, index=index: self._show(index, body, parse_mode), chunk)
+            # A reply that got shorter after final formatting leaves spare messages behind.
+            for extra in self._messages[len(chunks):]:
+                with contextlib.suppress(TelegramBadRequest):
+                    await extra.delete()
@@ -0,0 +1,214 @@
+"""Async, write-behind task storage used by the Telegram handlers.
+
+Task lists are served from an in-memory authoritative copy so handlers never
+block the event loop on disk I/O.  Mutated users are marked dirty and written
+to the configured :mod:`utils.task_storage` backend in coalesced batches by a
+background task every ``USER_TASKS_FLUSH_INTERVAL`` seconds (default ``1``),
+so at most one interval worth of changes can be lost on a crash.  Call
+:func:`shutdown` on exit to flush everything that is still pending.
+
+Users stay cached while they are dirty or their snapshot is being written, so
+a reload never reads rows that are about to be replaced.  New task ids come
+from the backend's id sequence, so ids are never reused after a removal.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from utils import task_storage
+from utils.task_storage import TaskBackend
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_INTERVAL = float(os.getenv("USER_TASKS_FLUSH_INTERVAL", "1.0"))
+_MAX_CACHED_USERS = 10_000
+
+
+class WriteBehindTaskStore:
+    """Keep task lists in memory and persist dirty users in batches."""
+
+    def __init__(
+        self,
+        backend: TaskBackend,
+        *,
+        flush_interval: float = _FLUSH_INTERVAL,
+        max_cached_users: int = _MAX_CACHED_USERS,
+    ) -> None:
+        self._backend = backend
+        self._flush_interval = flush_interval
+        self._max_cached_users = max_cached_users
+        self._cache: OrderedDict[int, List[dict]] = OrderedDict()
+        self._dirty: set[int] = set()
+        self._flushing: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def _user_tasks(self, user_id: int) -> List[dict]:
+        tasks = self._cache.get(user_id)
+        if tasks is None:
+            loaded = await asyncio.to_thread(self._backend.list_tasks, user_id)
+            # Another coroutine may have loaded (and mutated) the user meanwhile.
+            tasks = self._cache.setdefault(user_id, loaded)
+        self._cache.move_to_end(user_id)
+        self._evict_clean_users()
+        return tasks
+
+    def _evict_clean_users(self) -> None:
+        if len(self._cache) <= self._max_cached_users:
+            return
+        # The most recently used user is about to be handed out, so it always stays.
+        for user_id in list(self._cache)[:-1]:
+            if len(self._cache) <= self._max_cached_users:
+                break
+            if user_id not in self._dirty and user_id not in self._flushing:
+                del self._cache[user_id]
+
+    async def _reserve_ids(self, user_id: int, tasks: List[dict], count: int) -> int:
+        first_id = await asyncio.to_thread(self._backend.reserve_ids, user_id, count)
+        # Unflushed additions are not in the backend yet, so never go below them.
+        return max(first_id, max((task.get("id", 0) for task in tasks), default=0) + 1)
+
+    async def list_tasks(self, user_id: int) -> List[dict]:
+        return [dict(task) for task in await self._user_tasks(user_id)]
+
+    async def list_tasks_page(self, user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+        tasks = self._cache.get(user_id)
+        if tasks is None:
+            # Users that are not cached have no unflushed changes, so the
+            # backend can read just the visible slice.
+            return await asyncio.to_thread(self._backend.list_tasks_page, user_id, offset, limit)
+        self._cache.move_to_end(user_id)
+        return [dict(task) for task in tasks[offset:offset + limit]], len(tasks)
+
+    async def add_task(self, user_id: int, text: str) -> dict:
+        text = text.strip()
+        if not text:
+            raise ValueError("Task text must not be empty.")
+
+        tasks = await self._user_tasks(user_id)
+        task = {"id": await self._reserve_ids(user_id, tasks, 1), "text": text}
+        tasks.append(task)
+        self._dirty.add(user_id)
+        return dict(task)
+
+    async def add_tasks(self, user_id: int, texts: Iterable[str]) -> List[dict]:
+        cleaned = task_storage.clean_task_texts(texts)
+        tasks = await self._user_tasks(user_id)
+        next_id = await self._reserve_ids(user_id, tasks, len(cleaned))
+        tasks.extend(
+            {"id": task_id, "text": text} for task_id, text in enumerate(cleaned, start=next_id)
+        )
+        self._dirty.add(user_id)
+        return [dict(task) for task in tasks]
+
+    async def remove_task(self, user_id: int, task_id: int) -> bool:
+        tasks = await self._user_tasks(user_id)
+        remaining = [task for task in tasks if task.get("id") != task_id]
+        if len(remaining) == len(tasks):
+            return False
+        tasks[:] = remaining
+        self._dirty.add(user_id)
+        return True
+
+    async def remove_tasks(self, user_id: int, task_ids: Iterable[int]) -> List[dict]:
+        wanted = set(task_ids)
+        tasks = await self._user_tasks(user_id)
+        remaining = [task for task in tasks if task.get("id") not in wanted]
+        if len(remaining) != len(tasks):
+            tasks[:] = remaining
+            self._dirty.add(user_id)
+        return [dict(task) for task in tasks]
+
+    async def clear_tasks(self, user_id: int) -> None:
+        tasks = await self._user_tasks(user_id)
+        if tasks:
+            tasks.clear()
+            self._dirty.add(user_id)
+
+    async def flush(self) -> None:
+        """Write every dirty user to the backend in a single batch."""
+
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            # Dirty users are never evicted, so every one of them is cached.
+            snapshots: Dict[int, List[dict]] = {
+                user_id: [dict(task) for task in self._cache[user_id]] for user_id in dirty
+            }
+            self._flushing = dirty
+            try:
+                await asyncio.to_thread(self._backend.write_users, snapshots)
+            except Exception:
+                logger.exception("Failed to flush tasks for %d user(s); will retry.", len(snapshots))
+                self._dirty |= dirty
+                return
+            finally:
+                self._flushing = set()
+            logger.debug("Flushed tasks for %d user(s).", len(snapshots))
+            self._evict_clean_users()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flush task on the running event loop."""
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def shutdown(self) -> None:
+        """Stop the background flush task and persist pending changes."""
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+
+_STORE = WriteBehindTaskStore(task_storage.get_backend())
+
+
+async def list_tasks(user_id: int) -> List[dict]:
+    return await _STORE.list_tasks(user_id)
+
+
+async def list_tasks_page(user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+    return await _STORE.list_tasks_page(user_id, offset, limit)
+
+
+async def add_task(user_id: int, text: str) -> dict:
+    return await _STORE.add_task(user_id, text)
+
+
+async def add_tasks(user_id: int, texts: Iterable[str]) -> List[dict]:
+    return await _STORE.add_tasks(user_id, texts)
+
+
+async def remove_task(user_id: int, task_id: int) -> bool:
+    return await _STORE.remove_task(user_id, task_id)
+
+
+async def remove_tasks(user_id: int, task_ids: Iterable[int]) -> List[dict]:
+    return await _STORE.remove_tasks(user_id, task_ids)
+
+
+async def clear_tasks(user_id: int) -> None:
+    await _STORE.clear_tasks(user_id)
+
+
+def start() -> None:
+    _STORE.start()
+
+
+async def shutdown() -> None:
+    await _STORE.shutdown()
@@ -0,0 +1,359 @@
+"""Rate-limited, resumable fan-out of one message to many Telegram chats."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+_DEFAULT_CHECKPOINT_PATH = (
+    Path(__file__).resolve().parent.parent / "files" / "weather_broadcast_checkpoint.json"
+)
+CHECKPOINT_FILE = Path(os.getenv("WEATHER_BROADCAST_CHECKPOINT", _DEFAULT_CHECKPOINT_PATH))
+
+GLOBAL_RATE = 30.0
+PER_CHAT_INTERVAL = 1.0
+MAX_CONCURRENCY = 30
+MAX_ATTEMPTS = 5
+MAX_RESUME_AGE = 12 * 60 * 60
+
+
+class TokenBucket:
+    """Async token bucket allowing *rate* acquisitions per second on average.
+
+    :meth:`pause` blocks every acquisition until a deadline, which is how a
+    flood-limit answer from Telegram stops all senders and not just one.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else rate
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all acquisitions for *seconds* (extending, never shortening, a pause)."""
+
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._blocked_until > now:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+_SHARED_BUCKET: tuple[asyncio.AbstractEventLoop, TokenBucket] | None = None
+
+
+def shared_bucket() -> TokenBucket:
+    """Return the bucket that enforces ``GLOBAL_RATE`` across every delivery in the process."""
+
+    global _SHARED_BUCKET
+    loop = asyncio.get_running_loop()
+    if _SHARED_BUCKET is None or _SHARED_BUCKET[0] is not loop:
+        _SHARED_BUCKET = (loop, TokenBucket(GLOBAL_RATE))
+    return _SHARED_BUCKET[1]
+
+
+@dataclass(slots=True)
+class DeliveryCheckpoint:
+    """Progress of one broadcast, persisted so a restart can resume it."""
+
+    broadcast_id: str
+    text: str
+    chat_ids: list[int]
+    delivered: set[int] = field(default_factory=set)
+    failed: set[int] = field(default_factory=set)
+    created_at: float = field(default_factory=time.time)
+    completed: bool = False
+
+    @property
+    def pending(self) -> list[int]:
+        done = self.delivered | self.failed
+        return [chat_id for chat_id in self.chat_ids if chat_id not in done]
+
+    def to_dict(self) -> dict:
+        return {
+            "broadcast_id": self.broadcast_id,
+            "text": self.text,
+            "chat_ids": self.chat_ids,
+            "delivered": sorted(self.delivered),
+            "failed": sorted(self.failed),
+            "created_at": self.created_at,
+            "completed": self.completed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeliveryCheckpoint":
+        return cls(
+            broadcast_id=str(data["broadcast_id"]),
+            text=str(data["text"]),
+            chat_ids=[int(chat_id) for chat_id in data["chat_ids"]],
+            delivered={int(chat_id) for chat_id in data.get("delivered", [])},
+            failed={int(chat_id) for chat_id in data.get("failed", [])},
+            created_at=float(data.get("created_at", 0)),
+            completed=bool(data.get("completed", False)),
+        )
+
+
+def _log_path(path: Path) -> Path:
+    return path.with_suffix(".log")
+
+
+def _replay_log(checkpoint: DeliveryCheckpoint, path: Path) -> None:
+    """Apply the per-chat outcomes appended since the checkpoint was last written."""
+
+    try:
+        lines = _log_path(path).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return
+    if not lines or lines[0] != f"# {checkpoint.broadcast_id}":
+        return
+    for line in lines[1:]:
+        try:
+            chat_id = int(line[1:])
+        except ValueError:
+            continue  # torn final record
+        if line[0] == "+":
+            checkpoint.delivered.add(chat_id)
+        elif line[0] == "-":
+            checkpoint.failed.add(chat_id)
+
+
+def load_checkpoint(path: Path = CHECKPOINT_FILE) -> DeliveryCheckpoint | None:
+    """Return the stored checkpoint, or ``None`` if it is missing or unreadable."""
+
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            checkpoint = DeliveryCheckpoint.from_dict(json.load(fh))
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        LOGGER.warning("Ignoring unreadable broadcast checkpoint at %s", path)
+        return None
+    _replay_log(checkpoint, path)
+    return checkpoint
+
+
+def _write_checkpoint(data: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False)
+    tmp_path.replace(path)
+    # The snapshot now holds every logged outcome.
+    _log_path(path).unlink(missing_ok=True)
+
+
+def save_checkpoint(checkpoint: DeliveryCheckpoint, path: Path = CHECKPOINT_FILE) -> None:
+    _write_checkpoint(checkpoint.to_dict(), path)
+
+
+@dataclass(slots=True)
+class DeliveryReport:
+    """Outcome of :func:`deliver_broadcast`."""
+
+    delivered: int
+    failed: int
+    skipped: int
+
+
+async def _send_with_retry(
+    bot: Bot,
+    chat_id: int,
+    text: str,
+    *,
+    global_bucket: TokenBucket,
+    last_sent: dict[int, float],
+    per_chat_interval: float,
+    max_attempts: int,
+) -> bool:
+    for attempt in range(1, max_attempts + 1):
+        await global_bucket.acquire()
+        wait = last_sent.get(chat_id, float("-inf")) + per_chat_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        last_sent[chat_id] = time.monotonic()
+
+        try:
+            await bot.send_message(chat_id, text, parse_mode="HTML")
+            return True
+        except TelegramRetryAfter as exc:
+            LOGGER.warning(
+                "Flood limit for chat %s; retrying in %ss (attempt %d/%d)",
+                chat_id, exc.retry_after, attempt, max_attempts,
+            )
+            # The flood limit applies to the whole bot, so every worker waits.
+            global_bucket.pause(exc.retry_after)
+        except (TelegramNetworkError, TelegramServerError):
+            LOGGER.warning(
+                "Transient error sending broadcast to chat %s (attempt %d/%d)",
+                chat_id, attempt, max_attempts, exc_info=True,
+            )
+            await asyncio.sleep(min(30.0, 2.0 ** attempt))
+        except Exception:  # pragma: no cover - aiogram raises runtime-specific errors.
+            LOGGER.exception("Failed to send weather broadcast to chat %s", chat_id)
+            return False
+
+    LOGGER.error("Giving up on broadcast to chat %s after %d attempts", chat_id, max_attempts)
+    return False
+
+
+async def deliver_checkpoint(
+    bot: Bot,
+    checkpoint: DeliveryCheckpoint,
+    *,
+    checkpoint_path: Path | None = CHECKPOINT_FILE,
+    global_rate: float | None = None,
+    per_chat_interval: float = PER_CHAT_INTERVAL,
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_attempts: int = MAX_ATTEMPTS,
+) -> DeliveryReport:
+    """Send the checkpoint's text to every chat it has not reached yet.
+
+    The checkpoint file is written when delivery starts and ends; in
+    between every outcome is appended as one line to a log next to it.
+    Pass ``checkpoint_path=None`` to deliver without persisting progress.
+    Without *global_rate* the sends draw from :func:`shared_bucket`, so
+    concurrent broadcasts stay within Telegram's global limit together.
+    """
+
+    pending = checkpoint.pending
+    skipped = len(checkpoint.chat_ids) - len(pending)
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for chat_id in pending:
+        queue.put_nowait(chat_id)
+
+    global_bucket = shared_bucket() if global_rate is None else TokenBucket(global_rate)
+    last_sent: dict[int, float] = {}
+    log = None
+    if checkpoint_path is not None:
+        await asyncio.to_thread(_write_checkpoint, checkpoint.to_dict(), checkpoint_path)
+        log = _log_path(checkpoint_path).open("w", encoding="utf-8")
+        log.write(f"# {checkpoint.broadcast_id}\n")
+        log.flush()
+
+    async def worker() -> None:
+        while True:
+            try:
+                chat_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            sent = await _send_with_retry(
+                bot,
+                chat_id,
+                checkpoint.text,
+                global_bucket=global_bucket,
+                last_sent=last_sent,
+                per_chat_interval=per_chat_interval,
+                max_attempts=max_attempts,
+            )
+            (checkpoint.delivered if sent else checkpoint.failed).add(chat_id)
+            if log is not None:
+                # One short append per chat; a crash loses at most the sends still in flight.
+                log.write(f"{'+' if sent else '-'}{chat_id}\n")
+                log.flush()
+
+    try:
+        workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(pending)))]
+        await asyncio.gather(*workers)
+        checkpoint.completed = True
+    finally:
+        if log is not None:
+            log.close()
+            await asyncio.to_thread(_write_checkpoint, checkpoint.to_dict(), checkpoint_path)
+
+    return DeliveryReport(
+        delivered=len(checkpoint.delivered),
+        failed=len(checkpoint.failed),
+        skipped=skipped,
+    )
+
+
+async def deliver_broadcast(
+    bot: Bot,
+    chat_ids: Iterable[int],
+    text: str,
+    *,
+    broadcast_id: str,
+    checkpoint_path: Path = CHECKPOINT_FILE,
+    **options,
+) -> DeliveryReport:
+    """Deliver *text* to *chat_ids*, resuming a matching unfinished checkpoint.
+
+    Sends run concurrently under the process-wide token bucket (``GLOBAL_RATE``
+    messages per second) and at most one message per chat per
+    ``PER_CHAT_INTERVAL`` seconds.  ``TelegramRetryAfter`` pauses all senders
+    for the requested time before the chat is retried.  Every outcome is
+    logged next to *checkpoint_path* as soon as it is known, so a restart
+    never skips a chat and only re-sends to the chats whose send was still in
+    flight when the process died (at most ``max_concurrency``).
+    """
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None or checkpoint.broadcast_id != broadcast_id:
+        checkpoint = DeliveryCheckpoint(
+            broadcast_id=broadcast_id,
+            text=text,
+            chat_ids=list(dict.fromkeys(chat_ids)),
+        )
+    elif checkpoint.completed:
+        LOGGER.info("Broadcast %s was already delivered; skipping.", broadcast_id)
+        return DeliveryReport(
+            delivered=len(checkpoint.delivered),
+            failed=len(checkpoint.failed),
+            skipped=len(checkpoint.chat_ids),
+        )
+
+    return await deliver_checkpoint(bot, checkpoint, checkpoint_path=checkpoint_path, **options)
+
+
+async def resume_pending_broadcast(
+    bot: Bot,
+    *,
+    checkpoint_path: Path = CHECKPOINT_FILE,
+    max_age: float = MAX_RESUME_AGE,
+    **options,
+) -> DeliveryReport | None:
+    """Finish a broadcast interrupted by a restart, unless it is too old to matter."""
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None or checkpoint.completed or not checkpoint.pending:
+        return None
+    if time.time() - checkpoint.created_at > max_age:
+        LOGGER.info("Dropping stale broadcast checkpoint %s.", checkpoint.broadcast_id)
+        checkpoint.completed = True
+        save_checkpoint(checkpoint, checkpoint_path)
+        return None
+
+    LOGGER.info(
+        "Resuming broadcast %s for %d remaining chat(s).",
+        checkpoint.broadcast_id,
+        len(checkpoint.pending),
+    )
+    return await deliver_checkpoint(bot, checkpoint, checkpoint_path=checkpoint_path, **options)
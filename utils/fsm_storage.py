@@ -0,0 +1,154 @@
+"""Disk-backed aiogram FSM storage.
+
+:class:`SQLiteStorage` keeps every FSM key (state + data) in one row of a
+SQLite database (``FSM_STORAGE_DB``, default ``files/fsm_state.sqlite3``), so
+conversation state survives restarts.  Rows are loaded lazily the first time
+a key is accessed and kept in a bounded LRU; writes go straight through to
+disk on a worker thread.
+
+Data is stored as zlib-compressed JSON.  Gemini ``history`` entries are
+reduced to plain ``[role, text]`` pairs on the way in and come back as
+``{"role", "parts"}`` dictionaries, which ``start_chat`` accepts directly.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+from utils.ai_history import turn_role, turn_text
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = Path(__file__).resolve().parent.parent / "files" / "fsm_state.sqlite3"
+FSM_STORAGE_DB = Path(os.getenv("FSM_STORAGE_DB", _DEFAULT_PATH))
+_MAX_CACHED_KEYS = 10_000
+
+
+def encode_data(data: Mapping[str, Any]) -> bytes:
+    """Serialise FSM data to compressed JSON with history as role/text pairs."""
+
+    payload = dict(data)
+    if payload.get("history"):
+        payload["history"] = [[turn_role(turn), turn_text(turn)] for turn in payload["history"]]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+    return zlib.compress(raw.encode("utf-8"))
+
+
+def decode_data(blob: bytes | None) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    if payload.get("history"):
+        payload["history"] = [{"role": role, "parts": [text]} for role, text in payload["history"]]
+    return payload
+
+
+_EMPTY = encode_data({})
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage persisting each key's state and data in SQLite."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fsm (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data BLOB
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: Path = FSM_STORAGE_DB, *, max_cached_keys: int = _MAX_CACHED_KEYS) -> None:
+        self._path = path
+        self._max_cached_keys = max_cached_keys
+        self._key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._cache: OrderedDict[str, tuple[Optional[str], Dict[str, Any]]] = OrderedDict()
+        self._write_lock = asyncio.Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, isolation_level=None, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _load_row(self, key: str) -> tuple[Optional[str], Dict[str, Any]]:
+        row = self._connection().execute("SELECT state, data FROM fsm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, {}
+        return row[0], decode_data(row[1])
+
+    def _write_row(self, key: str, state: Optional[str], blob: bytes) -> None:
+        conn = self._connection()
+        if state is None and blob == _EMPTY:
+            conn.execute("DELETE FROM fsm WHERE key = ?", (key,))
+        else:
+            conn.execute("INSERT OR REPLACE INTO fsm (key, state, data) VALUES (?, ?, ?)", (key, state, blob))
+
+    async def _entry(self, key: str) -> tuple[Optional[str], Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            loaded = await asyncio.to_thread(self._load_row, key)
+            entry = self._cache.setdefault(key, loaded)
+            while len(self._cache) > self._max_cached_keys:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(key)
+        return entry
+
+    async def _store(self, key: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        blob = encode_data(data)
+        # Cache the decoded form so reads see exactly what a restart would load.
+        self._cache[key] = (state, decode_data(blob))
+        self._cache.move_to_end(key)
+        # One writer at a time keeps rows in the same order as the updates.
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_row, key, state, blob)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._key_builder.build(key)
+        _, data = await self._entry(storage_key)
+        value = state.state if isinstance(state, State) else state
+        await self._store(storage_key, value, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._entry(self._key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise TypeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        storage_key = self._key_builder.build(key)
+        state, _ = await self._entry(storage_key)
+        await self._store(storage_key, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._entry(self._key_builder.build(key))
+        return dict(data)
+
+    async def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        self._cache.clear()
+
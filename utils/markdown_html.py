@@ -0,0 +1,83 @@
+"""Single-pass Markdown to Telegram HTML renderer for AI replies.
+
+Gemini answers in Markdown, but Telegram's ``parse_mode="HTML"`` only knows a
+handful of tags and rejects the whole message on a stray ``<`` or ``&``.
+:func:`markdown_to_html` escapes the reply once and then makes one
+left-to-right pass with a single compiled pattern:
+
+* fenced code blocks become ``<pre><code>`` and their content is left alone;
+* ``#`` headings become bold lines, ``-``/``*``/``+`` list items get a bullet
+  and consecutive ``>`` lines are grouped into one ``<blockquote>``;
+* ``**bold**``, ``*italic*``, ``__underline__``, ``~~strike~~``, inline code,
+  ``[links](url)`` and backslash escapes are rendered inline.
+
+Every tag is produced together with its closing tag from one match, and only
+the span's content is rendered again (inline constructs only), so the
+output is always well nested.  Spans never cross a line break, and markers
+without a partner stay literal, which keeps partial (streamed) replies valid.
+"""
+from __future__ import annotations
+
+import re
+from html import escape
+
+_INLINE = (
+    r"\\(?P<esc>[\\`*_~\[\]()#+\-.!|])"
+    r"|(?P<ticks>`+)(?P<code>[^\n]+?)(?P=ticks)"
+    r"|\[(?P<label>[^\[\]\n]*)\]\([ \t]*(?P<url>[^()\s]+)[ \t]*\)"
+    r"|\*\*(?=\S)(?P<b>[^\n]+?)(?<=[^\s\\])\*\*"
+    r"|__(?=\S)(?P<u>[^\n]+?)(?<=[^\s\\])__"
+    r"|~~(?=\S)(?P<s>[^\n]+?)(?<=[^\s\\])~~"
+    r"|\*(?=[^\s*])(?P<i>[^\n*]+?)(?<=[^\s\\])\*"
+)
+_BLOCK = (
+    r"^[ \t]*```[ \t]*(?P<lang>[\w+#.-]*)[ \t]*\n(?P<pre>(?s:.*?))(?:^[ \t]*```[ \t]*$|\Z)"
+    r"|^[ \t]*\#{1,6}[ \t]+(?P<heading>[^\n]*?)[ \t#]*$"
+    r"|(?P<quote>(?:^[ \t]*&gt;[^\n]*(?:\n(?=[ \t]*&gt;))?)+)"
+    r"|^(?P<indent>[ \t]*)[-*+][ \t]+"
+)
+# The lookahead lets the engine skip plain text without trying every branch.
+_MARKDOWN_RE = re.compile(rf"(?=^|[\\`\[*_~])(?:{_BLOCK}|{_INLINE})", re.MULTILINE)
+_INLINE_RE = re.compile(rf"(?=[\\`\[*_~])(?:{_INLINE})")
+_QUOTE_MARKER_RE = re.compile(r"^[ \t]*&gt;[ \t]?", re.MULTILINE)
+
+_SAFE_SCHEMES = ("http://", "https://", "tg://", "mailto:")
+_SPAN_TAGS = frozenset({"b", "i", "u", "s"})
+
+
+def _inline(text: str) -> str:
+    return _INLINE_RE.sub(_render, text)
+
+
+def _render(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind in _SPAN_TAGS:
+        return f"<{kind}>{_inline(match.group(kind))}</{kind}>"
+    if kind == "code":
+        return f"<code>{match.group('code').strip()}</code>"
+    if kind == "indent":
+        return f"{match.group('indent')}• "
+    if kind == "url":
+        label = _inline(match.group("label"))
+        url = match.group("url")
+        if not url.lower().startswith(_SAFE_SCHEMES):
+            return label
+        href = url.replace('"', "&quot;")
+        return f'<a href="{href}">{label}</a>'
+    if kind == "esc":
+        return match.group("esc")
+    if kind == "heading":
+        return f"<b>{_inline(match.group('heading'))}</b>"
+    if kind == "quote":
+        return f"<blockquote>{_inline(_QUOTE_MARKER_RE.sub('', match.group('quote')))}</blockquote>"
+    # Fenced code block; its content was escaped with the rest of the reply.
+    language = match.group("lang")
+    opening = f'<pre><code class="language-{language}">' if language else "<pre><code>"
+    return f"{opening}{match.group('pre').rstrip()}</code></pre>"
+
+
+def markdown_to_html(text: str) -> str:
+    """Convert a Markdown reply into HTML accepted by Telegram's ``parse_mode="HTML"``."""
+
+    # Markdown markers never contain &, < or >, so escaping first is safe.
+    return _MARKDOWN_RE.sub(_render, escape(text, quote=False))
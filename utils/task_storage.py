@@ -1,43 +1,667 @@
-"""Simple JSON-backed storage for per-user task lists."""
+"""Per-user task list storage with pluggable persistence backends.
+
+The public helpers (:func:`list_tasks`, :func:`add_task`, :func:`add_tasks`,
+:func:`remove_task`, :func:`remove_tasks` and :func:`clear_tasks`) delegate to a backend selected through the
+``USER_TASKS_BACKEND`` environment variable:
+
+* ``sqlite`` (default) – indexed SQLite database in WAL mode.  Existing
+  ``user_tasks.json`` files are imported automatically on first start.
+* ``json`` – the original single-file JSON storage.
+* ``journal`` – append-only journal of mutations next to ``user_tasks.json``,
+  periodically compacted into that file as a snapshot.
+
+Every backend keeps a per-user id sequence, so the id of a removed task is
+never handed out again.  The JSON-based backends store it next to the
+snapshot in ``user_tasks.sequences.json``.
+"""
 from __future__ import annotations
 
 import json
+import logging
 import os
+import sqlite3
+import threading
 from pathlib import Path
 from threading import Lock
-from typing import Dict, List
+from typing import Dict, Iterable, List, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
 
 _DEFAULT_PATH = Path(__file__).resolve().parent.parent / "files" / "user_tasks.json"
 _TASKS_FILE = Path(os.getenv("USER_TASKS_FILE", _DEFAULT_PATH))
 _TASKS_FILE.parent.mkdir(parents=True, exist_ok=True)
+_TASKS_DB_FILE = Path(os.getenv("USER_TASKS_DB", _TASKS_FILE.with_suffix(".sqlite3")))
+_BACKEND_NAME = os.getenv("USER_TASKS_BACKEND", "sqlite").strip().lower()
+_JOURNAL_COMPACT_EVERY = int(os.getenv("USER_TASKS_COMPACT_EVERY", "1000"))
+
+
+def _next_id(user_tasks: List[dict], last_id: int) -> int:
+    return max(last_id, max((task.get("id", 0) for task in user_tasks), default=0)) + 1
+
+
+class TaskBackend(Protocol):
+    """Interface implemented by every task persistence engine."""
+
+    def list_tasks(self, user_id: int) -> List[dict]: ...
+
+    def list_tasks_page(self, user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+        """Return up to *limit* tasks starting at *offset* and the total count."""
+        ...
+
+    def add_task(self, user_id: int, text: str) -> dict: ...
+
+    def add_tasks(self, user_id: int, texts: List[str]) -> List[dict]:
+        """Append several tasks in one commit and return the updated list."""
+        ...
 
-_LOCK = Lock()
+    def reserve_ids(self, user_id: int, count: int) -> int:
+        """Reserve *count* consecutive task ids and return the first one."""
+        ...
 
+    def remove_task(self, user_id: int, task_id: int) -> bool: ...
 
-def _load_all() -> Dict[str, List[dict]]:
-    if not _TASKS_FILE.exists():
+    def remove_tasks(self, user_id: int, task_ids: List[int]) -> List[dict]:
+        """Remove several tasks in one commit and return the updated list."""
+        ...
+
+    def clear_tasks(self, user_id: int) -> None: ...
+
+    def write_users(self, snapshots: Dict[int, List[dict]]) -> None:
+        """Replace the task lists of several users in one commit."""
+        ...
+
+
+class JsonTaskBackend:
+    """Store every user's tasks in one JSON document rewritten on each change."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._sequences_path = path.with_name(f"{path.stem}.sequences.json")
+        self._lock = Lock()
+
+    def _load_all(self) -> Dict[str, List[dict]]:
+        if not self._path.exists():
+            return {}
+        try:
+            with self._path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+                if isinstance(data, dict):
+                    return {str(k): list(v) for k, v in data.items()}
+        except json.JSONDecodeError:
+            pass
         return {}
-    try:
-        with _TASKS_FILE.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
-            if isinstance(data, dict):
-                return {str(k): list(v) for k, v in data.items()}
-    except json.JSONDecodeError:
-        pass
-    return {}
 
+    def _save_all(self, data: Dict[str, List[dict]]) -> None:
+        self._write_json(self._path, data, indent=2)
+
+    @staticmethod
+    def _write_json(path: Path, data: dict, **kwargs) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, **kwargs)
+            fh.flush()
+            os.fsync(fh.fileno())
+        tmp_path.replace(path)
+
+    def _load_sequences(self) -> Dict[str, int]:
+        """Last id handed out per user; a missing file falls back to the stored ids."""
+
+        try:
+            with self._sequences_path.open("r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return {str(k): int(v) for k, v in data.items()}
+        except (OSError, json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            return {}
+
+    def _save_sequences(self, sequences: Dict[str, int]) -> None:
+        self._write_json(self._sequences_path, sequences)
+
+    def _claim_ids(self, data: Dict[str, List[dict]], user_key: str, count: int) -> int:
+        # Caller holds self._lock.  The sequence is saved before any task that uses it.
+        sequences = self._load_sequences()
+        first_id = _next_id(data.get(user_key, []), sequences.get(user_key, 0))
+        sequences[user_key] = first_id + count - 1
+        self._save_sequences(sequences)
+        return first_id
+
+    def list_tasks(self, user_id: int) -> List[dict]:
+        with self._lock:
+            data = self._load_all()
+            return list(data.get(str(user_id), []))
+
+    def list_tasks_page(self, user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+        user_tasks = self.list_tasks(user_id)
+        return user_tasks[offset:offset + limit], len(user_tasks)
+
+    def add_task(self, user_id: int, text: str) -> dict:
+        with self._lock:
+            data = self._load_all()
+            user_key = str(user_id)
+            user_tasks = list(data.get(user_key, []))
+            task = {"id": self._claim_ids(data, user_key, 1), "text": text}
+            user_tasks.append(task)
+            data[user_key] = user_tasks
+            self._save_all(data)
+            return task
+
+    def add_tasks(self, user_id: int, texts: List[str]) -> List[dict]:
+        with self._lock:
+            data = self._load_all()
+            user_key = str(user_id)
+            user_tasks = list(data.get(user_key, []))
+            next_id = self._claim_ids(data, user_key, len(texts))
+            user_tasks.extend(
+                {"id": task_id, "text": text} for task_id, text in enumerate(texts, start=next_id)
+            )
+            data[user_key] = user_tasks
+            self._save_all(data)
+            return user_tasks
+
+    def reserve_ids(self, user_id: int, count: int) -> int:
+        with self._lock:
+            return self._claim_ids(self._load_all(), str(user_id), count)
+
+    def remove_task(self, user_id: int, task_id: int) -> bool:
+        with self._lock:
+            data = self._load_all()
+            user_key = str(user_id)
+            user_tasks = list(data.get(user_key, []))
+            original_len = len(user_tasks)
+            user_tasks = [task for task in user_tasks if task.get("id") != task_id]
+            if len(user_tasks) == original_len:
+                return False
+            data[user_key] = user_tasks
+            self._save_all(data)
+            return True
+
+    def remove_tasks(self, user_id: int, task_ids: List[int]) -> List[dict]:
+        with self._lock:
+            data = self._load_all()
+            user_key = str(user_id)
+            user_tasks = list(data.get(user_key, []))
+            wanted = set(task_ids)
+            remaining = [task for task in user_tasks if task.get("id") not in wanted]
+            if len(remaining) != len(user_tasks):
+                data[user_key] = remaining
+                self._save_all(data)
+            return remaining
+
+    def clear_tasks(self, user_id: int) -> None:
+        with self._lock:
+            data = self._load_all()
+            if str(user_id) in data:
+                del data[str(user_id)]
+                self._save_all(data)
+
+    def write_users(self, snapshots: Dict[int, List[dict]]) -> None:
+        with self._lock:
+            data = self._load_all()
+            sequences = self._load_sequences()
+            for user_id, user_tasks in snapshots.items():
+                sequences[str(user_id)] = _next_id(user_tasks, sequences.get(str(user_id), 0)) - 1
+            self._save_sequences(sequences)
+            for user_id, user_tasks in snapshots.items():
+                if user_tasks:
+                    data[str(user_id)] = list(user_tasks)
+                else:
+                    data.pop(str(user_id), None)
+            self._save_all(data)
+
+
+class SqliteTaskBackend:
+    """Store tasks in an indexed SQLite database running in WAL mode.
+
+    Every user owns a monotonically increasing id sequence, so a write only
+    touches that user's rows instead of rewriting the whole data set.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            user_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            PRIMARY KEY (user_id, task_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS task_sequences (
+            user_id INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: Path, *, legacy_json: Path | None = None) -> None:
+        self._path = path
+        self._local = threading.local()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._connection()
+        conn.executescript(self._SCHEMA)
+        if legacy_json is not None:
+            self._migrate_from_json(legacy_json)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so every
+        # thread (including asyncio.to_thread workers) gets its own one.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_from_json(self, legacy_json: Path) -> None:
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        legacy = JsonTaskBackend(legacy_json)
+        data = legacy._load_all()
+        rows: list[tuple[int, int, str]] = []
+        for user_key, user_tasks in data.items():
+            try:
+                user_id = int(user_key)
+            except ValueError:
+                logger.warning("Skipping tasks for non-numeric user id %r during migration", user_key)
+                continue
+            for task in user_tasks:
+                if isinstance(task, dict) and "id" in task and "text" in task:
+                    rows.append((user_id, int(task["id"]), str(task["text"])))
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (user_id, task_id, text) VALUES (?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                """
+                INSERT INTO task_sequences (user_id, last_id)
+                SELECT user_id, MAX(task_id) FROM tasks GROUP BY user_id
+                ON CONFLICT(user_id) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+                """
+            )
+            conn.executemany(
+                """
+                INSERT INTO task_sequences (user_id, last_id) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+                """,
+                [(int(key), last_id) for key, last_id in legacy._load_sequences().items() if key.isdigit()],
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(legacy_json),))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        if rows:
+            logger.info("Migrated %d task(s) from %s into %s", len(rows), legacy_json, self._path)
+
+    def list_tasks(self, user_id: int) -> List[dict]:
+        cursor = self._connection().execute(
+            "SELECT task_id, text FROM tasks WHERE user_id = ? ORDER BY task_id",
+            (user_id,),
+        )
+        return [{"id": task_id, "text": text} for task_id, text in cursor]
+
+    def list_tasks_page(self, user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+        conn = self._connection()
+        cursor = conn.execute(
+            "SELECT task_id, text FROM tasks WHERE user_id = ? ORDER BY task_id LIMIT ? OFFSET ?",
+            (user_id, limit, offset),
+        )
+        page = [{"id": task_id, "text": text} for task_id, text in cursor]
+        (total,) = conn.execute("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (user_id,)).fetchone()
+        return page, total
+
+    def add_task(self, user_id: int, text: str) -> dict:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO task_sequences (user_id, last_id) VALUES (?, 1)
+                ON CONFLICT(user_id) DO UPDATE SET last_id = last_id + 1
+                """,
+                (user_id,),
+            )
+            (next_id,) = conn.execute(
+                "SELECT last_id FROM task_sequences WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO tasks (user_id, task_id, text) VALUES (?, ?, ?)",
+                (user_id, next_id, text),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return {"id": next_id, "text": text}
 
-def _save_all(data: Dict[str, List[dict]]) -> None:
-    tmp_path = _TASKS_FILE.with_suffix(".tmp")
-    with tmp_path.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, ensure_ascii=False, indent=2)
-    tmp_path.replace(_TASKS_FILE)
+    def add_tasks(self, user_id: int, texts: List[str]) -> List[dict]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO task_sequences (user_id, last_id) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_id = last_id + excluded.last_id
+                """,
+                (user_id, len(texts)),
+            )
+            (last_id,) = conn.execute(
+                "SELECT last_id FROM task_sequences WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            first_id = last_id - len(texts) + 1
+            conn.executemany(
+                "INSERT INTO tasks (user_id, task_id, text) VALUES (?, ?, ?)",
+                [(user_id, task_id, text) for task_id, text in enumerate(texts, start=first_id)],
+            )
+            user_tasks = self.list_tasks(user_id)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return user_tasks
+
+    def reserve_ids(self, user_id: int, count: int) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                INSERT INTO task_sequences (user_id, last_id) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_id = last_id + excluded.last_id
+                """,
+                (user_id, count),
+            )
+            (last_id,) = conn.execute(
+                "SELECT last_id FROM task_sequences WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return last_id - count + 1
+
+    def remove_task(self, user_id: int, task_id: int) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM tasks WHERE user_id = ? AND task_id = ?",
+            (user_id, task_id),
+        )
+        return cursor.rowcount > 0
+
+    def remove_tasks(self, user_id: int, task_ids: List[int]) -> List[dict]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "DELETE FROM tasks WHERE user_id = ? AND task_id = ?",
+                [(user_id, task_id) for task_id in task_ids],
+            )
+            user_tasks = self.list_tasks(user_id)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return user_tasks
+
+    def clear_tasks(self, user_id: int) -> None:
+        self._connection().execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
+
+    def write_users(self, snapshots: Dict[int, List[dict]]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for user_id, user_tasks in snapshots.items():
+                conn.execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT INTO tasks (user_id, task_id, text) VALUES (?, ?, ?)",
+                    [(user_id, task["id"], task["text"]) for task in user_tasks],
+                )
+                if user_tasks:
+                    conn.execute(
+                        """
+                        INSERT INTO task_sequences (user_id, last_id) VALUES (?, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)
+                        """,
+                        (user_id, max(task["id"] for task in user_tasks)),
+                    )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class JournalTaskBackend:
+    """Append every mutation to a journal and fold it into a JSON snapshot.
+
+    The snapshot uses the same layout as :class:`JsonTaskBackend`.  On start
+    the snapshot and journal are replayed once into an in-memory index, after
+    which writes are single appended lines.  Once ``compact_every`` records
+    have been appended a background thread rotates the journal and rewrites
+    the snapshot.  Every record is idempotent, so replaying a rotated journal
+    on top of a snapshot that already contains it is harmless.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        journal_path: Path | None = None,
+        *,
+        compact_every: int = _JOURNAL_COMPACT_EVERY,
+    ) -> None:
+        self._snapshot = JsonTaskBackend(snapshot_path)
+        self._journal_path = journal_path or snapshot_path.with_suffix(".journal")
+        self._rotated_path = self._journal_path.with_name(self._journal_path.name + ".1")
+        self._compact_every = compact_every
+        self._lock = Lock()
+        self._compact_lock = Lock()
+
+        self._index: Dict[str, List[dict]] = self._snapshot._load_all()
+        self._sequences: Dict[str, int] = self._snapshot._load_sequences()
+        self._pending = self._replay(self._rotated_path) + self._replay(self._journal_path)
+        self._fh = self._journal_path.open("a", encoding="utf-8")
+        if self._rotated_path.exists():
+            # A previous compaction did not finish; complete it now.
+            self.compact()
+
+    def _replay(self, path: Path) -> int:
+        if not path.exists():
+            return 0
+
+        raw = path.read_bytes()
+        applied = 0
+        offset = 0
+        for line in raw.splitlines(keepends=True):
+            try:
+                record = json.loads(line)
+                self._apply(record)
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError, ValueError):
+                if offset + len(line) == len(raw):
+                    # Torn final record from a crash mid-append: drop it so the
+                    # next append starts on a clean line.
+                    logger.warning("Discarding torn final record in %s", path)
+                    with path.open("r+b") as fh:
+                        fh.truncate(offset)
+                    break
+                logger.warning("Skipping corrupt record at byte %d in %s", offset, path)
+            else:
+                applied += 1
+            offset += len(line)
+        else:
+            if raw and not raw.endswith(b"\n"):
+                # The final record is complete but unterminated; end it so the
+                # next append does not run into it.
+                with path.open("ab") as fh:
+                    fh.write(b"\n")
+        return applied
+
+    def _apply(self, record: dict) -> None:
+        op = record["op"]
+        user_key = str(record["user"])
+        if op == "add":
+            user_tasks = self._index.setdefault(user_key, [])
+            if not any(task.get("id") == record["id"] for task in user_tasks):
+                user_tasks.append({"id": record["id"], "text": record["text"]})
+            self._sequences[user_key] = max(self._sequences.get(user_key, 0), record["id"])
+        elif op == "seq":
+            self._sequences[user_key] = max(self._sequences.get(user_key, 0), record["last"])
+        elif op == "remove":
+            if user_key in self._index:
+                self._index[user_key] = [
+                    task for task in self._index[user_key] if task.get("id") != record["id"]
+                ]
+        elif op == "clear":
+            self._index.pop(user_key, None)
+        elif op == "write":
+            if record["tasks"]:
+                self._index[user_key] = [dict(task) for task in record["tasks"]]
+                self._sequences[user_key] = _next_id(record["tasks"], self._sequences.get(user_key, 0)) - 1
+            else:
+                self._index.pop(user_key, None)
+        else:
+            raise ValueError(f"Unknown journal operation '{op}'.")
+
+    def _append(self, *records: dict) -> None:
+        # Caller holds self._lock.
+        for record in records:
+            self._apply(record)
+        self._fh.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._fh.flush()
+        self._pending += len(records)
+        if self._pending >= self._compact_every and not self._compact_lock.locked():
+            threading.Thread(target=self.compact, name="task-journal-compaction", daemon=True).start()
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot file."""
+
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                self._fh.close()
+                if self._rotated_path.exists():
+                    # Leftover from an interrupted compaction: keep its records.
+                    with self._rotated_path.open("ab") as dst:
+                        dst.write(self._journal_path.read_bytes())
+                    self._journal_path.unlink()
+                else:
+                    self._journal_path.replace(self._rotated_path)
+                self._fh = self._journal_path.open("a", encoding="utf-8")
+                self._pending = 0
+                data = {key: [dict(task) for task in tasks] for key, tasks in self._index.items()}
+                sequences = dict(self._sequences)
+
+            self._snapshot._save_sequences(sequences)
+            self._snapshot._save_all(data)
+            self._rotated_path.unlink()
+        finally:
+            self._compact_lock.release()
+
+    def list_tasks(self, user_id: int) -> List[dict]:
+        with self._lock:
+            return [dict(task) for task in self._index.get(str(user_id), [])]
+
+    def list_tasks_page(self, user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+        with self._lock:
+            user_tasks = self._index.get(str(user_id), [])
+            return [dict(task) for task in user_tasks[offset:offset + limit]], len(user_tasks)
+
+    def add_task(self, user_id: int, text: str) -> dict:
+        with self._lock:
+            user_tasks = self._index.get(str(user_id), [])
+            next_id = _next_id(user_tasks, self._sequences.get(str(user_id), 0))
+            self._append({"op": "add", "user": str(user_id), "id": next_id, "text": text})
+            return {"id": next_id, "text": text}
+
+    def add_tasks(self, user_id: int, texts: List[str]) -> List[dict]:
+        with self._lock:
+            user_tasks = self._index.get(str(user_id), [])
+            next_id = _next_id(user_tasks, self._sequences.get(str(user_id), 0))
+            self._append(
+                *(
+                    {"op": "add", "user": str(user_id), "id": task_id, "text": text}
+                    for task_id, text in enumerate(texts, start=next_id)
+                )
+            )
+            return [dict(task) for task in self._index.get(str(user_id), [])]
+
+    def reserve_ids(self, user_id: int, count: int) -> int:
+        with self._lock:
+            user_key = str(user_id)
+            first_id = _next_id(self._index.get(user_key, []), self._sequences.get(user_key, 0))
+            self._append({"op": "seq", "user": user_key, "last": first_id + count - 1})
+            return first_id
+
+    def remove_task(self, user_id: int, task_id: int) -> bool:
+        with self._lock:
+            user_tasks = self._index.get(str(user_id), [])
+            if not any(task.get("id") == task_id for task in user_tasks):
+                return False
+            self._append({"op": "remove", "user": str(user_id), "id": task_id})
+            return True
+
+    def remove_tasks(self, user_id: int, task_ids: List[int]) -> List[dict]:
+        with self._lock:
+            present = {task.get("id") for task in self._index.get(str(user_id), [])}
+            self._append(
+                *(
+                    {"op": "remove", "user": str(user_id), "id": task_id}
+                    for task_id in dict.fromkeys(task_ids)
+                    if task_id in present
+                )
+            )
+            return [dict(task) for task in self._index.get(str(user_id), [])]
+
+    def clear_tasks(self, user_id: int) -> None:
+        with self._lock:
+            if str(user_id) in self._index:
+                self._append({"op": "clear", "user": str(user_id)})
+
+    def write_users(self, snapshots: Dict[int, List[dict]]) -> None:
+        with self._lock:
+            self._append(
+                *(
+                    {"op": "write", "user": str(user_id), "tasks": list(user_tasks)}
+                    for user_id, user_tasks in snapshots.items()
+                )
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+def _create_backend(name: str) -> TaskBackend:
+    if name == "json":
+        return JsonTaskBackend(_TASKS_FILE)
+    if name == "sqlite":
+        return SqliteTaskBackend(_TASKS_DB_FILE, legacy_json=_TASKS_FILE)
+    if name == "journal":
+        return JournalTaskBackend(_TASKS_FILE)
+    raise ValueError(
+        f"Unknown task storage backend '{name}'. Use 'sqlite', 'json' or 'journal'."
+    )
+
+
+_BACKEND: TaskBackend = _create_backend(_BACKEND_NAME)
+
+
+def get_backend() -> TaskBackend:
+    """Return the backend used by the module-level helpers."""
+
+    return _BACKEND
 
 
 def list_tasks(user_id: int) -> List[dict]:
-    with _LOCK:
-        data = _load_all()
-        return list(data.get(str(user_id), []))
+    return _BACKEND.list_tasks(user_id)
+
+
+def list_tasks_page(user_id: int, offset: int, limit: int) -> Tuple[List[dict], int]:
+    return _BACKEND.list_tasks_page(user_id, offset, limit)
 
 
 def add_task(user_id: int, text: str) -> dict:
@@ -45,35 +669,29 @@ def add_task(user_id: int, text: str) -> dict:
     if not text:
         raise ValueError("Task text must not be empty.")
 
-    with _LOCK:
-        data = _load_all()
-        user_key = str(user_id)
-        user_tasks = list(data.get(user_key, []))
-        next_id = (max((task.get("id", 0) for task in user_tasks), default=0) + 1)
-        task = {"id": next_id, "text": text}
-        user_tasks.append(task)
-        data[user_key] = user_tasks
-        _save_all(data)
-        return task
+    return _BACKEND.add_task(user_id, text)
+
+
+def clean_task_texts(texts: Iterable[str]) -> List[str]:
+    """Strip *texts* and drop empty entries, raising if nothing is left."""
+
+    cleaned = [text.strip() for text in texts if text and text.strip()]
+    if not cleaned:
+        raise ValueError("Task text must not be empty.")
+    return cleaned
+
+
+def add_tasks(user_id: int, texts: Iterable[str]) -> List[dict]:
+    return _BACKEND.add_tasks(user_id, clean_task_texts(texts))
 
 
 def remove_task(user_id: int, task_id: int) -> bool:
-    with _LOCK:
-        data = _load_all()
-        user_key = str(user_id)
-        user_tasks = list(data.get(user_key, []))
-        original_len = len(user_tasks)
-        user_tasks = [task for task in user_tasks if task.get("id") != task_id]
-        if len(user_tasks) == original_len:
-            return False
-        data[user_key] = user_tasks
-        _save_all(data)
-        return True
+    return _BACKEND.remove_task(user_id, task_id)
+
+
+def remove_tasks(user_id: int, task_ids: Iterable[int]) -> List[dict]:
+    return _BACKEND.remove_tasks(user_id, list(task_ids))
 
 
 def clear_tasks(user_id: int) -> None:
-    with _LOCK:
-        data = _load_all()
-        if str(user_id) in data:
-            del data[str(user_id)]
-            _save_all(data)
+    _BACKEND.clear_tasks(user_id)
@@ -2,19 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Any
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Sequence
 
+import aiohttp
 import requests
 
 from config_reader import config
 
 
-BASE_URL = "https://api.openweathermap.org"
+BASE_URL = (getattr(config, "openweather_base_url", None) or "https://api.openweathermap.org").rstrip("/")
 GEOCODING_ENDPOINT = f"{BASE_URL}/geo/1.0/direct"
 WEATHER_ENDPOINT = f"{BASE_URL}/data/2.5/weather"
+GROUP_ENDPOINT = f"{BASE_URL}/data/2.5/group"
+GROUP_BATCH_SIZE = 20
 
 DEFAULT_TIMEOUT = 10
+MAX_CONNECTIONS = 20
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+
+_SESSION: aiohttp.ClientSession | None = None
+
+_DEFAULT_GEOCODE_CACHE_PATH = Path(__file__).resolve().parent.parent / "files" / "geocode_cache.json"
+GEOCODE_CACHE_FILE = Path(os.getenv("GEOCODE_CACHE_FILE", _DEFAULT_GEOCODE_CACHE_PATH))
+GEOCODE_CACHE_SIZE = 1024
+GEOCODE_DISK_SIZE = 20_000
+GEOCODE_SAVE_DELAY = 2.0
+NEGATIVE_GEOCODE_TTL = 15 * 60
+WEATHER_CACHE_TTL = 10 * 60
+WEATHER_CACHE_SIZE = 2048
+WEATHER_CACHE_PRECISION = 2
+
+LOGGER = logging.getLogger(__name__)
 
 
 class WeatherServiceError(RuntimeError):
@@ -37,6 +69,461 @@ class Coordinates:
     lon: float
 
 
+class GeocodeCache:
+    """Two-tier cache of geocoding results: an in-process LRU over a JSON file.
+
+    Keys are normalised ``city,state,country`` queries.  Found coordinates are
+    kept forever; unknown locations are remembered for ``negative_ttl``
+    seconds so typos do not hit the API on every request.  Entries also
+    remember the OpenWeather city ID once a weather lookup has revealed it,
+    which lets digests use the batched group endpoint.
+
+    Changes are written to the file by a timer thread ``save_delay`` seconds
+    after the first unsaved change, so lookups on the event loop never wait
+    on disk I/O and a burst of new cities costs one write.  Expired misses
+    are dropped on save and the file keeps at most ``max_disk_entries``
+    entries, evicting the least recently stored ones.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        max_entries: int = GEOCODE_CACHE_SIZE,
+        negative_ttl: float = NEGATIVE_GEOCODE_TTL,
+        max_disk_entries: int = GEOCODE_DISK_SIZE,
+        save_delay: float = GEOCODE_SAVE_DELAY,
+    ) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._negative_ttl = negative_ttl
+        self._max_disk_entries = max_disk_entries
+        self._save_delay = save_delay
+        self._lru: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._disk: dict[str, dict[str, Any]] | None = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer: threading.Timer | None = None
+        self._unsaved = False
+
+    @staticmethod
+    def key(query: str) -> str:
+        return ",".join(" ".join(part.split()).casefold() for part in query.split(","))
+
+    def _load_disk(self) -> dict[str, dict[str, Any]]:
+        if self._disk is None:
+            self._disk = {}
+            if self._path is not None and self._path.exists():
+                try:
+                    with self._path.open("r", encoding="utf-8") as fh:
+                        data = json.load(fh)
+                    if isinstance(data, dict):
+                        self._disk = data
+                except (OSError, json.JSONDecodeError):
+                    LOGGER.warning("Ignoring unreadable geocode cache at %s", self._path)
+        return self._disk
+
+    def _put_disk(self, key: str, entry: dict[str, Any]) -> None:
+        # Caller holds self._lock.  Re-inserting keeps the dict in store order.
+        disk = self._load_disk()
+        disk.pop(key, None)
+        disk[key] = entry
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        # Caller holds self._lock.
+        if self._path is None:
+            return
+        self._unsaved = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self._save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _prune_disk(self) -> None:
+        # Caller holds self._lock.
+        disk = self._load_disk()
+        now = time.time()
+        for key in [key for key, entry in disk.items() if entry.get("missing") and entry.get("expires", 0) <= now]:
+            del disk[key]
+        for key in list(disk)[: max(0, len(disk) - self._max_disk_entries)]:
+            del disk[key]
+
+    def flush(self) -> None:
+        """Write unsaved changes to the cache file now (blocking)."""
+
+        if self._path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._unsaved:
+                    return
+                self._unsaved = False
+                self._prune_disk()
+                data = dict(self._load_disk())
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path.with_suffix(".tmp")
+                with tmp_path.open("w", encoding="utf-8") as fh:
+                    json.dump(data, fh, ensure_ascii=False)
+                tmp_path.replace(self._path)
+            except OSError:
+                LOGGER.exception("Failed to save the geocode cache to %s", self._path)
+                with self._lock:
+                    self._schedule_save()
+
+    def _remember(self, key: str, entry: dict[str, Any]) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._max_entries:
+            self._lru.popitem(last=False)
+
+    def lookup(self, query: str) -> Coordinates | None:
+        """Return cached coordinates, ``None`` on a miss, or raise for cached misses."""
+
+        key = self.key(query)
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                entry = self._load_disk().get(key)
+                if entry is None:
+                    return None
+                self._remember(key, entry)
+            else:
+                self._lru.move_to_end(key)
+
+            if entry.get("missing"):
+                if entry.get("expires", 0) <= time.time():
+                    self._lru.pop(key, None)
+                    self._load_disk().pop(key, None)
+                    return None
+                raise LocationNotFoundError(f"No matching locations found for '{query}'.")
+            return Coordinates(lat=entry["lat"], lon=entry["lon"])
+
+    def store(self, query: str, coordinates: Coordinates) -> None:
+        key = self.key(query)
+        entry = {"lat": coordinates.lat, "lon": coordinates.lon}
+        with self._lock:
+            self._remember(key, entry)
+            self._put_disk(key, entry)
+
+    def city_id(self, query: str) -> int | None:
+        """Return the OpenWeather city ID recorded for *query*, if any."""
+
+        key = self.key(query)
+        with self._lock:
+            entry = self._lru.get(key) or self._load_disk().get(key)
+            return entry.get("id") if entry else None
+
+    def store_city_id(self, query: str, city_id: int) -> None:
+        key = self.key(query)
+        with self._lock:
+            entry = self._lru.get(key) or self._load_disk().get(key)
+            if entry is None or entry.get("missing") or entry.get("id") == city_id:
+                return
+            entry = {**entry, "id": city_id}
+            self._remember(key, entry)
+            self._put_disk(key, entry)
+
+    def store_missing(self, query: str) -> None:
+        key = self.key(query)
+        entry = {"missing": True, "expires": time.time() + self._negative_ttl}
+        with self._lock:
+            self._remember(key, entry)
+            self._put_disk(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._disk = {}
+            self._schedule_save()
+
+
+_GEOCODE_CACHE = GeocodeCache(GEOCODE_CACHE_FILE)
+
+WeatherCacheKey = tuple[float, float, str]
+
+
+class WeatherCache:
+    """TTL cache for current-weather payloads with single-flight fetching.
+
+    OpenWeather refreshes current conditions roughly every ten minutes, so
+    payloads are cached per rounded coordinate pair and unit system.  When
+    several callers miss on the same key at once only the first one performs
+    the request; the others wait for its result and are counted as
+    ``coalesced``.  Payloads are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, ttl: float = WEATHER_CACHE_TTL, *, max_entries: int = WEATHER_CACHE_SIZE) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: dict[WeatherCacheKey, tuple[float, dict[str, Any]]] = {}
+        self._inflight: dict[WeatherCacheKey, Future] = {}
+        self._inflight_async: dict[WeatherCacheKey, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(coordinates: Coordinates, units: str) -> WeatherCacheKey:
+        return (
+            round(coordinates.lat, WEATHER_CACHE_PRECISION),
+            round(coordinates.lon, WEATHER_CACHE_PRECISION),
+            units,
+        )
+
+    def _fresh(self, key: WeatherCacheKey) -> dict[str, Any] | None:
+        # Caller holds self._lock.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, payload = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        return payload
+
+    def _store(self, key: WeatherCacheKey, payload: dict[str, Any]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) >= self._max_entries:
+                for stale_key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                    del self._entries[stale_key]
+                while len(self._entries) >= self._max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now + self._ttl, payload)
+
+    def get_or_fetch(self, key: WeatherCacheKey, fetch: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Return the cached payload for *key* or fetch it once for all waiting threads."""
+
+        with self._lock:
+            payload = self._fresh(key)
+            if payload is not None:
+                self.hits += 1
+                return payload
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            payload = fetch()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self._store(key, payload)
+            future.set_result(payload)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return payload
+
+    async def get_or_fetch_async(
+        self, key: WeatherCacheKey, fetch: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        """Async counterpart of :meth:`get_or_fetch` for coroutines on one event loop."""
+
+        with self._lock:
+            payload = self._fresh(key)
+            if payload is not None:
+                self.hits += 1
+                return payload
+            task = self._inflight_async.get(key)
+            if task is None:
+                self.misses += 1
+                task = self._inflight_async[key] = asyncio.create_task(self._fill_async(key, fetch))
+            else:
+                self.coalesced += 1
+
+        # Shield so one cancelled waiter does not cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+    async def _fill_async(
+        self, key: WeatherCacheKey, fetch: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict[str, Any]:
+        try:
+            payload = await fetch()
+            self._store(key, payload)
+            return payload
+        finally:
+            with self._lock:
+                self._inflight_async.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_WEATHER_CACHE = WeatherCache()
+
+
+def weather_cache_stats() -> dict[str, int]:
+    """Return hit/miss/coalesced counters of the current-weather cache."""
+
+    return _WEATHER_CACHE.stats()
+
+
+class Priority(IntEnum):
+    """Scheduling class of an OpenWeather call; lower values go first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_REQUEST_PRIORITY: ContextVar[Priority] = ContextVar("openweather_priority", default=Priority.INTERACTIVE)
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Run OpenWeather calls made inside the block (and tasks it spawns) at *priority*."""
+
+    token = _REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+class QuotaLimiter:
+    """Process-wide sliding-window budget of OpenWeather calls per minute.
+
+    Interactive calls may use the whole budget.  Background calls (e.g. the
+    daily digest) may only use ``background_share`` of it and additionally
+    yield whenever an interactive caller is queued, so a digest running
+    alongside user traffic cannot starve ``/weather``.  Time spent waiting
+    for a slot is recorded per priority.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int,
+        *,
+        background_share: float = 0.8,
+        window: float = 60.0,
+    ) -> None:
+        self._limits = {
+            Priority.INTERACTIVE: max(1, calls_per_minute),
+            Priority.BACKGROUND: max(1, int(calls_per_minute * background_share)),
+        }
+        self._window = window
+        self._calls: deque[float] = deque()
+        self._waiting = {priority: 0 for priority in Priority}
+        self._wait_stats = {priority: {"calls": 0, "total_wait": 0.0, "max_wait": 0.0} for priority in Priority}
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, priority: Priority) -> float:
+        """Record a call and return ``0``, or return how long to wait. Caller holds the lock."""
+
+        now = time.monotonic()
+        while self._calls and self._calls[0] <= now - self._window:
+            self._calls.popleft()
+
+        limit = self._limits[priority]
+        if len(self._calls) >= limit:
+            # Wait until enough of the oldest calls leave the window.
+            return max(0.01, self._calls[len(self._calls) - limit] + self._window - now)
+        if priority is Priority.BACKGROUND and self._waiting[Priority.INTERACTIVE]:
+            return 0.05
+        self._calls.append(now)
+        return 0.0
+
+    def _record_wait(self, priority: Priority, waited: float) -> None:
+        with self._lock:
+            stats = self._wait_stats[priority]
+            stats["calls"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+
+    async def acquire(self, priority: Priority | None = None) -> float:
+        """Wait for a slot without blocking the event loop; return the time waited."""
+
+        priority = _REQUEST_PRIORITY.get() if priority is None else priority
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_acquire(priority)
+                    if not delay:
+                        break
+                    if not queued:
+                        self._waiting[priority] += 1
+                        queued = True
+                await asyncio.sleep(delay)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting[priority] -= 1
+
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def acquire_blocking(self, priority: Priority | None = None) -> float:
+        """Thread-blocking counterpart of :meth:`acquire` for the synchronous helpers."""
+
+        priority = _REQUEST_PRIORITY.get() if priority is None else priority
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_acquire(priority)
+                    if not delay:
+                        break
+                    if not queued:
+                        self._waiting[priority] += 1
+                        queued = True
+                time.sleep(delay)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting[priority] -= 1
+
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "calls_in_window": sum(1 for call in self._calls if call > now - self._window),
+                "limit": self._limits[Priority.INTERACTIVE],
+                **{priority.name.lower(): dict(stats) for priority, stats in self._wait_stats.items()},
+            }
+
+
+_QUOTA = QuotaLimiter(getattr(config, "openweather_calls_per_minute", 60))
+
+
+def quota_stats() -> dict[str, Any]:
+    """Return OpenWeather budget usage and queue-wait metrics per priority."""
+
+    return _QUOTA.stats()
+
+
 def _get_api_key(explicit_api_key: str | None = None) -> str:
     """Return the OpenWeather API key or raise if none is configured."""
 
@@ -55,16 +542,7 @@ def _get_api_key(explicit_api_key: str | None = None) -> str:
         raise WeatherApiKeyError("Invalid weather API key configuration.") from exc
 
 
-def geocode_city(
-    city: str,
-    *,
-    state: str | None = None,
-    country: str | None = None,
-    limit: int = 1,
-    api_key: str | None = None,
-) -> Coordinates:
-    """Return coordinates for the provided city using the direct geocoding endpoint."""
-
+def _geocode_query(city: str, *, state: str | None, country: str | None) -> str:
     if not city or not city.strip():
         raise ValueError("City name must be a non-empty string.")
 
@@ -73,19 +551,30 @@ def geocode_city(
         query_parts.append(state.strip())
     if country:
         query_parts.append(country.strip())
+    return ",".join(query_parts)
 
-    params = {
-        "q": ",".join(query_parts),
+
+def _geocode_params(query: str, *, limit: int, api_key: str | None) -> dict[str, Any]:
+    return {
+        "q": query,
         "limit": limit,
         "appid": _get_api_key(api_key),
     }
 
-    response = requests.get(GEOCODING_ENDPOINT, params=params, timeout=DEFAULT_TIMEOUT)
-    response.raise_for_status()
-    payload = response.json()
 
+def _cache_geocode_result(query: str, payload: Any) -> Coordinates:
+    try:
+        coordinates = _parse_geocode_payload(payload, query)
+    except LocationNotFoundError:
+        _GEOCODE_CACHE.store_missing(query)
+        raise
+    _GEOCODE_CACHE.store(query, coordinates)
+    return coordinates
+
+
+def _parse_geocode_payload(payload: Any, query: str) -> Coordinates:
     if not payload:
-        raise LocationNotFoundError(f"No matching locations found for '{params['q']}'.")
+        raise LocationNotFoundError(f"No matching locations found for '{query}'.")
 
     location = payload[0]
     try:
@@ -94,29 +583,89 @@ def geocode_city(
         raise WeatherServiceError("Malformed response from geocoding endpoint.") from exc
 
 
-def fetch_weather_by_coordinates(
-    coordinates: Coordinates,
-    *,
-    units: str = "metric",
-    api_key: str | None = None,
-) -> dict[str, Any]:
-    """Fetch weather information for the given coordinates."""
-
-    params = {
+def _weather_params(coordinates: Coordinates, *, units: str, api_key: str | None) -> dict[str, Any]:
+    return {
         "lat": coordinates.lat,
         "lon": coordinates.lon,
         "units": units,
         "appid": _get_api_key(api_key),
     }
 
-    response = requests.get(WEATHER_ENDPOINT, params=params, timeout=DEFAULT_TIMEOUT)
-    response.raise_for_status()
-    data = response.json()
+
+def _parse_weather_payload(data: Any) -> dict[str, Any]:
     if not isinstance(data, dict):
         raise WeatherServiceError("Unexpected weather payload received.")
     return data
 
 
+def _remember_city_id(query: str, payload: dict[str, Any]) -> None:
+    city_id = payload.get("id")
+    if isinstance(city_id, int) and city_id > 0:
+        _GEOCODE_CACHE.store_city_id(query, city_id)
+
+
+def _parse_group_payload(data: Any) -> dict[int, dict[str, Any]]:
+    try:
+        return {int(item["id"]): item for item in data["list"]}
+    except (KeyError, TypeError, ValueError) as exc:
+        raise WeatherServiceError("Malformed response from group weather endpoint.") from exc
+
+
+def cached_city_id(city: str, *, state: str | None = None, country: str | None = None) -> int | None:
+    """Return the OpenWeather city ID learned for *city*, without any API call."""
+
+    return _GEOCODE_CACHE.city_id(_geocode_query(city, state=state, country=country))
+
+
+def geocode_city(
+    city: str,
+    *,
+    state: str | None = None,
+    country: str | None = None,
+    limit: int = 1,
+    api_key: str | None = None,
+) -> Coordinates:
+    """Return coordinates for the provided city using the direct geocoding endpoint.
+
+    Results are served from the geocode cache when possible.
+    """
+
+    query = _geocode_query(city, state=state, country=country)
+    cached = _GEOCODE_CACHE.lookup(query)
+    if cached is not None:
+        return cached
+
+    params = _geocode_params(query, limit=limit, api_key=api_key)
+
+    _QUOTA.acquire_blocking()
+    response = requests.get(GEOCODING_ENDPOINT, params=params, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return _cache_geocode_result(query, response.json())
+
+
+def fetch_weather_by_coordinates(
+    coordinates: Coordinates,
+    *,
+    units: str = "metric",
+    api_key: str | None = None,
+) -> dict[str, Any]:
+    """Fetch weather information for the given coordinates.
+
+    Responses are cached for ``WEATHER_CACHE_TTL`` seconds and concurrent
+    requests for the same location share one API call.
+    """
+
+    params = _weather_params(coordinates, units=units, api_key=api_key)
+
+    def fetch() -> dict[str, Any]:
+        _QUOTA.acquire_blocking()
+        response = requests.get(WEATHER_ENDPOINT, params=params, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        return _parse_weather_payload(response.json())
+
+    return _WEATHER_CACHE.get_or_fetch(WeatherCache.key(coordinates, units), fetch)
+
+
 def fetch_weather_by_city(
     city: str,
     *,
@@ -128,7 +677,127 @@ def fetch_weather_by_city(
     """Convenience wrapper that combines geocoding and weather lookups."""
 
     coordinates = geocode_city(city, state=state, country=country, api_key=api_key)
-    return fetch_weather_by_coordinates(coordinates, units=units, api_key=api_key)
+    payload = fetch_weather_by_coordinates(coordinates, units=units, api_key=api_key)
+    _remember_city_id(_geocode_query(city, state=state, country=country), payload)
+    return payload
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Return the shared keep-alive session, creating it on first use."""
+
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        _SESSION = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        )
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session and save the geocode cache; call this on shutdown."""
+
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    await asyncio.to_thread(_GEOCODE_CACHE.flush)
+
+
+async def _get_json_async(url: str, params: dict[str, Any]) -> Any:
+    waited = await _QUOTA.acquire()
+    if waited > 1:
+        LOGGER.info("Waited %.1fs for OpenWeather quota (%s).", waited, _REQUEST_PRIORITY.get().name.lower())
+    try:
+        async with _get_session().get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        raise WeatherServiceError(f"OpenWeather request failed: {exc}") from exc
+
+
+async def geocode_city_async(
+    city: str,
+    *,
+    state: str | None = None,
+    country: str | None = None,
+    limit: int = 1,
+    api_key: str | None = None,
+) -> Coordinates:
+    """Async counterpart of :func:`geocode_city` using the shared session."""
+
+    query = _geocode_query(city, state=state, country=country)
+    cached = _GEOCODE_CACHE.lookup(query)
+    if cached is not None:
+        return cached
+
+    params = _geocode_params(query, limit=limit, api_key=api_key)
+    payload = await _get_json_async(GEOCODING_ENDPOINT, params)
+    return _cache_geocode_result(query, payload)
+
+
+async def fetch_weather_by_coordinates_async(
+    coordinates: Coordinates,
+    *,
+    units: str = "metric",
+    api_key: str | None = None,
+) -> dict[str, Any]:
+    """Async counterpart of :func:`fetch_weather_by_coordinates`."""
+
+    params = _weather_params(coordinates, units=units, api_key=api_key)
+
+    async def fetch() -> dict[str, Any]:
+        return _parse_weather_payload(await _get_json_async(WEATHER_ENDPOINT, params))
+
+    return await _WEATHER_CACHE.get_or_fetch_async(WeatherCache.key(coordinates, units), fetch)
+
+
+async def fetch_weather_by_city_async(
+    city: str,
+    *,
+    state: str | None = None,
+    country: str | None = None,
+    units: str = "metric",
+    api_key: str | None = None,
+) -> dict[str, Any]:
+    """Async counterpart of :func:`fetch_weather_by_city`."""
+
+    coordinates = await geocode_city_async(city, state=state, country=country, api_key=api_key)
+    payload = await fetch_weather_by_coordinates_async(coordinates, units=units, api_key=api_key)
+    _remember_city_id(_geocode_query(city, state=state, country=country), payload)
+    return payload
+
+
+async def fetch_weather_group_async(
+    city_ids: Sequence[int],
+    *,
+    units: str = "metric",
+    api_key: str | None = None,
+) -> dict[int, dict[str, Any]]:
+    """Fetch current weather for many city IDs via the group endpoint.
+
+    IDs are sent in chunks of ``GROUP_BATCH_SIZE`` (the API maximum), one
+    request per chunk, and the result maps each returned ID to its payload.
+    IDs the API does not return are simply absent.
+    """
+
+    unique_ids = list(dict.fromkeys(city_ids))
+    chunks = [unique_ids[i:i + GROUP_BATCH_SIZE] for i in range(0, len(unique_ids), GROUP_BATCH_SIZE)]
+    app_id = _get_api_key(api_key)
+
+    async def fetch_chunk(chunk: list[int]) -> dict[int, dict[str, Any]]:
+        params = {"id": ",".join(str(city_id) for city_id in chunk), "units": units, "appid": app_id}
+        return _parse_group_payload(await _get_json_async(GROUP_ENDPOINT, params))
+
+    results: dict[int, dict[str, Any]] = {}
+    for chunk_result in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_result)
+    return results
 
 
 def summarise_weather(data: dict[str, Any]) -> str:
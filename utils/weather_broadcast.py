@@ -9,14 +9,26 @@ from typing import Iterable, Sequence
 
 from aiogram import Bot
 
+from utils.broadcast_delivery import deliver_broadcast, resume_pending_broadcast
 from utils.weather import (
     LocationNotFoundError,
+    Priority,
+    WEATHER_CACHE_TTL,
     WeatherServiceError,
+    cached_city_id,
     fetch_weather_by_city,
+    fetch_weather_by_city_async,
+    fetch_weather_group_async,
+    request_priority,
 )
 
 LOGGER = logging.getLogger(__name__)
 
+DIGEST_CONCURRENCY = 5
+DIGEST_CITY_TIMEOUT = 15.0
+DIGEST_WARMUP_LEAD = 5 * 60
+DIGEST_MAX_AGE = WEATHER_CACHE_TTL
+
 
 def _weather_emoji(description: str, temp: float) -> str:
     desc = description.lower()
@@ -66,6 +78,18 @@ def format_weather_info(data: dict, requested_city: str | None = None) -> str:
     )
 
 
+def _render_section(city: str, payload: dict) -> str:
+    try:
+        return format_weather_info(payload, requested_city=city)
+    except (KeyError, IndexError, TypeError) as exc:
+        LOGGER.exception("Malformed weather payload for %s", city)
+        return f"⚠️ Received unexpected data for {city}: {exc}"
+
+
+def _digest_cities(cities: Sequence[str]) -> list[str]:
+    return [city for city in (raw_city.strip() for raw_city in cities) if city]
+
+
 def build_weather_digest(
     cities: Sequence[str],
     *,
@@ -76,11 +100,7 @@ def build_weather_digest(
 
     sections: list[str] = []
 
-    for raw_city in cities:
-        city = raw_city.strip()
-        if not city:
-            continue
-
+    for city in _digest_cities(cities):
         try:
             payload = fetch_weather_by_city(city, units=units, api_key=api_key)
         except LocationNotFoundError:
@@ -88,12 +108,74 @@ def build_weather_digest(
         except WeatherServiceError as exc:
             sections.append(f"⚠️ Failed to load weather for {city}: {exc}")
         else:
+            sections.append(_render_section(city, payload))
+
+    return "\n\n".join(sections)
+
+
+async def build_weather_digest_async(
+    cities: Sequence[str],
+    *,
+    units: str = "metric",
+    api_key: str | None = None,
+    max_concurrency: int = DIGEST_CONCURRENCY,
+    city_timeout: float = DIGEST_CITY_TIMEOUT,
+) -> str:
+    """Async counterpart of :func:`build_weather_digest`.
+
+    Cities are fetched concurrently, at most *max_concurrency* at a time, and
+    each city gets *city_timeout* seconds.  Sections keep the order of
+    *cities* regardless of which request finishes first.  Digest requests
+    run at background priority against the shared OpenWeather quota.
+
+    Cities whose OpenWeather ID is already known are fetched together through
+    the group endpoint (one call per 20 cities); the rest, and any city the
+    group call did not return, fall back to a per-city lookup, which also
+    records the ID for the next digest.
+    """
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    digest_cities = _digest_cities(cities)
+    city_ids = {city: cached_city_id(city) for city in digest_cities}
+    grouped: dict[int, dict] = {}
+
+    async def fetch_group() -> None:
+        known_ids = [city_id for city_id in city_ids.values() if city_id]
+        if not known_ids:
+            return
+        try:
+            grouped.update(
+                await asyncio.wait_for(
+                    fetch_weather_group_async(known_ids, units=units, api_key=api_key),
+                    timeout=city_timeout,
+                )
+            )
+        except (WeatherServiceError, asyncio.TimeoutError) as exc:
+            LOGGER.warning("Group weather request failed; falling back to per-city lookups: %s", exc)
+
+    async def build_section(city: str) -> str:
+        payload = grouped.get(city_ids[city])
+        if payload is not None:
+            return _render_section(city, payload)
+
+        async with semaphore:
             try:
-                sections.append(format_weather_info(payload, requested_city=city))
-            except (KeyError, IndexError, TypeError) as exc:
-                LOGGER.exception("Malformed weather payload for %s", city)
-                sections.append(f"⚠️ Received unexpected data for {city}: {exc}")
+                payload = await asyncio.wait_for(
+                    fetch_weather_by_city_async(city, units=units, api_key=api_key),
+                    timeout=city_timeout,
+                )
+            except LocationNotFoundError:
+                return f"⚠️ Could not find coordinates for {city}."
+            except asyncio.TimeoutError:
+                LOGGER.warning("Timed out loading weather for %s after %.1fs", city, city_timeout)
+                return f"⚠️ Timed out loading weather for {city}."
+            except WeatherServiceError as exc:
+                return f"⚠️ Failed to load weather for {city}: {exc}"
+        return _render_section(city, payload)
 
+    with request_priority(Priority.BACKGROUND):
+        await fetch_group()
+        sections = await asyncio.gather(*(build_section(city) for city in digest_cities))
     return "\n\n".join(sections)
 
 def _seconds_until(send_at: time, *, now: datetime | None = None) -> float:
@@ -106,6 +188,28 @@ def _seconds_until(send_at: time, *, now: datetime | None = None) -> float:
     return (target - reference).total_seconds()
 
 
+async def _build_report(
+    cities: Sequence[str],
+    *,
+    units: str,
+    api_key: str | None,
+    max_concurrency: int,
+    city_timeout: float,
+) -> str | None:
+    try:
+        report = await build_weather_digest_async(
+            cities,
+            units=units,
+            api_key=api_key,
+            max_concurrency=max_concurrency,
+            city_timeout=city_timeout,
+        )
+    except WeatherServiceError as exc:
+        LOGGER.exception("Unable to assemble weather digest: %s", exc)
+        return None
+    return report if report.strip() else None
+
+
 async def broadcast_daily_weather(
     bot: Bot,
     chat_ids: Iterable[int],
@@ -114,8 +218,17 @@ async def broadcast_daily_weather(
     send_at: time,
     units: str = "metric",
     api_key: str | None = None,
+    max_concurrency: int = DIGEST_CONCURRENCY,
+    city_timeout: float = DIGEST_CITY_TIMEOUT,
+    warmup_lead: float = DIGEST_WARMUP_LEAD,
+    max_report_age: float = DIGEST_MAX_AGE,
 ) -> None:
-    """Send a morning weather digest to every chat in *chat_ids* each day."""
+    """Send a morning weather digest to every chat in *chat_ids* each day.
+
+    The digest is fetched and rendered *warmup_lead* seconds before
+    *send_at* so delivery starts on time.  A prebuilt report older than
+    *max_report_age* seconds is rebuilt before it is sent.
+    """
 
     chat_id_list = [chat_id for chat_id in chat_ids if chat_id is not None]
     if not chat_id_list:
@@ -128,33 +241,61 @@ async def broadcast_daily_weather(
         len(chat_id_list),
     )
 
+    try:
+        await resume_pending_broadcast(bot)
+    except Exception:  # pragma: no cover - resuming must never stop the schedule.
+        LOGGER.exception("Failed to resume interrupted weather broadcast")
+
+    loop = asyncio.get_running_loop()
+
+    async def build() -> str | None:
+        return await _build_report(
+            cities,
+            units=units,
+            api_key=api_key,
+            max_concurrency=max_concurrency,
+            city_timeout=city_timeout,
+        )
+
     try:
         while True:
             delay = max(0.0, _seconds_until(send_at))
+            send_date = (datetime.now() + timedelta(seconds=delay)).date()
+            deadline = loop.time() + delay
             LOGGER.debug("Next weather broadcast in %.2f seconds", delay)
             try:
-                await asyncio.sleep(delay)
+                await asyncio.sleep(max(0.0, delay - warmup_lead))
             except asyncio.CancelledError:
                 LOGGER.info("Weather broadcast task cancelled before sending message.")
                 raise
 
-            try:
-                report = await asyncio.to_thread(
-                    build_weather_digest, cities, units=units, api_key=api_key
-                )
-            except WeatherServiceError as exc:
-                LOGGER.exception("Unable to assemble weather digest: %s", exc)
-                continue
+            report = await build()
+            built_at = loop.time()
+            # Refresh the prebuilt report whenever it would be stale at send time.
+            while report is not None and built_at + max_report_age < deadline:
+                await asyncio.sleep(max(0.0, built_at + max_report_age - loop.time()))
+                report = await build() or report
+                built_at = loop.time()
 
-            if not report.strip():
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            if report is None or loop.time() - built_at > max_report_age:
+                report = await build()
+            if report is None:
                 LOGGER.info("Weather digest was empty; skipping broadcast.")
                 continue
 
-            for chat_id in chat_id_list:
-                try:
-                    await bot.send_message(chat_id, report, parse_mode="HTML")
-                except Exception:  # pragma: no cover - aiogram raises runtime-specific errors.
-                    LOGGER.exception("Failed to send weather broadcast to chat %s", chat_id)
+            LOGGER.info("Weather digest sent %.2fs after schedule.", max(0.0, loop.time() - deadline))
+            delivery = await deliver_broadcast(
+                bot,
+                chat_id_list,
+                report,
+                broadcast_id=f"daily-weather-{send_date.isoformat()}",
+            )
+            LOGGER.info(
+                "Weather broadcast delivered to %d chat(s), %d failed.",
+                delivery.delivered,
+                delivery.failed,
+            )
     except asyncio.CancelledError:
         LOGGER.info("Weather broadcast loop stopped.")
         raise
@@ -0,0 +1,355 @@
+"""Per-chat weather subscriptions and the scheduler that delivers them.
+
+Each chat may subscribe to a daily digest for its own cities at a local time
+in its own timezone.  Subscriptions are stored in SQLite
+(``WEATHER_SUBSCRIPTIONS_DB``, default ``files/weather_subscriptions.sqlite3``).
+
+A single :class:`SubscriptionScheduler` task keeps a min-heap of
+``(next fire time, chat id)`` entries, so scheduling and rescheduling cost
+``O(log n)`` regardless of the number of subscribers.  Changed or removed
+subscriptions are invalidated lazily: their stale heap entries are skipped
+when they surface.  Entries that are due together are dispatched as one
+batch; chats sharing a city list share one digest.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time as time_module
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from aiogram import Bot
+
+from utils.broadcast_delivery import DeliveryCheckpoint, deliver_checkpoint
+from utils.weather import WeatherServiceError
+from utils.weather_broadcast import (
+    DIGEST_CITY_TIMEOUT,
+    DIGEST_CONCURRENCY,
+    build_weather_digest_async,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+_DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "files" / "weather_subscriptions.sqlite3"
+SUBSCRIPTIONS_DB = Path(os.getenv("WEATHER_SUBSCRIPTIONS_DB", _DEFAULT_DB_PATH))
+
+MAX_CITIES = 10
+BATCH_SIZE = 500
+BATCH_WINDOW = 1.0
+
+
+class InvalidSubscriptionError(ValueError):
+    """Raised when a subscription request cannot be parsed."""
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    """Daily digest settings of one chat."""
+
+    chat_id: int
+    cities: tuple[str, ...]
+    send_at: time
+    timezone: str
+
+    def next_fire(self, now: datetime | None = None) -> datetime:
+        """Return the next local ``send_at`` strictly after *now* as an aware datetime."""
+
+        zone = ZoneInfo(self.timezone)
+        local_now = (now or datetime.now(timezone.utc)).astimezone(zone)
+        target = datetime.combine(local_now.date(), self.send_at, tzinfo=zone)
+        if target <= local_now:
+            target = datetime.combine(local_now.date() + timedelta(days=1), self.send_at, tzinfo=zone)
+        return target
+
+
+def parse_subscription(chat_id: int, args: str) -> Subscription:
+    """Parse ``H:MM <timezone> <city>[, <city>...]`` into a :class:`Subscription`."""
+
+    parts = args.split(maxsplit=2)
+    if len(parts) < 3:
+        raise InvalidSubscriptionError("Expected a time, a timezone and at least one city.")
+
+    raw_time, raw_zone, raw_cities = parts
+    try:
+        send_at = datetime.strptime(raw_time, "%H:%M").time()
+    except ValueError as exc:
+        raise InvalidSubscriptionError(f"Invalid time {raw_time!r}; use HH:MM.") from exc
+    try:
+        ZoneInfo(raw_zone)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise InvalidSubscriptionError(f"Unknown timezone {raw_zone!r}.") from exc
+
+    cities = tuple(dict.fromkeys(city.strip() for city in raw_cities.split(",") if city.strip()))
+    if not cities:
+        raise InvalidSubscriptionError("Expected at least one city.")
+    if len(cities) > MAX_CITIES:
+        raise InvalidSubscriptionError(f"At most {MAX_CITIES} cities are allowed.")
+
+    return Subscription(chat_id=chat_id, cities=cities, send_at=send_at, timezone=raw_zone)
+
+
+class SubscriptionStore:
+    """SQLite-backed table of subscriptions keyed by chat id."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS weather_subscriptions (
+            chat_id INTEGER PRIMARY KEY,
+            cities TEXT NOT NULL,
+            send_at TEXT NOT NULL,
+            timezone TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the disk.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _from_row(row: tuple) -> Subscription:
+        chat_id, cities, send_at, zone = row
+        return Subscription(int(chat_id), tuple(json.loads(cities)), time.fromisoformat(send_at), zone)
+
+    def all(self) -> list[Subscription]:
+        rows = self._connection().execute(
+            "SELECT chat_id, cities, send_at, timezone FROM weather_subscriptions"
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get(self, chat_id: int) -> Subscription | None:
+        row = self._connection().execute(
+            "SELECT chat_id, cities, send_at, timezone FROM weather_subscriptions WHERE chat_id = ?",
+            (chat_id,),
+        ).fetchone()
+        return self._from_row(row) if row else None
+
+    def upsert(self, subscription: Subscription) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO weather_subscriptions (chat_id, cities, send_at, timezone) VALUES (?, ?, ?, ?)",
+            (
+                subscription.chat_id,
+                json.dumps(list(subscription.cities), ensure_ascii=False),
+                subscription.send_at.strftime("%H:%M"),
+                subscription.timezone,
+            ),
+        )
+
+    def delete(self, chat_id: int) -> bool:
+        cursor = self._connection().execute("DELETE FROM weather_subscriptions WHERE chat_id = ?", (chat_id,))
+        return cursor.rowcount > 0
+
+
+class SubscriptionScheduler:
+    """Deliver every subscription at its next fire time from one task."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        store: SubscriptionStore,
+        *,
+        batch_size: int = BATCH_SIZE,
+        batch_window: float = BATCH_WINDOW,
+        max_concurrency: int = DIGEST_CONCURRENCY,
+        city_timeout: float = DIGEST_CITY_TIMEOUT,
+        units: str = "metric",
+        api_key: str | None = None,
+    ) -> None:
+        self._bot = bot
+        self._store = store
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._max_concurrency = max_concurrency
+        self._city_timeout = city_timeout
+        self._units = units
+        self._api_key = api_key
+        self._heap: list[tuple[float, int, int]] = []
+        self._active: dict[int, tuple[int, Subscription]] = {}
+        self._versions = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatches: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def schedule(self, subscription: Subscription, *, now: datetime | None = None) -> datetime:
+        """Add or replace *subscription* and return its next fire time."""
+
+        fire_at = subscription.next_fire(now)
+        version = next(self._versions)
+        self._active[subscription.chat_id] = (version, subscription)
+        heapq.heappush(self._heap, (fire_at.timestamp(), version, subscription.chat_id))
+        if len(self._heap) > 2 * len(self._active) + 1024:
+            self._compact()
+        if self._heap[0][1] == version:
+            self._wakeup.set()
+        return fire_at
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry for entry in self._heap
+            if self._active.get(entry[2], (None,))[0] == entry[1]
+        ]
+        heapq.heapify(self._heap)
+
+    def cancel(self, chat_id: int) -> None:
+        # The heap entry stays behind and is dropped when it reaches the top.
+        self._active.pop(chat_id, None)
+
+    def _prune(self) -> None:
+        while self._heap:
+            _, version, chat_id = self._heap[0]
+            current = self._active.get(chat_id)
+            if current is not None and current[0] == version:
+                return
+            heapq.heappop(self._heap)
+
+    def next_fire_timestamp(self) -> float | None:
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float | None = None) -> list[Subscription]:
+        """Pop up to ``batch_size`` due subscriptions and reschedule them for their next day."""
+
+        now = time_module.time() if now is None else now
+        due: list[Subscription] = []
+        while len(due) < self._batch_size:
+            fire_ts = self.next_fire_timestamp()
+            if fire_ts is None or fire_ts > now + self._batch_window:
+                break
+            _, version, chat_id = heapq.heappop(self._heap)
+            subscription = self._active[chat_id][1]
+            due.append(subscription)
+            self.schedule(subscription, now=datetime.fromtimestamp(max(now, fire_ts), timezone.utc))
+        return due
+
+    async def _dispatch(self, batch: Sequence[Subscription]) -> None:
+        groups: dict[tuple[str, ...], tuple[tuple[str, ...], list[int]]] = {}
+        for subscription in batch:
+            key = tuple(city.casefold() for city in subscription.cities)
+            groups.setdefault(key, (subscription.cities, []))[1].append(subscription.chat_id)
+
+        for cities, chat_ids in groups.values():
+            try:
+                report = await build_weather_digest_async(
+                    cities,
+                    units=self._units,
+                    api_key=self._api_key,
+                    max_concurrency=self._max_concurrency,
+                    city_timeout=self._city_timeout,
+                )
+            except WeatherServiceError:
+                LOGGER.exception("Unable to assemble subscription digest for %s", ", ".join(cities))
+                continue
+            if not report.strip():
+                continue
+
+            # Sends draw from the same process-wide bucket as the daily broadcast.
+            delivery = await deliver_checkpoint(
+                self._bot,
+                DeliveryCheckpoint(broadcast_id="weather-subscription", text=report, chat_ids=chat_ids),
+                checkpoint_path=None,
+            )
+            LOGGER.info(
+                "Subscription digest delivered to %d chat(s), %d failed.",
+                delivery.delivered,
+                delivery.failed,
+            )
+
+    async def run(self) -> None:
+        """Load stored subscriptions and dispatch due batches until cancelled."""
+
+        for subscription in await asyncio.to_thread(self._store.all):
+            self.schedule(subscription)
+        LOGGER.info("Weather subscription scheduler started with %d subscription(s).", len(self))
+
+        while True:
+            self._wakeup.clear()
+            fire_ts = self.next_fire_timestamp()
+            delay = None if fire_ts is None else max(0.0, fire_ts - time_module.time())
+            if delay is None or delay > 0:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                continue
+
+            batch = self.pop_due()
+            if batch:
+                LOGGER.info("Dispatching weather subscriptions for %d chat(s).", len(batch))
+                task = asyncio.create_task(self._dispatch(batch))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatches.discard)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self) -> None:
+        tasks = [task for task in (self._task, *self._dispatches) if task is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._task = None
+
+
+_STORE = SubscriptionStore(SUBSCRIPTIONS_DB)
+_SCHEDULER: SubscriptionScheduler | None = None
+
+
+async def get_subscription(chat_id: int) -> Subscription | None:
+    return await asyncio.to_thread(_STORE.get, chat_id)
+
+
+async def subscribe(subscription: Subscription) -> datetime:
+    """Persist *subscription* and return its next fire time."""
+
+    await asyncio.to_thread(_STORE.upsert, subscription)
+    if _SCHEDULER is not None:
+        return _SCHEDULER.schedule(subscription)
+    return subscription.next_fire()
+
+
+async def unsubscribe(chat_id: int) -> bool:
+    removed = await asyncio.to_thread(_STORE.delete, chat_id)
+    if _SCHEDULER is not None:
+        _SCHEDULER.cancel(chat_id)
+    return removed
+
+
+def start(bot: Bot, **options) -> SubscriptionScheduler:
+    """Start the subscription scheduler on the running event loop."""
+
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = SubscriptionScheduler(bot, _STORE, **options)
+    _SCHEDULER.start()
+    return _SCHEDULER
+
+
+async def shutdown() -> None:
+    global _SCHEDULER
+    if _SCHEDULER is not None:
+        await _SCHEDULER.shutdown()
+        _SCHEDULER = None